@@ -0,0 +1,241 @@
+"""
+Versi async (Django async ORM) dari view list dan detail di api.views, dipakai
+kalau ``API_ASYNC_VIEWS=1`` saat aplikasi dijalankan lewat ASGI (tidak aktif secara default).
+
+GET menghasilkan body JSON yang sama dengan APIView-nya dan memakai cache response
+yang sama; method lain (POST/PUT/PATCH/DELETE/OPTIONS) diteruskan ke APIView sinkron. Token
+snapshot uas_app.refdata dicek sebelum view dijalankan, jadi data referensi (list/detail
+Province, City, TourismType dan ?expand=) dibaca dari memori tanpa query di kode async;
+kalau ada FK yang belum ada di snapshot, serialisasinya dijalankan lewat ``sync_to_async``.
+Cache response juga diakses lewat ``sync_to_async`` karena backend-nya bisa berupa database.
+Browsable API tidak tersedia di GET versi async.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from api import views
+from api.cache import CachedResponseMixin, cached_response, store_response
+from api.conditional import etag
+from api.filters import CityFilter, TouristSpotFilter
+from api.pagination import KeysetPagination, TouristSpotPagination
+from api.renderers import FastJSONRenderer
+from api.serializers import (CitySerializer, ProvinceSerializer, ReadPlan, TourismTypeSerializer,
+                             TouristSpotSerializer)
+from uas_app import refdata
+from uas_app.models import City, Province, TourismType, TouristSpot
+
+renderer = FastJSONRenderer()
+
+
+def snapshot_misses(model, rows):
+    """True kalau ada FK data referensi di ``rows`` yang tidak ada di snapshot, jadi serialisasinya bisa query."""
+    snapshot = refdata.current()
+    fields = [field for field in model._meta.concrete_fields if isinstance(field, refdata.ReferenceForeignKey)]
+    for row in rows:
+        # baris values() (jalur cepat) tidak pernah membaca objek terkait
+        if isinstance(row, dict):
+            continue
+        for field in fields:
+            # kolom yang deferred (only()) tidak dibaca serializer
+            pk = row.__dict__.get(field.attname)
+            if pk is not None and pk not in snapshot.table(field.related_model).rows:
+                return True
+    return False
+
+
+async def serialize(plan, model, rows, many=False):
+    if snapshot_misses(model, rows if many else [rows]):
+        # id yang belum ada di snapshot dibaca ForeignKey biasa lewat query, jadi tidak di event loop
+        return await sync_to_async(plan.data)(rows, many=many)
+    return plan.data(rows, many=many)
+
+
+class AsyncReadView(View):
+    # APIView yang menangani method selain GET/HEAD
+    sync_view = None
+    cache_models = ()
+    expand_cache_models = ()
+    get_cache_models = CachedResponseMixin.get_cache_models
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        cls.write_view = staticmethod(sync_to_async(cls.sync_view.as_view()))
+        # sama dengan APIView: API ini tidak memakai session auth, jadi tanpa CSRF
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await self.write_view(request, *args, **kwargs)
+        return await self.get(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        # Request DRF untuk query_params, dipakai ReadPlan, filter dan pagination
+        request = Request(request)
+        key = None
+        if self.cache_models:
+            # backend cache bisa berupa database/jaringan (DatabaseCache, Redis): tidak di event loop
+            key, cached = await sync_to_async(cached_response)(
+                request, self.__class__.__name__, self.get_cache_models(request),
+            )
+            if cached is not None:
+                return cached
+
+        try:
+            with refdata.request_scope():
+                await sync_to_async(refdata.current)()
+                response = await self.read(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            response = Response(detail, status=exc.status_code)
+        headers = {'Vary': 'Accept'}
+        if response.has_header('ETag'):
+            headers['ETag'] = response['ETag']
+        http_response = HttpResponse(
+            renderer.render(response.data), status=response.status_code, content_type=renderer.media_type,
+            headers=headers,
+        )
+        return await sync_to_async(store_response)(key, http_response) if key else http_response
+
+    async def read(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+
+class AsyncListView(AsyncReadView):
+    model = None
+    serializer_class = None
+    pagination_class = KeysetPagination
+    filterset_class = None
+    # label pesan ?ids= (multi-get); None kalau view-nya tidak mendukung ?ids=
+    multi_get_label = None
+
+    async def read(self, request):
+        if refdata.is_reference(self.model):
+            if self.multi_get_label and 'ids' in request.query_params:
+                return views.multi_get_response(
+                    request, request.query_params['ids'], self.model, self.serializer_class, self.multi_get_label,
+                )
+            return views.snapshot_list(request, self, self.model, self.serializer_class)
+
+        if self.multi_get_label and 'ids' in request.query_params:
+            ids, error = views.multi_get_ids(request.query_params['ids'])
+            if error is not None:
+                return error
+            plan = ReadPlan(request, self.serializer_class, allow_fast=True)
+            rows = [row async for row in views.multi_get_queryset(plan, self.model, ids)]
+            if snapshot_misses(self.model, rows):
+                return await sync_to_async(views.multi_get_results)(plan, rows, ids, self.multi_get_label)
+            return views.multi_get_results(plan, rows, ids, self.multi_get_label)
+
+        plan = ReadPlan(request, self.serializer_class, allow_fast=True)
+        queryset = self.model.objects.all()
+        if self.filterset_class is not None:
+            queryset = DjangoFilterBackend().filter_queryset(request, queryset, self)
+        paginator = self.pagination_class()
+        rows = await paginator.apaginate_queryset(plan.apply(queryset), request, view=self)
+        return paginator.get_paginated_response(await serialize(plan, self.model, rows, many=True))
+
+
+class AsyncDetailView(AsyncReadView):
+    model = None
+    serializer_class = None
+    label = None
+
+    async def read(self, request, id):
+        plan = ReadPlan(request, self.serializer_class, allow_fast=True)
+        try:
+            if refdata.is_reference(self.model):
+                instance = views.snapshot_object(plan, self.model, id)
+                if instance is None:
+                    raise self.model.DoesNotExist
+            else:
+                instance = await plan.apply(self.model.objects.all(), extra=('last_modified',)).aget(id=id)
+        except self.model.DoesNotExist:
+            return Response({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'message': '%s tidak ditemukan' % self.label,
+                'data': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'status': status.HTTP_200_OK,
+            'message': '%s ditemukan' % self.label,
+            'data': await serialize(plan, self.model, instance)
+        }, headers={'ETag': etag(instance)})
+
+
+class TouristSpotList(AsyncListView):
+    sync_view = views.TouristSpotList
+    cache_models = views.TouristSpotList.cache_models
+    expand_cache_models = views.TouristSpotList.expand_cache_models
+    model = TouristSpot
+    serializer_class = TouristSpotSerializer
+    pagination_class = TouristSpotPagination
+    filterset_class = TouristSpotFilter
+    multi_get_label = 'Wisata'
+
+
+class TouristSpotDetail(AsyncDetailView):
+    sync_view = views.TouristSpotDetail
+    cache_models = views.TouristSpotDetail.cache_models
+    expand_cache_models = views.TouristSpotDetail.expand_cache_models
+    model = TouristSpot
+    serializer_class = TouristSpotSerializer
+    label = 'Wisata'
+
+
+class ProvinceList(AsyncListView):
+    sync_view = views.ProvinceList
+    cache_models = views.ProvinceList.cache_models
+    model = Province
+    serializer_class = ProvinceSerializer
+    multi_get_label = 'Provinsi'
+
+
+class ProvinceDetail(AsyncDetailView):
+    sync_view = views.ProvinceDetail
+    cache_models = views.ProvinceDetail.cache_models
+    model = Province
+    serializer_class = ProvinceSerializer
+    label = 'Provinsi'
+
+
+class CityList(AsyncListView):
+    sync_view = views.CityList
+    cache_models = views.CityList.cache_models
+    expand_cache_models = views.CityList.expand_cache_models
+    model = City
+    serializer_class = CitySerializer
+    filterset_class = CityFilter
+    multi_get_label = 'Kota'
+
+
+class CityDetail(AsyncDetailView):
+    sync_view = views.CityDetail
+    cache_models = views.CityDetail.cache_models
+    expand_cache_models = views.CityDetail.expand_cache_models
+    model = City
+    serializer_class = CitySerializer
+    label = 'Kota'
+
+
+class TourismTypeList(AsyncListView):
+    sync_view = views.TourismTypeList
+    cache_models = views.TourismTypeList.cache_models
+    model = TourismType
+    serializer_class = TourismTypeSerializer
+
+
+class TourismTypeDetail(AsyncDetailView):
+    sync_view = views.TourismTypeDetail
+    cache_models = views.TourismTypeDetail.cache_models
+    model = TourismType
+    serializer_class = TourismTypeSerializer
+    label = 'Jenis wisata'
@@ -0,0 +1,136 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from uas_app import refdata
+from uas_app.signals import bulk_saved
+
+
+class BulkWriter:
+    """
+    Validasi dan simpan banyak objek sekaligus.
+
+    FK di-prefetch sekali per batch (data referensi dari snapshot uas_app.refdata),
+    baris yang sudah ada dicari lewat natural key per chunk, lalu ditulis dengan
+    bulk_create/bulk_update dalam satu transaksi.
+    Item yang gagal validasi dilaporkan per index tanpa menggagalkan batch.
+    """
+
+    def __init__(self, serializer_class, related, natural_key, upsert=False):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        # nama field FK -> model tujuan, mis. {'city': City}
+        self.related = related
+        self.natural_key = natural_key
+        self.upsert = upsert
+        self.batch_size = getattr(settings, 'API_BULK_BATCH_SIZE', 500)
+
+    def prefetch(self, items):
+        prefetched = {}
+        for field_name, model in self.related.items():
+            pks = set()
+            for item in items:
+                try:
+                    pks.add(int(item.get(field_name)))
+                except (TypeError, ValueError, AttributeError):
+                    pass
+            objects = {}
+            if refdata.is_reference(model):
+                objects = refdata.current().table(model).in_bulk(pks)
+                # id yang belum ada di snapshot (mis. baru dibuat proses lain) dicek ke database
+                pks -= set(objects)
+            if pks:
+                objects.update(model.objects.in_bulk(pks))
+            prefetched[field_name] = objects
+        return prefetched
+
+    def key_of(self, instance):
+        return tuple(getattr(instance, self.model._meta.get_field(name).attname) for name in self.natural_key)
+
+    def validate(self, items):
+        context = {'prefetched': self.prefetch(items)}
+        results = []
+        valid = []
+        seen = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results.append({'index': index, 'status': 'error', 'errors': {'non_field_errors': ['Item harus berupa object']}})
+                continue
+            serializer = self.serializer_class(data=item, context=context)
+            if not serializer.is_valid():
+                results.append({'index': index, 'status': 'error', 'errors': serializer.errors})
+                continue
+            instance = self.model(**serializer.validated_data)
+            key = self.key_of(instance)
+            if key in seen:
+                results.append({'index': index, 'status': 'error', 'errors': {
+                    'non_field_errors': ['Duplikat dengan item index %d dalam batch yang sama' % seen[key]]
+                }})
+                continue
+            seen[key] = index
+            result = {'index': index, 'status': None}
+            results.append(result)
+            valid.append((result, instance, list(serializer.validated_data)))
+        return results, valid
+
+    def find_existing(self, instances):
+        # satu query per chunk: WHERE k1 IN (...) AND k2 IN (...), lalu dicocokkan di Python
+        attnames = [self.model._meta.get_field(name).attname for name in self.natural_key]
+        filters = {
+            '%s__in' % attname: {getattr(instance, attname) for instance in instances}
+            for attname in attnames
+        }
+        rows = self.model.objects.filter(**filters).values_list('pk', *attnames)
+        return {tuple(row[1:]): row[0] for row in rows}
+
+    def write_chunk(self, chunk):
+        existing = self.find_existing([instance for _, instance, _ in chunk])
+        auto_now_fields = [
+            field for field in self.model._meta.concrete_fields if getattr(field, 'auto_now', False)
+        ]
+        now = timezone.now()
+        to_create = []
+        # item bisa mengirim kolom yang berbeda-beda; update dikelompokkan per set kolom
+        # supaya kolom yang tidak dikirim tidak ikut tertimpa
+        to_update = {}
+        for result, instance, fields in chunk:
+            pk = existing.get(self.key_of(instance))
+            if pk is None:
+                result['status'] = 'created'
+                to_create.append((result, instance))
+            elif self.upsert:
+                instance.pk = pk
+                # bulk_update tidak menjalankan auto_now
+                for field in auto_now_fields:
+                    setattr(instance, field.attname, now)
+                update_fields = tuple(sorted(set(fields) | {field.name for field in auto_now_fields}))
+                result['status'] = 'updated'
+                result['id'] = pk
+                to_update.setdefault(update_fields, []).append(instance)
+            else:
+                result['status'] = 'error'
+                result['errors'] = {'non_field_errors': ['Data sudah ada']}
+
+        created = self.model.objects.bulk_create([instance for _, instance in to_create])
+        for (result, _), instance in zip(to_create, created):
+            result['id'] = instance.pk
+        updated = []
+        for update_fields, instances in to_update.items():
+            self.model.objects.bulk_update(instances, update_fields)
+            updated.extend(instances)
+        return created, updated
+
+    def run(self, items):
+        results, valid = self.validate(items)
+        created = []
+        updated = []
+        with transaction.atomic():
+            for start in range(0, len(valid), self.batch_size):
+                chunk_created, chunk_updated = self.write_chunk(valid[start:start + self.batch_size])
+                created.extend(chunk_created)
+                updated.extend(chunk_updated)
+            # bulk_create/bulk_update tidak mengirim post_save; seperti post_save, sinyalnya dikirim
+            # di dalam transaksi ini, jadi receiver yang gagal ikut me-rollback penulisannya
+            if created or updated:
+                bulk_saved.send(sender=self.model, created=created, updated=updated)
+        return results
@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+
+from api import metrics, replicas
+from uas_app.models import City, Province, TourismType, TouristSpot
+from uas_app.signals import bulk_deleted, bulk_saved
+
+CACHED_MODELS = (Province, City, TourismType, TouristSpot)
+CACHED_HEADERS = ('Content-Type', 'Vary', 'Allow', 'ETag')
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+# waktu commit terakhir yang menaikkan versi, untuk response yang dibaca dari replika
+WRITTEN_KEY = 'api:written-at'
+
+
+def version_key(model):
+    return 'api:version:%s' % model._meta.label_lower
+
+
+def new_version():
+    # versi awal berbasis waktu, jadi kalau counter ter-evict tidak akan kembali ke nilai lama
+    return time.time_ns()
+
+
+def get_versions(models):
+    cache = get_cache()
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model):
+    cache = get_cache()
+    try:
+        cache.incr(version_key(model))
+    except ValueError:
+        cache.set(version_key(model), new_version(), None)
+    cache.set(WRITTEN_KEY, time.time(), None)
+
+
+def is_current_read():
+    """False kalau request ini dibaca dari snapshot replika yang dibuat sebelum penulisan terakhir."""
+    snapshot = replicas.current_snapshot()
+    if snapshot is None:
+        return True
+    written = get_cache().get(WRITTEN_KEY)
+    return written is None or snapshot >= written
+
+
+def record(view_name, outcome):
+    with _stats_lock:
+        _stats[(view_name, outcome)] += 1
+    metrics.inc('api_response_cache_total', {'view': view_name, 'result': outcome})
+
+
+def stats():
+    with _stats_lock:
+        items = list(_stats.items())
+    views = {}
+    for (view_name, outcome), count in items:
+        views.setdefault(view_name, {'hit': 0, 'miss': 0})[outcome] = count
+    for counts in views.values():
+        total = counts['hit'] + counts['miss']
+        counts['hit_ratio'] = round(counts['hit'] / total, 4) if total else 0.0
+    return views
+
+
+def response_key(request, models):
+    versions = get_versions(models)
+    raw = '|'.join([
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        request.META.get('HTTP_ACCEPT', ''),
+        ','.join(str(version) for version in versions),
+    ])
+    return 'api:response:%s' % hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def cached_response(request, view_name, models):
+    """``(key, response)``; response berisi byte dari cache, atau None kalau miss."""
+    key = response_key(request, models)
+    cached = get_cache().get(key)
+    if cached is None:
+        record(view_name, 'miss')
+        return key, None
+    record(view_name, 'hit')
+    headers, content = cached
+    response = HttpResponse(content, headers=headers)
+    response['X-Cache'] = 'HIT'
+    return key, response
+
+
+def store_response(key, response):
+    # data replika yang tertinggal tidak boleh disimpan di bawah versi yang sudah baru
+    if response.status_code == 200 and not response.streaming and is_current_read():
+        if hasattr(response, 'render'):
+            response.render()
+        headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+        get_cache().set(key, (headers, response.content), getattr(settings, 'API_CACHE_TIMEOUT', 300))
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+class CachedResponseMixin:
+    """
+    Simpan byte response GET per URL + query string.
+
+    Key memuat versi setiap model di ``cache_models``; sinyal save/delete menaikkan
+    versi itu sehingga entry lama otomatis tidak terpakai lagi.
+    """
+    cache_models = ()
+    # model yang datanya ikut di response hanya saat ?expand= dipakai
+    expand_cache_models = ()
+
+    def get_cache_models(self, request):
+        if not request.GET.get('expand'):
+            return self.cache_models
+        return tuple(self.cache_models) + tuple(
+            model for model in self.expand_cache_models if model not in self.cache_models
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or not self.cache_models:
+            return super().dispatch(request, *args, **kwargs)
+
+        key, cached = cached_response(request, self.__class__.__name__, self.get_cache_models(request))
+        if cached is not None:
+            return cached
+        return store_response(key, super().dispatch(request, *args, **kwargs))
+
+
+def invalidate(sender, **kwargs):
+    # dinaikkan setelah commit, supaya request lain tidak menyimpan data lama di versi baru
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate, sender=model, dispatch_uid='api-cache-save-%s' % model._meta.label_lower)
+    post_delete.connect(invalidate, sender=model, dispatch_uid='api-cache-delete-%s' % model._meta.label_lower)
+    bulk_saved.connect(invalidate, sender=model, dispatch_uid='api-cache-bulk-%s' % model._meta.label_lower)
+    bulk_deleted.connect(invalidate, sender=model, dispatch_uid='api-cache-bulk-delete-%s' % model._meta.label_lower)
@@ -0,0 +1,166 @@
+"""
+Update bersyarat (PATCH) dengan satu ``UPDATE ... WHERE id = %s AND last_modified IN (...)``.
+
+Versi objek adalah ``last_modified`` dalam mikrodetik; dikirim sebagai ETag di GET/PUT/PATCH
+detail dan dicocokkan dengan header ``If-Match``. Hanya kolom yang dikirim klien (ditambah kolom
+auto_now) yang ditulis, tanpa SELECT sebelumnya: TouristSpot divalidasi dengan instance yang hanya
+berisi id, data referensi dengan baris dari snapshot uas_app.refdata. Kalau versinya sudah
+berubah, tidak ada baris yang ditulis dan klien mendapat 412.
+
+``post_save`` tetap dikirim (dengan ``update_fields``) supaya index, change log, cache response
+dan snapshot ikut diperbarui. Kolom yang tidak ikut diubah di instance TouristSpot-nya deferred;
+untuk response (objek lengkap, sama dengan PUT dan GET) barisnya dibaca sekali setelah UPDATE.
+"""
+import calendar
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_save
+
+from uas_app import refdata
+
+VERSION_FIELD = 'last_modified'
+# If-Match: * (versi apa pun, asal objeknya ada)
+ANY = '*'
+
+UPDATED = 'updated'
+INVALID = 'invalid'
+NOT_FOUND = 'not_found'
+CONFLICT = 'conflict'
+
+
+def version(item):
+    """Versi instance atau baris ``values()`` sebagai bilangan bulat (mikrodetik sejak epoch)."""
+    value = item[VERSION_FIELD] if isinstance(item, dict) else getattr(item, VERSION_FIELD)
+    return calendar.timegm(value.utctimetuple()) * 1000000 + value.microsecond
+
+
+def from_version(number):
+    seconds, microseconds = divmod(number, 1000000)
+    return datetime.fromtimestamp(seconds, tz=dt_timezone.utc).replace(microsecond=microseconds)
+
+
+def format_etag(number):
+    return '"%d"' % number
+
+
+def etag(item):
+    return format_etag(version(item))
+
+
+def parse_if_match(request):
+    """None tanpa header, ``ANY`` untuk ``*``, selain itu set versi; ETag lemah atau rusak tidak pernah cocok."""
+    header = request.META.get('HTTP_IF_MATCH')
+    if header is None:
+        return None
+    if header.strip() == ANY:
+        return ANY
+    versions = set()
+    for tag in header.split(','):
+        tag = tag.strip()
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.add(int(tag[1:-1]))
+    return versions
+
+
+def matches(if_match, item):
+    return if_match is None or if_match == ANY or version(item) in if_match
+
+
+class ConditionalUpdate:
+    """
+    Validasi ``data`` secara parsial lalu tulis kolomnya dengan satu UPDATE bersyarat.
+
+    Dipanggil di dalam ``serialized_write``: transaksinya sudah memegang lock tulis, jadi
+    baris yang dibaca ulang dari database di sini tidak bisa berubah sampai commit.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.reference = refdata.is_reference(self.model)
+
+    def current(self, pk, from_db):
+        # data referensi butuh baris lengkap untuk efek samping post_save (index lokasi, nama di FTS);
+        # snapshot bisa tertinggal dari database, jadi database dipakai kalau snapshot meleset
+        if from_db:
+            return self.model._default_manager.filter(pk=pk).first()
+        return refdata.current().table(self.model).get(pk)
+
+    def run(self, pk, data, if_match):
+        """
+        ``(hasil, nilai)``: (UPDATED, instance lengkap), (INVALID, errors), (NOT_FOUND, None)
+        atau (CONFLICT, versi saat ini).
+        """
+        if if_match is not None and if_match != ANY and not if_match:
+            return self.conflict(pk)
+        from_db = False
+        while True:
+            current = None
+            if self.reference:
+                current = self.current(pk, from_db)
+                if current is None or not matches(if_match, current):
+                    if from_db:
+                        return (NOT_FOUND, None) if current is None else (CONFLICT, version(current))
+                    from_db = True
+                    continue
+            # TouristSpot: hanya id yang terisi, kolom lain deferred (diakses = query)
+            instance = current if current is not None else self.model.from_db(
+                DEFAULT_DB_ALIAS, [self.model._meta.pk.attname], [pk],
+            )
+            serializer = self.serializer_class(instance, data=data, partial=True)
+            if not serializer.is_valid():
+                return INVALID, serializer.errors
+            if not serializer.validated_data:
+                return INVALID, {'non_field_errors': ['Tidak ada field yang diubah']}
+
+            if current is not None:
+                expected = [current.last_modified]
+            elif if_match not in (None, ANY):
+                expected = [from_version(number) for number in if_match]
+            else:
+                expected = None
+            fields = self.write(instance, serializer.validated_data, expected)
+            if fields is not None:
+                return UPDATED, self.saved(instance)
+            if current is None:
+                return self.conflict(pk)
+            if from_db:
+                # tidak terjadi selama lock tulis dipegang; dianggap konflik daripada menulis ulang
+                return CONFLICT, version(current)
+            from_db = True
+
+    def saved(self, instance):
+        # data referensi sudah berisi baris lengkap; TouristSpot hanya kolom yang ditulis. Lock tulis
+        # masih dipegang, jadi baris yang dibaca di sini persis hasil UPDATE tadi
+        if instance.get_deferred_fields():
+            return self.model._default_manager.get(pk=instance.pk)
+        return instance
+
+    def conflict(self, pk):
+        modified = self.model._default_manager.filter(pk=pk).values_list(VERSION_FIELD, flat=True).first()
+        if modified is None:
+            return NOT_FOUND, None
+        return CONFLICT, version({VERSION_FIELD: modified})
+
+    def write(self, instance, validated_data, expected):
+        """UPDATE kolom yang berubah; kembalikan field yang ditulis, atau None kalau tidak ada baris yang cocok."""
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        fields = [self.model._meta.get_field(name) for name in validated_data]
+        fields += [
+            field for field in self.model._meta.concrete_fields
+            if getattr(field, 'auto_now', False) and field not in fields
+        ]
+        # pre_save(): FileField menyimpan file upload ke storage, auto_now mengisi waktu sekarang
+        values = {field.attname: field.pre_save(instance, False) for field in fields}
+        queryset = self.model._default_manager.filter(pk=instance.pk)
+        if expected is not None:
+            queryset = queryset.filter(**{'%s__in' % VERSION_FIELD: expected})
+        if not queryset.update(**values):
+            return None
+        post_save.send(
+            sender=self.model, instance=instance, created=False,
+            update_fields=frozenset(field.name for field in fields), raw=False, using=instance._state.db,
+        )
+        return fields
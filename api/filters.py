@@ -0,0 +1,53 @@
+from django_filters import rest_framework as filters
+from django_filters import utils
+from django_filters.constants import EMPTY_VALUES
+
+from uas_app.models import City, TouristSpot
+
+
+class TouristSpotFilter(filters.FilterSet):
+    """
+    ?status=, ?city=, ?city__province=, ?tourism_type=,
+    ?distance_from_city_min=/_max= dan ?last_modified_after=/_before=.
+
+    Setiap kombinasi dilayani index di TouristSpot.Meta.indexes (lihat
+    uas_app.tests.FilterQueryPlanTests). Tanpa ?ordering=, filter range
+    mengubah urutan default (api.pagination.TouristSpotPagination).
+    """
+    # FK difilter lewat id saja; ModelChoiceFilter akan menambah satu query validasi per parameter
+    city = filters.NumberFilter(field_name='city_id')
+    city__province = filters.NumberFilter(field_name='city__province_id')
+    tourism_type = filters.NumberFilter(field_name='tourism_type_id')
+    distance_from_city = filters.RangeFilter()
+    last_modified = filters.IsoDateTimeFromToRangeFilter()
+
+    class Meta:
+        model = TouristSpot
+        fields = ['status', 'city', 'city__province', 'tourism_type', 'distance_from_city', 'last_modified']
+
+
+class CityFilter(filters.FilterSet):
+    """?province= dan ?name= (sama persis)."""
+    province = filters.NumberFilter(field_name='province_id')
+
+    class Meta:
+        model = City
+        fields = ['province', 'name']
+
+
+def filter_rows(filterset_class, request, rows):
+    """
+    Terapkan FilterSet ke baris dict di memori (snapshot uas_app.refdata); validasi dan error-nya
+    sama dengan DjangoFilterBackend. Hanya untuk filter 'exact' per kolom, seperti CityFilter.
+    """
+    model = filterset_class._meta.model
+    filterset = filterset_class(request.query_params, queryset=model._default_manager.none(), request=request)
+    if not filterset.is_valid():
+        raise utils.translate_validation(filterset.errors)
+    for name, value in filterset.form.cleaned_data.items():
+        if value in EMPTY_VALUES:
+            continue
+        # field_name boleh attname ('province_id'); key baris memakai nama field ('province')
+        column = model._meta.get_field(filterset.filters[name].field_name).name
+        rows = [row for row in rows if row[column] == value]
+    return rows
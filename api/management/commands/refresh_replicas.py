@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import replicas
+
+
+class Command(BaseCommand):
+    help = 'Perbarui snapshot replika baca (DATABASES dengan TEST MIRROR=default) dari database utama.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Ulangi setiap N detik (0 = sekali saja); sebaiknya di bawah API_REPLICA_MAX_LAG')
+
+    def handle(self, *args, **options):
+        aliases = replicas.replica_aliases()
+        if not aliases:
+            self.stdout.write(self.style.WARNING('Tidak ada replika; atur env API_READ_REPLICAS.'))
+            return
+        while True:
+            for alias in aliases:
+                started = time.perf_counter()
+                replicas.refresh(alias)
+                self.stdout.write('%s diperbarui (%.2f detik)' % (alias, time.perf_counter() - started))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
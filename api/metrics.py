@@ -0,0 +1,343 @@
+"""
+Metrik Prometheus untuk semua view API, dijumlahkan lintas worker gunicorn.
+
+Setiap proses menulis ke file mmap sendiri di ``API_METRICS_DIR`` (tanpa lock antar
+proses); endpoint ``/metrics`` membaca semua file itu dan menjumlahkannya. Gauge
+request yang sedang berjalan hanya dihitung dari proses yang masih hidup.
+
+Worker antrean tugas (uas_app.tasks) ikut menulis metrik tugasnya ke direktori yang sama;
+kedalaman antrean dihitung langsung dari tabel Task saat ``/metrics`` diminta.
+"""
+import glob
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+from api.profiling import request_timing
+from uas_app.tasks import task_finished
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+TASK_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+# nama -> (tipe, keterangan, bucket histogram)
+METRICS = {
+    'api_requests_total': ('counter', 'Jumlah request per view, method dan status HTTP.', None),
+    'api_request_duration_seconds': ('histogram', 'Durasi request per view (detik).', LATENCY_BUCKETS),
+    'api_requests_in_progress': ('gauge', 'Request yang sedang diproses per view.', None),
+    'api_db_queries_per_request': ('histogram', 'Jumlah query SQL per request.', QUERY_BUCKETS),
+    'api_response_cache_total': ('counter', 'Hit dan miss cache response per view.', None),
+    'tasks_total': ('counter', 'Tugas antrean yang dijalankan per nama dan hasil (done/retry/failed).', None),
+    'task_wait_seconds': ('histogram', 'Lama tugas menunggu di antrean sampai diambil worker (detik).', TASK_BUCKETS),
+    'task_duration_seconds': ('histogram', 'Durasi eksekusi tugas (detik).', TASK_BUCKETS),
+    'task_queue_depth': ('gauge', 'Tugas queued/running per nama, dibaca dari tabel Task.', None),
+}
+# tipe gauge yang nilainya hanya berarti selama prosesnya hidup
+LIVE_METRICS = {'api_requests_in_progress'}
+
+HEADER_SIZE = 8
+INITIAL_SIZE = 1 << 16
+
+
+def metrics_dir():
+    return str(getattr(settings, 'API_METRICS_DIR', os.path.join(tempfile.gettempdir(), 'uas-metrics')))
+
+
+def series(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def encode_key(key):
+    name, labels = key
+    return json.dumps([name, dict(labels)], sort_keys=True, separators=(',', ':'))
+
+
+def decode_key(text):
+    name, labels = json.loads(text)
+    return series(name, labels)
+
+
+def read_entries(data, used):
+    """(key, value, offset) dari isi file metrik; format: [panjang key][key + padding][double]."""
+    position = HEADER_SIZE
+    while position < used:
+        length = struct.unpack_from('i', data, position)[0]
+        position += 4
+        key = bytes(data[position:position + length]).decode('utf-8')
+        position += length + (8 - (4 + length) % 8) % 8
+        yield key, struct.unpack_from('d', data, position)[0], position
+        position += 8
+
+
+class MmapValues:
+    """Nilai metrik satu proses di file mmap; hanya proses pemiliknya yang menulis."""
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.file = open(path, 'a+b')
+        self.capacity = os.fstat(self.file.fileno()).st_size
+        if self.capacity == 0:
+            self.capacity = INITIAL_SIZE
+            self.file.truncate(self.capacity)
+        self.data = mmap.mmap(self.file.fileno(), self.capacity)
+        self.used = struct.unpack_from('i', self.data, 0)[0] or HEADER_SIZE
+        # key di memori berupa tuple (lihat series()); JSON hanya untuk entry baru di file
+        self.positions = {decode_key(key): offset for key, value, offset in read_entries(self.data, self.used)}
+
+    def add(self, key, amount):
+        with self.lock:
+            offset = self.positions.get(key)
+            if offset is None:
+                offset = self.positions[key] = self.new_entry(key)
+            value = struct.unpack_from('d', self.data, offset)[0]
+            struct.pack_into('d', self.data, offset, value + amount)
+
+    def new_entry(self, key):
+        encoded = encode_key(key).encode('utf-8')
+        padding = (8 - (4 + len(encoded)) % 8) % 8
+        entry = struct.pack('i%dsd' % (len(encoded) + padding), len(encoded), encoded, 0.0)
+        while self.used + len(entry) > self.capacity:
+            self.capacity *= 2
+            self.data.close()
+            self.file.truncate(self.capacity)
+            self.data = mmap.mmap(self.file.fileno(), self.capacity)
+        self.data[self.used:self.used + len(entry)] = entry
+        self.used += len(entry)
+        # panjang yang terpakai ditulis terakhir, jadi pembaca tidak melihat entry setengah jadi
+        struct.pack_into('i', self.data, 0, self.used)
+        return self.used - 8
+
+
+_values = None
+_values_lock = threading.Lock()
+
+
+@receiver(setting_changed)
+def reopen_values(setting, **kwargs):
+    # override_settings(API_METRICS_DIR=...) di test: file metrik dibuka ulang di direktori barunya
+    global _values
+    if setting == 'API_METRICS_DIR':
+        _values = None
+
+
+def get_values():
+    # dibuat ulang setelah fork, supaya setiap worker punya file sendiri
+    global _values
+    pid = os.getpid()
+    if _values is None or _values[0] != pid:
+        with _values_lock:
+            if _values is None or _values[0] != pid:
+                directory = metrics_dir()
+                os.makedirs(directory, exist_ok=True)
+                _values = (pid, MmapValues(os.path.join(directory, 'metrics_%d.db' % pid)))
+    return _values[1]
+
+
+def inc(name, labels, amount=1.0):
+    get_values().add(series(name, labels), amount)
+
+
+def observe(name, labels, value):
+    buckets = METRICS[name][2]
+    values = get_values()
+    index = bisect_left(buckets, value)
+    bound = format_bound(buckets[index]) if index < len(buckets) else '+Inf'
+    # per proses disimpan per bucket; dijadikan kumulatif saat /metrics dibaca
+    values.add(series(name + '_bucket', dict(labels, le=bound)), 1.0)
+    values.add(series(name + '_sum', labels), value)
+    values.add(series(name + '_count', labels), 1.0)
+
+
+def format_bound(value):
+    return repr(float(value))
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """Jumlahkan nilai dari semua file proses: {(nama sampel, label tuple): nilai}."""
+    totals = {}
+    for path in glob.glob(os.path.join(metrics_dir(), 'metrics_*.db')):
+        pid = int(os.path.basename(path)[len('metrics_'):-len('.db')])
+        try:
+            with open(path, 'rb') as handle:
+                data = handle.read()
+        except FileNotFoundError:
+            continue
+        if len(data) < HEADER_SIZE:
+            continue
+        live = is_alive(pid)
+        for key, value, offset in read_entries(data, struct.unpack_from('i', data, 0)[0]):
+            sample = decode_key(key)
+            if sample[0] in LIVE_METRICS and not live:
+                continue
+            totals[sample] = totals.get(sample, 0.0) + value
+    return totals
+
+
+def clear():
+    """Hapus semua file metrik; dipanggil saat server (master gunicorn) mulai."""
+    for path in glob.glob(os.path.join(metrics_dir(), 'metrics_*.db')):
+        os.remove(path)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_sample(name, labels, value):
+    if labels:
+        name += '{%s}' % ','.join('%s="%s"' % (label, escape(text)) for label, text in labels)
+    return '%s %s' % (name, repr(float(value)))
+
+
+def exposition(totals):
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s %s' % (name, kind))
+        if kind != 'histogram':
+            for (sample, labels), value in sorted(totals.items()):
+                if sample == name:
+                    lines.append(format_sample(name, labels, value))
+            continue
+
+        series = sorted({labels for (sample, labels) in totals if sample == name + '_count'})
+        bounds = [format_bound(bound) for bound in buckets] + ['+Inf']
+        for labels in series:
+            cumulative = 0.0
+            for bound in bounds:
+                cumulative += totals.get((name + '_bucket', tuple(sorted(labels + (('le', bound),)))), 0.0)
+                lines.append(format_sample(name + '_bucket', labels + (('le', bound),), cumulative))
+            lines.append(format_sample(name + '_sum', labels, totals.get((name + '_sum', labels), 0.0)))
+            lines.append(format_sample(name + '_count', labels, totals[(name + '_count', labels)]))
+
+    # rasio turunan dari api_response_cache_total, untuk dashboard tanpa PromQL
+    lines.append('# HELP api_response_cache_hit_ratio Rasio hit cache response per view sejak server mulai.')
+    lines.append('# TYPE api_response_cache_hit_ratio gauge')
+    outcomes = {}
+    for (sample, labels), value in totals.items():
+        if sample == 'api_response_cache_total':
+            labels = dict(labels)
+            outcomes.setdefault(labels['view'], {})[labels['result']] = value
+    for view_name, counts in sorted(outcomes.items()):
+        total = counts.get('hit', 0.0) + counts.get('miss', 0.0)
+        lines.append(format_sample('api_response_cache_hit_ratio', (('view', view_name),),
+                                   counts.get('hit', 0.0) / total if total else 0.0))
+    return '\n'.join(lines) + '\n'
+
+
+def queue_depth():
+    from django.db.models import Count
+
+    from uas_app.models import Task
+    from uas_app.tasks import OPEN
+
+    rows = Task.objects.filter(status__in=OPEN).values('name', 'status').annotate(count=Count('id')).order_by()
+    return {series('task_queue_depth', {'task': row['name'], 'status': row['status']}): row['count'] for row in rows}
+
+
+def metrics_view(request):
+    totals = collect()
+    totals.update(queue_depth())
+    return HttpResponse(exposition(totals), content_type=CONTENT_TYPE)
+
+
+def record_task(sender, task, result, wait, duration, **kwargs):
+    labels = {'task': task.name}
+    inc('tasks_total', dict(labels, result=result))
+    observe('task_wait_seconds', labels, wait)
+    observe('task_duration_seconds', labels, duration)
+
+
+task_finished.connect(record_task, dispatch_uid='api-metrics-task-finished')
+
+
+def view_label(view_func):
+    view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+    return (view_class or view_func).__name__
+
+
+class MetricsMiddleware:
+    """
+    Catat jumlah request, durasi, request yang berjalan dan jumlah query SQL per view.
+
+    Pencatatan hanya beberapa penulisan ke mmap per request, jadi aman aktif terus.
+    Jumlah query diambil dari ``RequestTiming`` yang sama dengan ProfilingMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            # handler ASGI membungkus process_view sinkron dengan sync_to_async (pindah thread per request)
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with request_timing() as timing:
+            db_before = timing.db_count
+            try:
+                response = self.get_response(request)
+            finally:
+                self.leave(request)
+        return self.finish(request, response, timing, started, db_before)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with request_timing() as timing:
+            db_before = timing.db_count
+            try:
+                response = await self.get_response(request)
+            finally:
+                self.leave(request)
+        return self.finish(request, response, timing, started, db_before)
+
+    def leave(self, request):
+        view_name = getattr(request, '_metrics_view', None)
+        if view_name is not None:
+            inc('api_requests_in_progress', {'view': view_name}, -1.0)
+
+    def finish(self, request, response, timing, started, db_before):
+        labels = {'view': getattr(request, '_metrics_view', None) or 'unresolved'}
+        inc('api_requests_total', dict(labels, method=request.method, status=str(response.status_code)))
+        observe('api_request_duration_seconds', labels, time.perf_counter() - started)
+        observe('api_db_queries_per_request', labels, timing.db_count - db_before)
+        return response
+
+    def enter(self, request, view_func):
+        request._metrics_view = view_label(view_func)
+        inc('api_requests_in_progress', {'view': request._metrics_view})
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.enter(request, view_func)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.enter(request, view_func)
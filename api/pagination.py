@@ -0,0 +1,277 @@
+import base64
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination yang memakai posisi baris terakhir (keyset), bukan OFFSET.
+
+    Cursor berisi nilai kolom urutan dari baris terakhir di halaman sebelumnya,
+    sehingga halaman berikutnya cukup dicari lewat index dengan
+    ``WHERE (a, b) > (x, y) ORDER BY a, b LIMIT n``.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+
+    # key query param -> kolom urutan; kolom terakhir harus unik (biasanya id)
+    orderings = {
+        'id': ('id',),
+        '-id': ('-id',),
+    }
+    default_ordering = 'id'
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE or 50
+        self.max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # untuk view async (api.async_views): halaman dibaca lewat async ORM
+        return self.set_page([row async for row in self.page_queryset(queryset, request)])
+
+    def paginate_rows(self, rows, request, model):
+        # untuk baris dict di memori (snapshot uas_app.refdata): urutan dan cursor sama dengan versi queryset
+        self.request = request
+        self.ordering_key = self.get_ordering_key(request)
+        self.ordering = self.orderings[self.ordering_key]
+        self.limit = self.get_page_size(request)
+
+        columns = [field.lstrip('-') for field in self.ordering]
+        # semua urutan di sini searah untuk setiap kolomnya
+        descending = self.ordering[0].startswith('-')
+
+        def key(row):
+            return tuple(row[column] for column in columns)
+
+        rows = sorted(rows, key=key, reverse=descending)
+        position = self.decode_cursor(request, model)
+        if position is not None:
+            position = tuple(position)
+            rows = [row for row in rows if (key(row) < position if descending else key(row) > position)]
+        return self.set_page(rows[:self.limit + 1])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.ordering_key = self.get_ordering_key(request)
+        self.ordering = self.orderings[self.ordering_key]
+        self.limit = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        # kolom urutan harus ikut dimuat (only()/values()) untuk membentuk cursor
+        ordering_columns = [field.lstrip('-') for field in self.ordering]
+        loaded, deferred = queryset.query.deferred_loading
+        if queryset._fields:
+            missing = [name for name in ordering_columns if name not in queryset._fields]
+            if missing:
+                queryset = queryset.values(*queryset._fields, *missing)
+        elif loaded and not deferred:
+            queryset = queryset.only(*loaded, *ordering_columns)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(position))
+
+        # ambil satu baris lebih untuk tahu apakah masih ada halaman berikutnya
+        return queryset[:self.limit + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_ordering_key(self, request):
+        key = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if key not in self.orderings:
+            raise ValidationError({
+                self.ordering_query_param: 'Urutan tidak didukung. Pilihan: %s' % ', '.join(self.orderings)
+            })
+        return key
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            page_size = int(value)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Harus berupa angka'})
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: 'Minimal 1'})
+        return min(page_size, self.max_page_size)
+
+    def get_position(self, row):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            values.append(value)
+        return values
+
+    def get_keyset_filter(self, position):
+        # (a, b, c) > (x, y, z)  ->  a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = '%s__lt' % name if field.startswith('-') else '%s__gt' % name
+            term = Q(**{lookup: position[index]})
+            for prev_field, prev_value in zip(self.ordering[:index], position[:index]):
+                term &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= term
+        return condition
+
+    def encode_cursor(self, position):
+        payload = json.dumps([self.ordering_key, position], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            ordering_key, position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if ordering_key != self.ordering_key or len(position) != len(self.ordering):
+                raise ValueError
+            return self.parse_position(model, position)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise ValidationError({self.cursor_query_param: 'Cursor tidak valid'})
+
+    def parse_position(self, model, position):
+        return [
+            model._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(self.ordering, position)
+        ]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+
+class TouristSpotPagination(KeysetPagination):
+    orderings = {
+        'id': ('id',),
+        '-id': ('-id',),
+        'last_modified': ('last_modified', 'id'),
+        '-last_modified': ('-last_modified', '-id'),
+        'distance_from_city': ('distance_from_city', 'id'),
+        '-distance_from_city': ('-distance_from_city', '-id'),
+    }
+    # tanpa ?ordering=, filter range (api.filters.TouristSpotFilter) diurutkan menurut kolomnya sendiri
+    # supaya range dan urutan dilayani satu index; dengan urutan id SQLite memilih scan tabel
+    # untuk range satu sisi
+    range_orderings = {
+        'last_modified_after': 'last_modified',
+        'last_modified_before': 'last_modified',
+        'distance_from_city_min': 'distance_from_city',
+        'distance_from_city_max': 'distance_from_city',
+    }
+
+    def get_ordering_key(self, request):
+        if self.ordering_query_param not in request.query_params:
+            for param, ordering_key in self.range_orderings.items():
+                if param in request.query_params:
+                    return ordering_key
+        return super().get_ordering_key(request)
+
+
+class SearchPagination(KeysetPagination):
+    # posisi = (skor bm25, id); hasil pencarian tidak berasal dari queryset biasa
+    orderings = {
+        'rank': ('rank', 'id'),
+    }
+    default_ordering = 'rank'
+
+    def parse_position(self, model, position):
+        return [float(position[0]), int(position[1])]
+
+    def paginate_hits(self, search, queryset, request):
+        # search(limit, after) -> [(pk, rank)] terurut
+        self.request = request
+        self.ordering_key = self.get_ordering_key(request)
+        self.ordering = self.orderings[self.ordering_key]
+        self.limit = self.get_page_size(request)
+
+        hits = search(self.limit + 1, self.decode_cursor(request, queryset.model))
+        self.has_next = len(hits) > self.limit
+        hits = hits[:self.limit]
+        self.next_position = [hits[-1][1], hits[-1][0]] if self.has_next else None
+
+        objects = queryset.in_bulk([pk for pk, _ in hits])
+        return [objects[pk] for pk, _ in hits if pk in objects]
+
+
+class SyncPagination(KeysetPagination):
+    # ?since= berisi token dari response sync sebelumnya (id ChangeLog terakhir yang diterima)
+    cursor_query_param = 'since'
+    orderings = {
+        'id': ('id',),
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        rows = super().paginate_queryset(queryset, request, view=view)
+        self.token = self.get_position(rows[-1])[0] if rows else self.since
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'token': self.token,
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['required'].append('token')
+        response_schema['properties']['token'] = {'type': 'integer'}
+        return response_schema
+
+    def encode_cursor(self, position):
+        return str(position[0])
+
+    def decode_cursor(self, request, model):
+        self.since = 0
+        value = request.query_params.get(self.cursor_query_param)
+        if not value:
+            return None
+        try:
+            self.since = int(value)
+            if self.since < 0:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({self.cursor_query_param: 'Token sync tidak valid'})
+        return [self.since]
@@ -0,0 +1,170 @@
+import cProfile
+import os
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_current = ContextVar('api_request_timing', default=None)
+
+
+class RequestTiming:
+    """Waktu satu request: jumlah dan durasi query SQL, plus bagian yang diukur dengan ``timed()``."""
+    __slots__ = ('started', 'db_count', 'db_time', 'sections')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.sections = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        # dipasang lewat connection.execute_wrapper()
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_count += 1
+
+    def server_timing(self, total):
+        parts = ['db;dur=%.3f;desc="%d query"' % (self.db_time * 1000, self.db_count)]
+        parts.extend('%s;dur=%.3f' % (name, duration * 1000) for name, duration in self.sections.items())
+        parts.append('total;dur=%.3f' % (total * 1000))
+        return ', '.join(parts)
+
+
+@contextmanager
+def timed(name):
+    """
+    Catat durasi blok ini sebagai ``name`` di Server-Timing request yang sedang berjalan.
+
+    Query SQL yang dijalankan di dalam blok (mis. queryset lazy yang dievaluasi
+    serializer) tidak ikut dihitung, karena sudah masuk ke ``db``.
+    """
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    db_before = timing.db_time
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started - (timing.db_time - db_before)
+        timing.sections[name] = timing.sections.get(name, 0.0) + elapsed
+
+
+def record_query(execute, sql, params, many, context):
+    # dipasang permanen di setiap koneksi, karena query async ORM berjalan di thread lain
+    # (koneksinya juga lain); contextvar ikut terbawa ke thread itu lewat sync_to_async
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    return timing(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder, dispatch_uid='api-profiling-record-query')
+
+
+@contextmanager
+def request_timing():
+    """``RequestTiming`` untuk request yang sedang berjalan; kalau belum ada, dibuat sampai blok ini selesai."""
+    timing = _current.get()
+    if timing is not None:
+        yield timing
+        return
+    # koneksi yang dibuka sebelum modul ini di-import tidak mendapat sinyal connection_created
+    for connection in connections.all(initialized_only=True):
+        install_query_recorder(connection)
+    timing = RequestTiming()
+    token = _current.set(timing)
+    try:
+        yield timing
+    finally:
+        _current.reset(token)
+
+
+class ProfilingMiddleware:
+    """
+    Tambahkan header Server-Timing (db, serialize, render, total) ke setiap response.
+
+    Dengan ``API_PROFILE_SAMPLE_RATE`` > 0, sebagian request dijalankan di bawah
+    cProfile; profilnya disimpan ke ``API_PROFILE_DIR`` hanya kalau durasinya masuk
+    ``API_PROFILE_SLOWEST_PERCENT`` persen paling lambat dari request terakhir.
+    """
+    window = 1000
+    min_window = 20
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.sample_rate = getattr(settings, 'API_PROFILE_SAMPLE_RATE', 0.0)
+        self.slowest_percent = getattr(settings, 'API_PROFILE_SLOWEST_PERCENT', 5)
+        self.profile_dir = str(getattr(settings, 'API_PROFILE_DIR', settings.BASE_DIR / 'profiles'))
+        self.durations = deque(maxlen=self.window)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        profiler = cProfile.Profile() if self.sample_rate and random.random() < self.sample_rate else None
+        with request_timing() as timing:
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Python 3.12+: hanya satu profiler aktif per proses (worker thread lain sedang di-profile)
+                    profiler = None
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+
+        return self.finish(request, response, timing, profiler)
+
+    async def __acall__(self, request):
+        # tanpa cProfile: di event loop profiler juga merekam request lain yang berjalan bersamaan
+        with request_timing() as timing:
+            response = await self.get_response(request)
+        return self.finish(request, response, timing)
+
+    def finish(self, request, response, timing, profiler=None):
+        total = time.perf_counter() - timing.started
+        self.durations.append(total)
+        response['Server-Timing'] = timing.server_timing(total)
+        if profiler is not None and self.is_slow(total):
+            self.dump(profiler, request, total)
+        return response
+
+    def is_slow(self, duration):
+        durations = sorted(self.durations)
+        # belum cukup data untuk tahu mana yang termasuk paling lambat
+        if len(durations) < self.min_window:
+            return False
+        index = int(len(durations) * (1 - self.slowest_percent / 100.0))
+        return duration >= durations[min(index, len(durations) - 1)]
+
+    def dump(self, profiler, request, duration):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-')[:80] or 'root'
+        filename = '%s-%d-%s-%s-%dms.prof' % (
+            time.strftime('%Y%m%d-%H%M%S'), os.getpid(), request.method, slug, duration * 1000)
+        # baca dengan: python -m pstats <file> atau snakeviz <file>
+        profiler.dump_stats(os.path.join(self.profile_dir, filename))
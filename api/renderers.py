@@ -0,0 +1,32 @@
+from rest_framework.renderers import JSONRenderer
+
+from api.profiling import timed
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer dengan satu instance encoder yang dipakai ulang.
+
+    Output byte-per-byte sama dengan JSONRenderer untuk response compact; response
+    dengan indent (mis. ``Accept: application/json; indent=4``) diteruskan ke parent.
+    """
+
+    def __init__(self):
+        super().__init__()
+        separators = (',', ':') if self.compact else (', ', ': ')
+        self.encoder = self.encoder_class(
+            ensure_ascii=self.ensure_ascii, allow_nan=not self.strict, separators=separators,
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with timed('render'):
+            if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+                return super().render(data, accepted_media_type, renderer_context)
+
+            ret = self.encoder.encode(data)
+            # sama seperti JSONRenderer: \u2028 dan \u2029 selalu di-escape
+            if '\u2028' in ret or '\u2029' in ret:
+                ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+            return ret.encode()
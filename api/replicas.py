@@ -0,0 +1,183 @@
+"""
+Replika baca: request GET/HEAD ke API dibaca dari salinan snapshot SQLite, penulisan tetap ke ``default``.
+
+Replika adalah alias di ``DATABASES`` dengan ``TEST['MIRROR'] = 'default'`` (lihat settings).
+Snapshot dibuat dengan online backup API SQLite ke file sementara lalu ``os.replace``, jadi
+file replika tidak pernah berubah setelah ditulis dan bisa dibuka ``immutable``; waktu mulai
+snapshot disimpan sebagai mtime file-nya.
+
+Replika hanya dipakai kalau snapshot-nya belum lebih tua dari ``API_REPLICA_MAX_LAG`` detik
+dan dimulai setelah penulisan terakhir klien ini (cookie ``API_REPLICA_COOKIE``, dikirim di
+setiap response tulis). Selain itu request dibaca dari ``default``.
+"""
+import os
+import random
+import sqlite3
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_current = ContextVar('api_replica', default=None)
+
+
+class ReplicaRead:
+    __slots__ = ('alias', 'snapshot')
+
+    def __init__(self, alias, snapshot):
+        self.alias = alias
+        self.snapshot = snapshot
+
+
+def replica_aliases():
+    return [alias for alias, database in settings.DATABASES.items()
+            if alias != PRIMARY and database.get('TEST', {}).get('MIRROR') == PRIMARY]
+
+
+def sqlite_path(name):
+    # NAME replika berbentuk URI: file:/path/replica_1.sqlite3?mode=ro&immutable=1
+    name = str(name)
+    if name.startswith('file:'):
+        name = name[len('file:'):].split('?', 1)[0]
+    return name
+
+
+def snapshot_time(alias):
+    """Waktu mulai snapshot replika (epoch detik), None kalau belum pernah dibuat."""
+    database = settings.DATABASES[alias]
+    if not database['ENGINE'].endswith('sqlite3'):
+        # replika non-SQLite (mis. Postgres dengan replikasi streaming) tidak punya waktu snapshot
+        return time.time()
+    try:
+        return os.stat(sqlite_path(database['NAME'])).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def max_lag():
+    return getattr(settings, 'API_REPLICA_MAX_LAG', 10)
+
+
+def cookie_name():
+    return getattr(settings, 'API_REPLICA_COOKIE', 'api_written')
+
+
+def last_write(request):
+    try:
+        return float(request.COOKIES.get(cookie_name(), 0))
+    except ValueError:
+        return 0.0
+
+
+def choose_replica(request):
+    """ReplicaRead untuk request baca ini, atau None kalau harus dibaca dari primary."""
+    if request.method not in SAFE_METHODS:
+        return None
+    if not request.path.startswith(tuple(getattr(settings, 'API_REPLICA_PATHS', ('/api/',)))):
+        return None
+    aliases = replica_aliases()
+    if not aliases:
+        return None
+    oldest = max(time.time() - max_lag(), last_write(request))
+    fresh = []
+    for alias in aliases:
+        snapshot = snapshot_time(alias)
+        if snapshot is not None and snapshot >= oldest:
+            fresh.append(ReplicaRead(alias, snapshot))
+    return random.choice(fresh) if fresh else None
+
+
+def current_snapshot():
+    """Waktu snapshot replika yang dibaca request ini, None kalau dari primary."""
+    replica = _current.get()
+    return None if replica is None else replica.snapshot
+
+
+class ReplicaRouter:
+    """Baca dari replika yang dipilih ReplicaMiddleware untuk request ini; tulis dan migrasi ke primary."""
+
+    def db_for_read(self, model, **hints):
+        replica = _current.get()
+        return PRIMARY if replica is None else replica.alias
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # semua replika berisi data yang sama dengan primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaMiddleware:
+    """Pilih replika untuk request baca, dan tandai klien yang baru menulis supaya membaca dari primary."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _current.set(choose_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = _current.set(choose_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response)
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replica_aliases():
+            # setelah API_REPLICA_MAX_LAG detik semua replika yang boleh dipakai sudah memuat tulisan ini
+            response.set_cookie(cookie_name(), '%.6f' % time.time(), max_age=int(max_lag()) + 1,
+                                httponly=True, samesite='Lax')
+        return response
+
+
+def copy_database(source_name, target_path):
+    """Salin database ``source_name`` ke ``target_path`` sebagai snapshot replika; kembalikan waktu mulainya."""
+    directory = os.path.dirname(target_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = '%s.%d.tmp' % (target_path, os.getpid())
+    started = time.time()
+    source = sqlite3.connect(str(source_name), uri=str(source_name).startswith('file:'))
+    try:
+        source.execute('PRAGMA busy_timeout=5000')
+        target = sqlite3.connect(temporary)
+        try:
+            # satu langkah: snapshot konsisten; di WAL penulis tidak tertahan selama penyalinan
+            source.backup(target)
+            # file replika dibuka immutable, jadi tanpa file -wal/-shm
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+    finally:
+        source.close()
+    os.utime(temporary, (started, started))
+    # request yang masih membaca snapshot lama tetap memegang file lamanya sampai koneksinya ditutup
+    os.replace(temporary, target_path)
+    return started
+
+
+def refresh(alias):
+    return copy_database(settings.DATABASES[PRIMARY]['NAME'], sqlite_path(settings.DATABASES[alias]['NAME']))
@@ -1,29 +1,271 @@
+from django.conf import settings
 from rest_framework import serializers
-from uas_app.models import User, Province, City, TourismType, TouristSpot
+from rest_framework.exceptions import ValidationError
+from api.profiling import timed
+from uas_app import images, refdata
+from uas_app.models import User, Province, City, TourismType, TouristSpot, DeleteJob
 
-class ProvinceSerializer(serializers.ModelSerializer):
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    # Kalau context berisi {'prefetched': {field_name: {pk: obj}}}, FK dicari di dict itu
+    # alih-alih satu query per field per item (dipakai endpoint bulk). FK ke data referensi
+    # dicari di snapshot uas_app.refdata; id yang tidak ada di sana tetap dicek ke database.
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.field_name)
+        if prefetched is None:
+            return self.snapshot_value(data)
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            return prefetched[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def snapshot_value(self, data):
+        # hanya queryset bawaan ModelSerializer (manager default), yang isinya sama dengan snapshot
+        model = self.queryset.model if self.queryset is not None else None
+        if model is None or not refdata.is_reference(model) or self.queryset is not model._default_manager:
+            return super().to_internal_value(data)
+        try:
+            instance = None if isinstance(data, bool) else refdata.current().table(model).get(int(data))
+        except (TypeError, ValueError):
+            instance = None
+        # tidak ada di snapshot (mis. baru dibuat proses lain) atau formatnya salah: cek seperti biasa
+        return instance if instance is not None else super().to_internal_value(data)
+
+
+def nested_paths(paths, name):
+    prefix = name + '.'
+    return {path[len(prefix):] for path in paths if path.startswith(prefix)}
+
+
+class ExpandableSerializerMixin:
+    # field FK -> serializer nested yang dipakai kalau field itu ada di ?expand=
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get('expand') or ()
+        fields = self.context.get('fields') or ()
+        for name, serializer_class in self.expandable_fields.items():
+            if name in expand:
+                self.fields[name] = serializer_class(read_only=True, context={
+                    **self.context,
+                    'expand': nested_paths(expand, name),
+                    'fields': nested_paths(fields, name),
+                })
+
+
+class SparseFieldsetMixin:
+    # hanya field di ?fields= yang diserialisasi; 'city.name' berarti field name milik city yang di-expand
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields:
+            keep = {path.split('.')[0] for path in fields}
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+
+def expandable_paths(serializer_class, prefix=''):
+    paths = set()
+    for name, nested_class in getattr(serializer_class, 'expandable_fields', {}).items():
+        paths.add(prefix + name)
+        paths |= expandable_paths(nested_class, prefix + name + '.')
+    return paths
+
+
+def field_paths(serializer_class, expand, prefix=''):
+    paths = {prefix + name for name in serializer_class.Meta.fields}
+    for name, nested_class in getattr(serializer_class, 'expandable_fields', {}).items():
+        if prefix + name in expand:
+            paths |= field_paths(nested_class, expand, prefix + name + '.')
+    return paths
+
+
+def parse_expand(request, serializer_class):
+    value = request.query_params.get('expand', '')
+    expand = {path.strip() for path in value.split(',') if path.strip()}
+    allowed = expandable_paths(serializer_class)
+    unknown = expand - allowed
+    if unknown:
+        raise ValidationError({
+            'expand': 'Tidak dikenal: %s. Pilihan: %s' % (', '.join(sorted(unknown)), ', '.join(sorted(allowed)) or '-')
+        })
+    # 'city.province' otomatis ikut meng-expand 'city'
+    for path in list(expand):
+        parts = path.split('.')
+        expand.update('.'.join(parts[:index]) for index in range(1, len(parts)))
+    return expand
+
+
+def parse_fields(request, serializer_class, expand):
+    value = request.query_params.get('fields', '')
+    fields = {path.strip() for path in value.split(',') if path.strip()}
+    allowed = field_paths(serializer_class, expand)
+    unknown = fields - allowed
+    if unknown:
+        raise ValidationError({
+            'fields': 'Tidak dikenal: %s. Pilihan: %s' % (', '.join(sorted(unknown)), ', '.join(sorted(allowed)))
+        })
+    return fields
+
+
+def is_joined(nested_class):
+    # FK ke data referensi dibaca dari snapshot uas_app.refdata (ReferenceForeignKey), tanpa JOIN
+    return not refdata.is_reference(nested_class.Meta.model)
+
+
+def expand_select_related(serializer_class, expand, prefix=''):
+    # semua field expandable adalah FK maju, jadi cukup satu JOIN per path
+    paths = []
+    for name, nested_class in getattr(serializer_class, 'expandable_fields', {}).items():
+        path = prefix + name
+        if path in expand and is_joined(nested_class):
+            paths.append(path.replace('.', '__'))
+            paths += expand_select_related(nested_class, expand, path + '.')
+    return sorted(paths)
+
+
+def only_fields(serializer_class, fields, expand, prefix=''):
+    # kolom untuk QuerySet.only(); level tanpa ?fields= tidak dibatasi
+    model = serializer_class.Meta.model
+    expandable = getattr(serializer_class, 'expandable_fields', {})
+    result = []
+    level = {path.split('.')[0] for path in fields}
+    if level:
+        # FK yang di-expand harus ikut dimuat supaya bisa di-JOIN lewat select_related atau dicari di snapshot
+        names = level | {'id'} | {name for name in expandable if prefix + name in expand}
+        column_prefix = prefix.replace('.', '__')
+        for name in sorted(names):
+            declared = serializer_class._declared_fields.get(name)
+            field = model._meta.get_field(getattr(declared, 'source', None) or name)
+            if field.concrete:
+                result.append(column_prefix + field.name)
+    for name, nested_class in expandable.items():
+        if prefix + name in expand and is_joined(nested_class):
+            result += only_fields(nested_class, nested_paths(fields, name), expand, prefix + name + '.')
+    return result
+
+
+class ReadPlan:
+    """
+    Opsi baca dari query string (?expand=, ?fields=) untuk satu serializer.
+
+    ``apply()`` mempersempit queryset (select_related + only) dan ``data()``
+    menserialisasi dengan field yang sama dengan kolom yang dimuat. Dengan
+    ``allow_fast`` dan ``API_FAST_SERIALIZATION`` aktif, baris dibaca lewat
+    ``values()`` dan dikonversi oleh api.fastpath.FastRowSerializer. Data
+    referensi yang di-expand diambil dari snapshot uas_app.refdata, bukan JOIN.
+    """
+
+    def __init__(self, request, serializer_class, allow_fast=False):
+        self.serializer_class = serializer_class
+        self.expand = parse_expand(request, serializer_class)
+        self.fields = parse_fields(request, serializer_class, self.expand)
+        self.context = {'expand': self.expand, 'fields': self.fields}
+        self.fast = None
+        if allow_fast and not self.expand and getattr(settings, 'API_FAST_SERIALIZATION', False):
+            from api.fastpath import FastRowSerializer
+            self.fast = FastRowSerializer(serializer_class, self.fields)
+
+    def apply(self, queryset, extra=()):
+        # extra: kolom yang selalu dimuat walau tidak ada di ?fields=, mis. last_modified untuk ETag
+        if self.fast is not None:
+            queryset = self.fast.values(queryset)
+            missing = [name for name in extra if name not in queryset._fields]
+            return queryset.values(*queryset._fields, *missing) if missing else queryset
+        # select_related() tanpa argumen berarti JOIN semua FK, jadi hanya dipanggil kalau ada path
+        joined = expand_select_related(self.serializer_class, self.expand)
+        if joined:
+            queryset = queryset.select_related(*joined)
+        only = only_fields(self.serializer_class, self.fields, self.expand)
+        return queryset.only(*only, *extra) if only else queryset
+
+    def from_snapshot(self, table, rows):
+        """Item untuk ``data()`` dari baris ``Table.values()``: apa adanya di jalur cepat, selain itu instance."""
+        if self.fast is not None:
+            return rows
+        return [table.get(row['id']) for row in rows]
+
+    def serializer(self, *args, **kwargs):
+        return self.serializer_class(*args, context=self.context, **kwargs)
+
+    def data(self, instance, many=False):
+        with timed('serialize'):
+            if self.fast is not None:
+                return self.fast.many(instance) if many else self.fast.to_representation(instance)
+            return self.serializer(instance, many=many).data
+
+
+class ProvinceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Province
         fields = ['id', 'name', 'abbreviation', 'capital_city', 'population', 'area_km2']
 
 
-class CitySerializer(serializers.ModelSerializer):
+class CitySerializer(SparseFieldsetMixin, ExpandableSerializerMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+    expandable_fields = {'province': ProvinceSerializer}
+
     class Meta:
         model = City
         fields = ['id', 'name', 'province', 'is_capital', 'area_code', 'latitude', 'longitude', 'population']
 
 
-class TourismTypeSerializer(serializers.ModelSerializer):
+class TourismTypeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = TourismType
         fields = ['id', 'name', 'description', 'is_active']
 
 
-class TouristSpotSerializer(serializers.ModelSerializer):
+class ImageSrcsetField(serializers.Field):
+    """``image_derivatives`` sebagai map format -> srcset, mis. {'webp': '/media/...webp 320w, ...'}."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        storage = TouristSpot._meta.get_field('image').storage
+        request = self.context.get('request')
+        srcset = {}
+        for format_name in images.FORMATS:
+            entries = []
+            for width, name in sorted((value.get(format_name) or {}).items(), key=lambda item: int(item[0])):
+                url = storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                entries.append('%s %sw' % (url, width))
+            if entries:
+                srcset[format_name] = ', '.join(entries)
+        return srcset
+
+
+class TouristSpotSerializer(SparseFieldsetMixin, ExpandableSerializerMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+    expandable_fields = {'city': CitySerializer, 'tourism_type': TourismTypeSerializer}
+    # diisi di latar belakang oleh uas_app.images; {} sampai turunannya selesai dibuat
+    image_srcset = ImageSrcsetField(source='image_derivatives')
+
     class Meta:
         model = TouristSpot
         fields = [
             'id', 'name', 'description', 'address', 'city', 'tourism_type',
-            'distance_from_city', 'image', 'status', 'created_on', 'last_modified'
+            'distance_from_city', 'image', 'image_srcset', 'status', 'created_on', 'last_modified'
         ]
-    
\ No newline at end of file
+
+
+class CityBulkSerializer(CitySerializer):
+    # keunikan (name, province) dicek sekali per batch oleh api.bulk.BulkWriter
+    class Meta(CitySerializer.Meta):
+        validators = []
+
+
+class DeleteJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeleteJob
+        fields = ['id', 'model', 'object_id', 'status', 'deleted', 'error', 'created_on', 'finished_on']
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+
+def iter_rows(queryset, serializer):
+    # satu instance serializer dipakai ulang untuk setiap baris,
+    # dan queryset dibaca per chunk sehingga memori worker tetap konstan
+    chunk_size = getattr(settings, 'API_EXPORT_CHUNK_SIZE', 2000)
+    renderer = JSONRenderer()
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        yield renderer.render(serializer.to_representation(instance))
+
+
+def iter_ndjson(queryset, serializer):
+    for row in iter_rows(queryset, serializer):
+        yield row + b'\n'
+
+
+def iter_json_array(queryset, serializer):
+    yield b'['
+    separator = b''
+    for row in iter_rows(queryset, serializer):
+        yield separator + row
+        separator = b','
+    yield b']'
+
+
+STREAM_FORMATS = {
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+    'json': (iter_json_array, 'application/json'),
+}
+
+
+def streaming_response(queryset, serializer, stream_format, filename):
+    generator, content_type = STREAM_FORMATS[stream_format]
+    response = StreamingHttpResponse(generator(queryset, serializer), content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename="%s.%s"' % (filename, stream_format)
+    return response
@@ -1,16 +1,32 @@
+from django.conf import settings
 from django.urls import path, include
-from api import views
+from api import async_views, metrics, views
 from rest_framework.urlpatterns import format_suffix_patterns
 
 app_name = 'api'
 
+# dengan API_ASYNC_VIEWS=1 (hanya untuk ASGI) GET list dan detail dilayani versi async-nya
+read_views = async_views if getattr(settings, 'API_ASYNC_VIEWS', False) else views
+
 urlpatterns = [
-    path('api/tourist-spots', views.TouristSpotList.as_view(), name='tourist-spot-list'),
-    path('api/tourist-spots/<int:id>', views.TouristSpotDetail.as_view(), name='tourist-spot-detail'),
-    path('api/provinces', views.ProvinceList.as_view(), name='province-list'),
-    path('api/provinces/<int:id>', views.ProvinceDetail.as_view(), name='province-detail'),
-    path('api/cities', views.CityList.as_view(), name='city-list'),
-    path('api/cities/<int:id>', views.CityDetail.as_view(), name='city-detail'),
-    path('api/tourism-types', views.TourismTypeList.as_view(), name='tourism-type-list'),
-    path('api/tourism-types/<int:id>', views.TourismTypeDetail.as_view(), name='tourism-type-detail'),
+    path('api/tourist-spots', read_views.TouristSpotList.as_view(), name='tourist-spot-list'),
+    path('api/tourist-spots/batch-get', views.TouristSpotBatchGet.as_view(), name='tourist-spot-batch-get'),
+    path('api/tourist-spots/bulk', views.TouristSpotBulk.as_view(), name='tourist-spot-bulk'),
+    path('api/tourist-spots/search', views.TouristSpotSearch.as_view(), name='tourist-spot-search'),
+    path('api/tourist-spots/nearby', views.TouristSpotNearby.as_view(), name='tourist-spot-nearby'),
+    path('api/tourist-spots/export', views.TouristSpotExport.as_view(), name='tourist-spot-export'),
+    path('api/tourist-spots/<int:id>', read_views.TouristSpotDetail.as_view(), name='tourist-spot-detail'),
+    path('api/provinces', read_views.ProvinceList.as_view(), name='province-list'),
+    path('api/provinces/batch-get', views.ProvinceBatchGet.as_view(), name='province-batch-get'),
+    path('api/provinces/<int:id>', read_views.ProvinceDetail.as_view(), name='province-detail'),
+    path('api/cities', read_views.CityList.as_view(), name='city-list'),
+    path('api/cities/batch-get', views.CityBatchGet.as_view(), name='city-batch-get'),
+    path('api/cities/bulk', views.CityBulk.as_view(), name='city-bulk'),
+    path('api/cities/<int:id>', read_views.CityDetail.as_view(), name='city-detail'),
+    path('api/tourism-types', read_views.TourismTypeList.as_view(), name='tourism-type-list'),
+    path('api/tourism-types/<int:id>', read_views.TourismTypeDetail.as_view(), name='tourism-type-detail'),
+    path('api/delete-jobs/<int:id>', views.DeleteJobDetail.as_view(), name='delete-job-detail'),
+    path('api/sync', views.Sync.as_view(), name='sync'),
+    path('api/cache-stats', views.CacheStats.as_view(), name='cache-stats'),
+    path('metrics', metrics.metrics_view, name='metrics'),
 ]
\ No newline at end of file
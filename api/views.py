@@ -1,17 +1,43 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from uas_app.models import User, TouristSpot, Province, City, TourismType
-from api.serializers import (TouristSpotSerializer, ProvinceSerializer, CitySerializer, TourismTypeSerializer)
+from uas_app.models import User, TouristSpot, Province, City, TourismType, ChangeLog, DeleteJob
+from uas_app import cascade, refdata
+from uas_app.changelog import DELETE, UPSERT
+from api.serializers import (TouristSpotSerializer, ProvinceSerializer, CitySerializer, TourismTypeSerializer,
+                             CityBulkSerializer, DeleteJobSerializer, ReadPlan)
+from api.bulk import BulkWriter
+from api.conditional import (CONFLICT, INVALID, NOT_FOUND, ConditionalUpdate, etag, format_etag, matches,
+                             parse_if_match, version)
+from api.filters import CityFilter, TouristSpotFilter, filter_rows
+from api.cache import CachedResponseMixin, stats as cache_stats
+from api.profiling import timed
+from api.writes import serialized_write
+from api.pagination import KeysetPagination, SearchPagination, SyncPagination, TouristSpotPagination
+from api.streaming import STREAM_FORMATS, streaming_response
+from django.conf import settings
+from django.db.models import Case, FloatField, Value, When
 from django.http import JsonResponse
+from django_filters.rest_framework import DjangoFilterBackend
+from uas_app.search import search_spot_ids
+from uas_app.spatial import cities_within
 
-class TouristSpotList(APIView):
+class TouristSpotList(CachedResponseMixin, APIView):
+    # City ikut karena ?city__province= bergantung pada provinsi setiap kota
+    cache_models = (TouristSpot, City)
+    expand_cache_models = (City, Province, TourismType)
+    filterset_class = TouristSpotFilter
 
     def get(self, request, *args, **kwargs):
-        spots = TouristSpot.objects.all()
-        serializer = TouristSpotSerializer(spots, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
+        if 'ids' in request.query_params:
+            return multi_get_response(request, request.query_params['ids'], TouristSpot, TouristSpotSerializer, 'Wisata')
+        plan = ReadPlan(request, TouristSpotSerializer, allow_fast=True)
+        paginator = TouristSpotPagination()
+        queryset = DjangoFilterBackend().filter_queryset(request, TouristSpot.objects.all(), self)
+        spots = paginator.paginate_queryset(plan.apply(queryset), request, view=self)
+        return paginator.get_paginated_response(plan.data(spots, many=True))
+
+    @serialized_write
     def post(self, request, *args, **kwargs):
         data = {
             'name': request.data.get('name'),
@@ -34,16 +60,283 @@ class TouristSpotList(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TouristSpotDetail(APIView):
+def bulk_response(request, writer, label):
+    items = request.data
+    if not isinstance(items, list):
+        return Response({
+            'status': status.HTTP_400_BAD_REQUEST,
+            'message': 'Body harus berupa array',
+            'data': {}
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    max_items = getattr(settings, 'API_BULK_MAX_ITEMS', 10000)
+    if len(items) > max_items:
+        return Response({
+            'status': status.HTTP_400_BAD_REQUEST,
+            'message': 'Maksimal %d item per request' % max_items,
+            'data': {}
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    results = writer.run(items)
+    summary = {'created': 0, 'updated': 0, 'error': 0}
+    for result in results:
+        summary[result['status']] += 1
+    response_status = status.HTTP_201_CREATED if summary['created'] or summary['updated'] else status.HTTP_400_BAD_REQUEST
+    return Response({
+        'status': response_status,
+        'message': '%s: %d ditambahkan, %d diupdate, %d gagal' % (
+            label, summary['created'], summary['updated'], summary['error']),
+        'data': {'summary': summary, 'results': results}
+    }, status=response_status)
+
+
+def is_upsert(request):
+    return request.query_params.get('upsert', '').lower() in ('1', 'true', 'yes')
+
+
+def parse_ids(value):
+    # "1,5,9" dari query string atau [1, 5, 9] dari body; None kalau formatnya salah
+    if isinstance(value, str):
+        value = [part for part in value.split(',') if part.strip()]
+    if not isinstance(value, list) or not value:
+        return None
+    try:
+        if any(isinstance(item, bool) for item in value):
+            raise TypeError
+        return [int(item) for item in value]
+    except (TypeError, ValueError):
+        return None
+
+
+def multi_get_ids(ids):
+    """``(ids, None)`` atau ``(None, response 400)``."""
+    ids = parse_ids(ids)
+    if ids is None:
+        return None, Response({
+            'status': status.HTTP_400_BAD_REQUEST,
+            'message': 'ids harus berupa daftar id angka, mis. ids=1,5,9',
+            'data': {}
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    max_ids = getattr(settings, 'API_MULTI_GET_MAX_IDS', 200)
+    if len(ids) > max_ids:
+        return None, Response({
+            'status': status.HTTP_400_BAD_REQUEST,
+            'message': 'Maksimal %d id per request' % max_ids,
+            'data': {}
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return ids, None
+
+
+def multi_get_queryset(plan, model, ids):
+    # satu query id__in (ditambah JOIN kalau ada ?expand=), berapa pun jumlah id-nya
+    queryset = plan.apply(model.objects.filter(id__in=set(ids)))
+    if queryset._fields and 'id' not in queryset._fields:
+        queryset = queryset.values(*queryset._fields, 'id')
+    return queryset
+
+
+def multi_get_response(request, ids, model, serializer_class, label):
+    ids, error = multi_get_ids(ids)
+    if error is not None:
+        return error
+    plan = ReadPlan(request, serializer_class, allow_fast=True)
+    if refdata.is_reference(model):
+        table = refdata.current().table(model)
+        rows = [row for row in map(table.row, dict.fromkeys(ids)) if row is not None]
+        return multi_get_results(plan, plan.from_snapshot(table, rows), ids, label)
+    return multi_get_results(plan, list(multi_get_queryset(plan, model, ids)), ids, label)
+
+
+def snapshot_list(request, view, model, serializer_class):
+    # list data referensi: filter, urutan dan halaman dihitung dari snapshot uas_app.refdata, tanpa query
+    plan = ReadPlan(request, serializer_class, allow_fast=True)
+    table = refdata.current().table(model)
+    rows = table.values()
+    if getattr(view, 'filterset_class', None) is not None:
+        rows = filter_rows(view.filterset_class, request, rows)
+    paginator = KeysetPagination()
+    page = paginator.paginate_rows(rows, request, model)
+    return paginator.get_paginated_response(plan.data(plan.from_snapshot(table, page), many=True))
+
+
+def snapshot_object(plan, model, id):
+    table = refdata.current().table(model)
+    row = table.row(id)
+    return plan.from_snapshot(table, [row])[0] if row is not None else None
+
+
+def multi_get_results(plan, rows, ids, label):
+    found = {
+        row['id'] if isinstance(row, dict) else row.pk: item
+        for row, item in zip(rows, plan.data(rows, many=True))
+    }
+
+    # urutan mengikuti ids di request; id yang tidak ada dilaporkan di tempatnya
+    results = []
+    for pk in ids:
+        if pk in found:
+            results.append({'id': pk, 'status': 'found', 'data': found[pk]})
+        else:
+            results.append({'id': pk, 'status': 'not_found', 'data': None})
+    return Response({
+        'status': status.HTTP_200_OK,
+        'message': '%s: %d dari %d id ditemukan' % (label, len(set(ids) & set(found)), len(set(ids))),
+        'data': {'results': results}
+    })
+
+
+def precondition_failed(current_version):
+    return Response({
+        'status': status.HTTP_412_PRECONDITION_FAILED,
+        'message': 'Data sudah diubah sejak terakhir dibaca, ambil ulang lalu kirim dengan If-Match terbaru',
+        'data': {}
+    }, status=status.HTTP_412_PRECONDITION_FAILED, headers={'ETag': format_etag(current_version)})
+
+
+def patch_response(request, id, serializer_class, label, message):
+    # hanya kolom yang dikirim yang ditulis, dalam satu UPDATE bersyarat (api.conditional)
+    result, value = ConditionalUpdate(serializer_class).run(id, request.data, parse_if_match(request))
+    if result == NOT_FOUND:
+        return Response({
+            'status': status.HTTP_400_BAD_REQUEST,
+            'message': '%s tidak ditemukan' % label,
+            'data': {}
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if result == INVALID:
+        return Response(value, status=status.HTTP_400_BAD_REQUEST)
+    if result == CONFLICT:
+        return precondition_failed(value)
+    # response berisi objek lengkap, sama dengan PUT dan GET
+    return Response({
+        'status': status.HTTP_200_OK,
+        'message': message,
+        'data': serializer_class(value).data
+    }, headers={'ETag': etag(value)})
+
+
+def batch_get_ids(request):
+    return request.data.get('ids') if hasattr(request.data, 'get') else None
+
+
+class TouristSpotBatchGet(APIView):
+
+    def post(self, request, *args, **kwargs):
+        return multi_get_response(request, batch_get_ids(request), TouristSpot, TouristSpotSerializer, 'Wisata')
+
+
+class TouristSpotBulk(APIView):
+
+    @serialized_write
+    def post(self, request, *args, **kwargs):
+        writer = BulkWriter(
+            TouristSpotSerializer,
+            related={'city': City, 'tourism_type': TourismType},
+            natural_key=('name', 'city'),
+            upsert=is_upsert(request),
+        )
+        return bulk_response(request, writer, 'Wisata')
+
+
+class TouristSpotExport(APIView):
+
+    def get(self, request, *args, **kwargs):
+        stream_format = request.query_params.get('stream', 'ndjson')
+        if stream_format not in STREAM_FORMATS:
+            return Response({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'message': 'Format stream tidak didukung. Pilihan: %s' % ', '.join(STREAM_FORMATS),
+                'data': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        plan = ReadPlan(request, TouristSpotSerializer)
+        spots = plan.apply(TouristSpot.objects.order_by('id'))
+        return streaming_response(spots, plan.serializer(), stream_format, 'tourist-spots')
+
+
+class TouristSpotSearch(CachedResponseMixin, APIView):
+    cache_models = (TouristSpot, City, Province)
+    expand_cache_models = (City, Province, TourismType)
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'message': 'Parameter q wajib diisi',
+                'data': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        plan = ReadPlan(request, TouristSpotSerializer, allow_fast=True)
+        paginator = SearchPagination()
+        spots = paginator.paginate_hits(
+            lambda limit, after: search_spot_ids(query, limit, after), plan.apply(TouristSpot.objects.all()), request,
+        )
+        return paginator.get_paginated_response(plan.data(spots, many=True))
+
 
-    def get_object(self, id):
+class TouristSpotNearby(CachedResponseMixin, APIView):
+    cache_models = (TouristSpot, City)
+    expand_cache_models = (City, Province, TourismType)
+
+    def get(self, request, *args, **kwargs):
+        max_radius = getattr(settings, 'API_NEARBY_MAX_RADIUS_KM', 200)
         try:
-            return TouristSpot.objects.get(id=id)
+            latitude = float(request.query_params['lat'])
+            longitude = float(request.query_params['lon'])
+            radius = float(request.query_params.get('radius', 10))
+            limit = int(request.query_params.get('limit', 20))
+        except (KeyError, ValueError):
+            return Response({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'message': 'Parameter lat dan lon wajib diisi, radius dan limit harus berupa angka',
+                'data': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or not 0 < radius <= max_radius or limit < 1:
+            return Response({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'message': 'Koordinat tidak valid atau radius di luar 0-%s km' % max_radius,
+                'data': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, settings.API_MAX_PAGE_SIZE)
+
+        plan = ReadPlan(request, TouristSpotSerializer)
+        distances = cities_within(latitude, longitude, radius)
+        if not distances:
+            return Response({'results': []}, status=status.HTTP_200_OK)
+
+        # urutkan di SQL memakai jarak kota yang sudah dihitung, supaya LIMIT tetap di DB
+        city_distance = Case(
+            *[When(city_id=pk, then=Value(distance)) for pk, distance in distances.items()],
+            output_field=FloatField(),
+        )
+        spots = plan.apply(TouristSpot.objects.filter(city_id__in=list(distances))).annotate(
+            city_distance=city_distance,
+        ).order_by('city_distance', 'distance_from_city', 'id')[:limit]
+
+        serializer = plan.serializer()
+        results = []
+        for spot in spots:
+            row = serializer.to_representation(spot)
+            row['distance_km'] = round(spot.city_distance, 3)
+            results.append(row)
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+class TouristSpotDetail(CachedResponseMixin, APIView):
+    cache_models = (TouristSpot,)
+    expand_cache_models = (City, Province, TourismType)
+
+    def get_object(self, id, queryset=None):
+        try:
+            return (queryset if queryset is not None else TouristSpot.objects).get(id=id)
         except TouristSpot.DoesNotExist:
             return None
 
     def get(self, request, id, *args, **kwargs):
-        instance = self.get_object(id)
+        plan = ReadPlan(request, TouristSpotSerializer, allow_fast=True)
+        instance = self.get_object(id, plan.apply(TouristSpot.objects.all(), extra=('last_modified',)))
         if not instance:
             return Response({
                 'status': status.HTTP_400_BAD_REQUEST,
@@ -51,13 +344,13 @@ class TouristSpotDetail(APIView):
                 'data': {}
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = TouristSpotSerializer(instance)
         return Response({
             'status': status.HTTP_200_OK,
             'message': 'Wisata ditemukan',
-            'data': serializer.data
-        })
+            'data': plan.data(instance)
+        }, headers={'ETag': etag(instance)})
 
+    @serialized_write
     def put(self, request, id, *args, **kwargs):
         instance = self.get_object(id)
         if not instance:
@@ -66,6 +359,8 @@ class TouristSpotDetail(APIView):
                 'message': 'Wisata tidak ditemukan',
                 'data': {}
             }, status=status.HTTP_400_BAD_REQUEST)
+        if not matches(parse_if_match(request), instance):
+            return precondition_failed(version(instance))
         
         data = {
             'name': request.data.get('name'),
@@ -79,15 +374,20 @@ class TouristSpotDetail(APIView):
         }
         serializer = TouristSpotSerializer(instance, data=data, partial=True)
         if serializer.is_valid():
-            serializer.save(user_update=request.user if request.user.is_authenticated else None)
+            serializer.save()
             return Response({
                 'status': status.HTTP_200_OK,
                 'message': 'Wisata berhasil diupdate',
                 'data': serializer.data
-            })
+            }, headers={'ETag': etag(instance)})
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @serialized_write
+    def patch(self, request, id, *args, **kwargs):
+        return patch_response(request, id, TouristSpotSerializer, 'Wisata', 'Wisata berhasil diupdate')
+
+    @serialized_write
     def delete(self, request, id, *args, **kwargs):
         instance = self.get_object(id)
         if not instance:
@@ -103,13 +403,15 @@ class TouristSpotDetail(APIView):
             'message': 'Data wisata berhasil dihapus'
         })
 
-class ProvinceList(APIView):
+class ProvinceList(CachedResponseMixin, APIView):
+    cache_models = (Province,)
 
     def get(self, request):
-        provinces = Province.objects.all()
-        serializer = ProvinceSerializer(provinces, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if 'ids' in request.query_params:
+            return multi_get_response(request, request.query_params['ids'], Province, ProvinceSerializer, 'Provinsi')
+        return snapshot_list(request, self, Province, ProvinceSerializer)
     
+    @serialized_write
     def post(self, request):
         data = {
             'name': request.data.get('name'),
@@ -129,15 +431,24 @@ class ProvinceList(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ProvinceDetail(APIView):
-    def get_object(self, id):
+class ProvinceBatchGet(APIView):
+
+    def post(self, request):
+        return multi_get_response(request, batch_get_ids(request), Province, ProvinceSerializer, 'Provinsi')
+
+
+class ProvinceDetail(CachedResponseMixin, APIView):
+    cache_models = (Province,)
+
+    def get_object(self, id, queryset=None):
         try:
-            return Province.objects.get(id=id)
+            return (queryset if queryset is not None else Province.objects).get(id=id)
         except Province.DoesNotExist:
             return None
 
     def get(self, request, id, *args, **kwargs):
-        instance = self.get_object(id)
+        plan = ReadPlan(request, ProvinceSerializer, allow_fast=True)
+        instance = snapshot_object(plan, Province, id)
         if not instance:
             return Response({
                 'status': status.HTTP_400_BAD_REQUEST,
@@ -145,13 +456,13 @@ class ProvinceDetail(APIView):
                 'data': {}
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = ProvinceSerializer(instance)
         return Response({
             'status': status.HTTP_200_OK,
             'message': 'Provinsi ditemukan',
-            'data': serializer.data
-        })
+            'data': plan.data(instance)
+        }, headers={'ETag': etag(instance)})
 
+    @serialized_write
     def put(self, request, id):
         instance = self.get_object(id)
         if not instance:
@@ -160,6 +471,8 @@ class ProvinceDetail(APIView):
                 'message': 'Provinsi tidak ditemukan',
                 'data': {}
             }, status=status.HTTP_400_BAD_REQUEST)
+        if not matches(parse_if_match(request), instance):
+            return precondition_failed(version(instance))
         
         data = {
             'name': request.data.get('name'),
@@ -175,9 +488,14 @@ class ProvinceDetail(APIView):
                 'status': status.HTTP_200_OK,
                 'message': 'Data provinsi berhasil diupdate',
                 'data': serializer.data
-            })
+            }, headers={'ETag': etag(instance)})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @serialized_write
+    def patch(self, request, id, *args, **kwargs):
+        return patch_response(request, id, ProvinceSerializer, 'Provinsi', 'Data provinsi berhasil diupdate')
+
+    @serialized_write
     def delete(self, request, id, *args, **kwargs):
         instance = self.get_object(id)
         if not instance:
@@ -186,7 +504,15 @@ class ProvinceDetail(APIView):
                 'message': 'Provinsi tidak ditemukan',
                 'data': {}
             }, status=status.HTTP_400_BAD_REQUEST)
-        
+
+        if cascade.is_large(instance):
+            job = cascade.start(instance)
+            return Response({
+                'status': status.HTTP_202_ACCEPTED,
+                'message': 'Data provinsi sedang dihapus di latar belakang',
+                'data': {'job_id': job.pk}
+            }, status=status.HTTP_202_ACCEPTED)
+
         instance.delete()
         return Response({
             'status': status.HTTP_200_OK,
@@ -194,13 +520,17 @@ class ProvinceDetail(APIView):
             })
 
 
-class CityList(APIView):
+class CityList(CachedResponseMixin, APIView):
+    cache_models = (City,)
+    expand_cache_models = (Province,)
+    filterset_class = CityFilter
 
     def get(self, request):
-        cities = City.objects.all()
-        serializer = CitySerializer(cities, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if 'ids' in request.query_params:
+            return multi_get_response(request, request.query_params['ids'], City, CitySerializer, 'Kota')
+        return snapshot_list(request, self, City, CitySerializer)
 
+    @serialized_write
     def post(self, request):
         data = {
             'name': request.data.get('name'),
@@ -222,15 +552,38 @@ class CityList(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CityDetail(APIView):
-    def get_object(self, id):
+class CityBatchGet(APIView):
+
+    def post(self, request):
+        return multi_get_response(request, batch_get_ids(request), City, CitySerializer, 'Kota')
+
+
+class CityBulk(APIView):
+
+    @serialized_write
+    def post(self, request):
+        writer = BulkWriter(
+            CityBulkSerializer,
+            related={'province': Province},
+            natural_key=('name', 'province'),
+            upsert=is_upsert(request),
+        )
+        return bulk_response(request, writer, 'Kota')
+
+
+class CityDetail(CachedResponseMixin, APIView):
+    cache_models = (City,)
+    expand_cache_models = (Province,)
+
+    def get_object(self, id, queryset=None):
         try:
-            return City.objects.get(id=id)
+            return (queryset if queryset is not None else City.objects).get(id=id)
         except City.DoesNotExist:
             return None
 
     def get(self, request, id, *args, **kwargs):
-        instance = self.get_object(id)
+        plan = ReadPlan(request, CitySerializer, allow_fast=True)
+        instance = snapshot_object(plan, City, id)
         if not instance:
             return Response({
                 'status': status.HTTP_400_BAD_REQUEST,
@@ -238,13 +591,13 @@ class CityDetail(APIView):
                 'data': {}
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = CitySerializer(instance)
         return Response({
             'status': status.HTTP_200_OK,
             'message': 'Kota ditemukan',
-            'data': serializer.data
-        })
+            'data': plan.data(instance)
+        }, headers={'ETag': etag(instance)})
 
+    @serialized_write
     def put(self, request, id):
         instance = self.get_object(id)
         if not instance:
@@ -253,6 +606,8 @@ class CityDetail(APIView):
                 'message': 'Kota tidak ditemukan',
                 'data': {}
             }, status=status.HTTP_400_BAD_REQUEST)
+        if not matches(parse_if_match(request), instance):
+            return precondition_failed(version(instance))
 
         data = {
             'name': request.data.get('name'),
@@ -270,9 +625,14 @@ class CityDetail(APIView):
                 'status': status.HTTP_200_OK,
                 'message': 'Data kota berhasil diperbarui',
                 'data': serializer.data
-            })
+            }, headers={'ETag': etag(instance)})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @serialized_write
+    def patch(self, request, id, *args, **kwargs):
+        return patch_response(request, id, CitySerializer, 'Kota', 'Data kota berhasil diperbarui')
+
+    @serialized_write
     def delete(self, request, id, *args, **kwargs):
         instance = self.get_object(id)
         if not instance:
@@ -282,6 +642,14 @@ class CityDetail(APIView):
                 'data': {}
             }, status=status.HTTP_400_BAD_REQUEST)
 
+        if cascade.is_large(instance):
+            job = cascade.start(instance)
+            return Response({
+                'status': status.HTTP_202_ACCEPTED,
+                'message': 'Data kota sedang dihapus di latar belakang',
+                'data': {'job_id': job.pk}
+            }, status=status.HTTP_202_ACCEPTED)
+
         instance.delete()
         return Response({
             'status': status.HTTP_200_OK,
@@ -289,13 +657,13 @@ class CityDetail(APIView):
         })
 
 
-class TourismTypeList(APIView):
+class TourismTypeList(CachedResponseMixin, APIView):
+    cache_models = (TourismType,)
 
     def get(self, request):
-        types = TourismType.objects.all()
-        serializer = TourismTypeSerializer(types, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return snapshot_list(request, self, TourismType, TourismTypeSerializer)
 
+    @serialized_write
     def post(self, request):
         data = {
             'name': request.data.get('name'),
@@ -313,15 +681,18 @@ class TourismTypeList(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TourismTypeDetail(APIView):
-    def get_object(self, id):
+class TourismTypeDetail(CachedResponseMixin, APIView):
+    cache_models = (TourismType,)
+
+    def get_object(self, id, queryset=None):
         try:
-            return TourismType.objects.get(id=id)
+            return (queryset if queryset is not None else TourismType.objects).get(id=id)
         except TourismType.DoesNotExist:
             return None
 
     def get(self, request, id, *args, **kwargs):
-        instance = self.get_object(id)
+        plan = ReadPlan(request, TourismTypeSerializer, allow_fast=True)
+        instance = snapshot_object(plan, TourismType, id)
         if not instance:
             return Response({
                 'status': status.HTTP_400_BAD_REQUEST,
@@ -329,13 +700,13 @@ class TourismTypeDetail(APIView):
                 'data': {}
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = TourismTypeSerializer(instance)
         return Response({
             'status': status.HTTP_200_OK,
             'message': 'Jenis wisata ditemukan',
-            'data': serializer.data
-        })
+            'data': plan.data(instance)
+        }, headers={'ETag': etag(instance)})
 
+    @serialized_write
     def put(self, request, id):
         instance = self.get_object(id)
         if not instance:
@@ -344,6 +715,8 @@ class TourismTypeDetail(APIView):
                 'message': 'Jenis wisata tidak ditemukan',
                 'data': {}
             }, status=status.HTTP_400_BAD_REQUEST)
+        if not matches(parse_if_match(request), instance):
+            return precondition_failed(version(instance))
 
         data = {
             'name': request.data.get('name'),
@@ -357,9 +730,14 @@ class TourismTypeDetail(APIView):
                 'status': status.HTTP_200_OK,
                 'message': 'Data jenis wisata berhasil diperbarui',
                 'data': serializer.data
-            })
+            }, headers={'ETag': etag(instance)})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @serialized_write
+    def patch(self, request, id, *args, **kwargs):
+        return patch_response(request, id, TourismTypeSerializer, 'Jenis wisata', 'Data jenis wisata berhasil diperbarui')
+
+    @serialized_write
     def delete(self, request, id, *args, **kwargs):
         instance = self.get_object(id)
         if not instance:
@@ -373,4 +751,76 @@ class TourismTypeDetail(APIView):
         return Response({
             'status': status.HTTP_200_OK,
             'message': 'Data jenis wisata berhasil dihapus'
-        })
\ No newline at end of file
+        })
+
+
+class DeleteJobDetail(APIView):
+
+    def get(self, request, id):
+        job = DeleteJob.objects.filter(id=id).first()
+        if job is None:
+            return Response({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'message': 'Job tidak ditemukan',
+                'data': {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'status': status.HTTP_200_OK,
+            'message': 'Job ditemukan',
+            'data': DeleteJobSerializer(job).data
+        })
+
+
+class CacheStats(APIView):
+
+    def get(self, request):
+        return Response({
+            'status': status.HTTP_200_OK,
+            'message': 'Statistik cache response (per proses worker)',
+            'data': cache_stats()
+        })
+
+
+class Sync(APIView):
+    # ChangeLog.model -> serializer yang dipakai untuk data upsert
+    serializers = {
+        'province': ProvinceSerializer,
+        'tourismtype': TourismTypeSerializer,
+        'city': CitySerializer,
+        'touristspot': TouristSpotSerializer,
+    }
+
+    def serialize(self, model_name, pks):
+        serializer_class = self.serializers[model_name]
+        queryset = serializer_class.Meta.model.objects.filter(pk__in=pks)
+        with timed('serialize'):
+            if getattr(settings, 'API_FAST_SERIALIZATION', False):
+                from api.fastpath import FastRowSerializer
+                fast = FastRowSerializer(serializer_class)
+                return {item['id']: item for item in fast.many(fast.values(queryset))}
+            return {item['id']: item for item in serializer_class(queryset, many=True).data}
+
+    def get(self, request):
+        paginator = SyncPagination()
+        entries = paginator.paginate_queryset(
+            ChangeLog.objects.values('id', 'model', 'object_id', 'action'), request, view=self
+        )
+
+        # data upsert dimuat dengan satu query per model untuk satu halaman
+        upserts = {}
+        for entry in entries:
+            if entry['action'] == UPSERT and entry['model'] in self.serializers:
+                upserts.setdefault(entry['model'], []).append(entry['object_id'])
+        data = {model_name: self.serialize(model_name, pks) for model_name, pks in upserts.items()}
+
+        results = []
+        for entry in entries:
+            item = data.get(entry['model'], {}).get(entry['object_id'])
+            results.append({
+                'model': entry['model'],
+                'id': entry['object_id'],
+                # objek yang terhapus setelah halaman ini dibaca dikirim sebagai delete
+                'action': UPSERT if item is not None else DELETE,
+                'data': item,
+            })
+        return paginator.get_paginated_response(results)
@@ -0,0 +1,86 @@
+"""
+Penulisan ke SQLite yang diantrikan, bukan gagal dengan ``database is locked``.
+
+SQLite hanya mengizinkan satu penulis. Di dalam satu proses penulis diantrikan
+lewat lock; antar worker gunicorn, transaksi dimulai dengan ``BEGIN IMMEDIATE``
+(lihat ``DATABASES`` di settings) sehingga menunggu ``busy_timeout`` di awal
+transaksi, bukan gagal di tengah. Kalau tetap terkunci, seluruh handler diulang
+dengan backoff, lalu dijawab 503 dengan ``Retry-After``.
+"""
+import random
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from uas_app import refdata
+
+# RLock: handler tulis yang memanggil handler tulis lain tidak mengunci dirinya sendiri
+_write_lock = threading.RLock()
+
+
+class DatabaseBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Database sedang sibuk, silakan coba lagi.'
+    default_code = 'database_busy'
+    # dibaca exception handler DRF untuk header Retry-After
+    wait = 1
+
+
+def is_locked(exc):
+    # SQLITE_BUSY dan SQLITE_LOCKED
+    message = str(exc)
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def run_write(func, *args, **kwargs):
+    """
+    Jalankan ``func`` dalam satu transaksi, satu penulis per proses.
+
+    Error lock sebelum commit (termasuk saat ``BEGIN IMMEDIATE``) membuat seluruh
+    transaksi di-rollback dan diulang, paling banyak ``API_WRITE_RETRIES`` kali.
+    Error setelah commit (callback ``on_commit``) tidak diulang, supaya data tidak
+    tertulis dua kali.
+    """
+    retries = getattr(settings, 'API_WRITE_RETRIES', 3)
+    backoff = getattr(settings, 'API_WRITE_RETRY_BACKOFF', 0.05)
+    queue_timeout = getattr(settings, 'API_WRITE_QUEUE_TIMEOUT', 10.0)
+
+    for attempt in range(retries + 1):
+        if not _write_lock.acquire(timeout=queue_timeout):
+            raise DatabaseBusy()
+        committed = False
+        try:
+            with transaction.atomic():
+                # lock tulis sudah dipegang: snapshot data referensi dicek lagi supaya validasi FK
+                # melihat perubahan (mis. parent yang disembunyikan) yang ter-commit sejak awal request
+                refdata.expire()
+                result = func(*args, **kwargs)
+                committed = True
+            return result
+        except OperationalError as exc:
+            if committed or not is_locked(exc):
+                raise
+            if attempt == retries:
+                raise DatabaseBusy() from exc
+        finally:
+            _write_lock.release()
+        # jitter supaya worker yang bentrok tidak mencoba lagi bersamaan
+        time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+
+
+def serialized_write(method):
+    """
+    Dekorator method tulis APIView (post/put/patch/delete), lihat ``run_write``.
+
+    Aman diulang karena ``request.data`` DRF sudah di-parse dan disimpan pada
+    percobaan pertama, dan semua tulisan percobaan yang gagal ikut di-rollback.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        return run_write(method, self, request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,528 @@
+"""
+Benchmark semua route di api/urls.py: lewat Django test client (in-process, dengan
+jumlah query SQL) dan lewat proses server sungguhan (gunicorn/uvicorn).
+
+    python -m benchmarks.api --spots 1000000 --requests 200 --output hasil.json
+    python -m benchmarks.api --mode client --baseline hasil.json --tolerance 0.15
+    python -m benchmarks.api --mode all --workers 2 --concurrency 64 --slow-clients 2 --only list
+
+Mode uvicorn menjalankan projectuas.asgi dengan API_ASYNC_VIEWS=1 (list/detail lewat
+api.async_views; API_ASYNC_VIEWS=0 untuk view sinkron), mode gunicorn menjalankan
+projectuas.wsgi dengan worker sinkron; dengan --workers yang sama memori keduanya
+(RSS seluruh proses server, dilaporkan per mode) sebanding.
+--slow-clients membuka koneksi yang mengirim header sangat pelan selama load berjalan,
+seperti klien lambat tanpa proxy buffering: di worker sinkron setiap koneksi itu
+menahan satu worker.
+
+Database benchmark dibuat sekali di BENCHMARK_DATABASE (default di direktori temp)
+dan dipakai ulang selama parameter seed-nya sama; db.sqlite3 tidak disentuh.
+Dengan --baseline, run gagal (exit 1) kalau ada endpoint yang throughput-nya turun,
+p95-nya naik lebih dari --tolerance, atau jumlah query-nya bertambah.
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+
+SERVER_COMMANDS = {
+    'gunicorn': [sys.executable, '-m', 'gunicorn', 'projectuas.wsgi', '--bind', '127.0.0.1:{port}',
+                 '--workers', '{workers}', '--log-level', 'warning'],
+    'uvicorn': [sys.executable, '-m', 'uvicorn', 'projectuas.asgi:application', '--host', '127.0.0.1',
+                '--port', '{port}', '--workers', '{workers}', '--no-access-log', '--log-level', 'warning'],
+}
+
+
+class Scenario:
+    """Satu request yang diulang; ``path`` dan ``body`` menerima nomor request supaya id-nya bervariasi."""
+
+    def __init__(self, route, name, path, method='GET', body=None, writes=False, max_requests=None):
+        self.route = route
+        self.name = name
+        self.path = path
+        self.method = method
+        self.body = body
+        # request yang mengubah data hanya dijalankan lewat test client, di dalam transaksi yang di-rollback
+        self.writes = writes
+        self.max_requests = max_requests
+
+
+def setup_django(args):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ['BENCHMARK_DATABASE'] = args.database
+    if args.no_cache:
+        os.environ['BENCHMARK_NO_CACHE'] = '1'
+    import django
+    django.setup()
+
+
+def prepare_database(args):
+    from django.core.management import call_command
+    from django.db import connection
+
+    from benchmarks.data import seed_catalog
+
+    params = {'provinces': args.provinces, 'cities': args.cities, 'spots': args.spots}
+    meta_path = args.database + '.json'
+    if not args.reseed and os.path.exists(args.database) and os.path.exists(meta_path):
+        with open(meta_path) as handle:
+            if json.load(handle) == params:
+                # database lama tetap mengikuti migrasi terbaru
+                call_command('migrate', verbosity=0)
+                return
+    connection.close()
+    for suffix in ('', '-wal', '-shm', '.json'):
+        if os.path.exists(args.database + suffix):
+            os.remove(args.database + suffix)
+
+    print('Menyiapkan database benchmark %s (%s)' % (args.database, params), flush=True)
+    started = time.perf_counter()
+    call_command('migrate', verbosity=0)
+    seed_catalog(stdout=sys.stdout if args.verbose else None, **params)
+    with open(meta_path, 'w') as handle:
+        json.dump(params, handle)
+    print('Seed selesai dalam %.1f detik' % (time.perf_counter() - started), flush=True)
+
+
+def build_scenarios(seed=1):
+    from django.urls import reverse
+
+    from django.utils import timezone
+
+    from uas_app.models import ChangeLog, City, DeleteJob, Province, TourismType, TouristSpot
+
+    rng = random.Random(seed)
+    spot_ids = list(TouristSpot.objects.order_by('?').values_list('id', flat=True)[:1000])
+    cities = list(City.objects.exclude(latitude=None).values_list('id', 'name', 'latitude', 'longitude')[:200])
+    city_ids = [city[0] for city in cities]
+    province_ids = list(Province.objects.values_list('id', flat=True))
+    type_ids = list(TourismType.objects.values_list('id', flat=True))
+    last_change = ChangeLog.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    # job yang sudah selesai, hanya untuk polling status; tidak menghapus apa pun
+    job_id = DeleteJob.objects.values_list('id', flat=True).first() or DeleteJob.objects.create(
+        model='province', object_id=0, status='done', finished_on=timezone.now(),
+    ).pk
+    words = ['pantai', 'danau', 'gunung indah', 'candi', 'air terjun', 'museum', 'pura sari', 'bukit biru']
+
+    def pick(values, index):
+        return values[index % len(values)]
+
+    def url(name, **kwargs):
+        return reverse('api:%s' % name, kwargs=kwargs or None)
+
+    def spot_items(index):
+        # nama yang sudah ada -> update (upsert), sisanya baru
+        return [{
+            'name': 'Benchmark %d-%d' % (index, item), 'address': 'Jl. Benchmark', 'city': pick(city_ids, index + item),
+            'tourism_type': pick(type_ids, item), 'distance_from_city': '%d.50' % (item % 40),
+        } for item in range(100)]
+
+    return [
+        Scenario('tourist-spot-list', 'tourist-spot-list', lambda i: url('tourist-spot-list')),
+        Scenario('tourist-spot-list', 'tourist-spot-list:expand',
+                 lambda i: url('tourist-spot-list') + '?expand=city.province,tourism_type'),
+        Scenario('tourist-spot-list', 'tourist-spot-list:filter', lambda i: url('tourist-spot-list') + (
+            '?status=Aktif&city__province=%d&distance_from_city_max=20' % pick(province_ids, i))),
+        Scenario('tourist-spot-list', 'tourist-spot-list:ids', lambda i: url('tourist-spot-list') + '?ids=%s' % ','.join(
+            str(pick(spot_ids, i * 30 + offset)) for offset in range(30))),
+        Scenario('tourist-spot-list', 'tourist-spot-list:create', lambda i: url('tourist-spot-list'), method='POST',
+                 body=lambda i: spot_items(i)[0], writes=True),
+        Scenario('tourist-spot-batch-get', 'tourist-spot-batch-get', lambda i: url('tourist-spot-batch-get'),
+                 method='POST', body=lambda i: {'ids': [pick(spot_ids, i * 50 + offset) for offset in range(50)]}),
+        Scenario('tourist-spot-bulk', 'tourist-spot-bulk', lambda i: url('tourist-spot-bulk') + '?upsert=1',
+                 method='POST', body=spot_items, writes=True),
+        Scenario('tourist-spot-search', 'tourist-spot-search',
+                 lambda i: url('tourist-spot-search') + '?q=%s' % pick(words, i).replace(' ', '+')),
+        Scenario('tourist-spot-nearby', 'tourist-spot-nearby', lambda i: url('tourist-spot-nearby') + (
+            '?lat=%s&lon=%s&radius=25' % (pick(cities, i)[2], pick(cities, i)[3]))),
+        Scenario('tourist-spot-export', 'tourist-spot-export', lambda i: url('tourist-spot-export') + '?stream=ndjson',
+                 max_requests=2),
+        Scenario('tourist-spot-detail', 'tourist-spot-detail', lambda i: url('tourist-spot-detail', id=pick(spot_ids, i))),
+        Scenario('tourist-spot-detail', 'tourist-spot-detail:delete',
+                 lambda i: url('tourist-spot-detail', id=pick(spot_ids, i)), method='DELETE', writes=True),
+        Scenario('province-list', 'province-list', lambda i: url('province-list')),
+        Scenario('province-batch-get', 'province-batch-get', lambda i: url('province-batch-get'), method='POST',
+                 body=lambda i: {'ids': province_ids[:20]}),
+        Scenario('province-detail', 'province-detail', lambda i: url('province-detail', id=pick(province_ids, i))),
+        Scenario('city-list', 'city-list', lambda i: url('city-list') + '?province=%d' % pick(province_ids, i)),
+        Scenario('city-batch-get', 'city-batch-get', lambda i: url('city-batch-get'), method='POST',
+                 body=lambda i: {'ids': [pick(city_ids, i + offset) for offset in range(20)]}),
+        Scenario('city-bulk', 'city-bulk', lambda i: url('city-bulk') + '?upsert=1', method='POST', body=lambda i: [
+            {'name': pick(cities, i + item)[1], 'province': pick(province_ids, i + item), 'population': rng.randint(1, 10 ** 6)}
+            for item in range(20)
+        ], writes=True),
+        Scenario('city-detail', 'city-detail', lambda i: url('city-detail', id=pick(city_ids, i))),
+        Scenario('tourism-type-list', 'tourism-type-list', lambda i: url('tourism-type-list')),
+        Scenario('tourism-type-detail', 'tourism-type-detail', lambda i: url('tourism-type-detail', id=pick(type_ids, i))),
+        Scenario('delete-job-detail', 'delete-job-detail', lambda i: url('delete-job-detail', id=job_id)),
+        Scenario('sync', 'sync', lambda i: url('sync') + '?since=%d' % max(last_change - 500, 0)),
+        Scenario('cache-stats', 'cache-stats', lambda i: url('cache-stats')),
+        Scenario('metrics', 'metrics', lambda i: url('metrics')),
+    ]
+
+
+def uncovered_routes(scenarios):
+    from api.urls import urlpatterns
+
+    covered = {scenario.route for scenario in scenarios}
+    return sorted(pattern.name for pattern in urlpatterns if pattern.name not in covered)
+
+
+def percentile(sorted_values, pct):
+    # nearest-rank
+    if not sorted_values:
+        return None
+    index = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(latencies, elapsed, errors, queries=None, response_bytes=0):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    result = {
+        'requests': count,
+        'errors': errors,
+        'throughput_rps': round(count / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(latencies) / count * 1000, 3) if count else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3) if count else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3) if count else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3) if count else None,
+        'max_ms': round(latencies[-1] * 1000, 3) if count else None,
+        'bytes_per_request': round(response_bytes / count) if count else 0,
+    }
+    if queries is not None:
+        result['queries_mean'] = round(sum(queries) / len(queries), 2) if queries else None
+        result['queries_max'] = max(queries) if queries else None
+    return result
+
+
+def request_count(scenario, args):
+    return min(args.requests, scenario.max_requests or args.requests)
+
+
+def run_client(scenarios, args):
+    from django.db import connection, transaction
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+    setup_test_environment()
+    client = Client()
+    results = {}
+    for scenario in scenarios:
+        if scenario.writes and not args.writes:
+            continue
+
+        def call(index):
+            kwargs = {}
+            if scenario.body is not None:
+                kwargs = {'data': json.dumps(scenario.body(index)), 'content_type': 'application/json'}
+            # penulisan di-rollback, supaya run berikutnya memakai data yang sama
+            with transaction.atomic() if scenario.writes else nullcontext():
+                with CaptureQueriesContext(connection) as captured:
+                    begin = time.perf_counter()
+                    response = getattr(client, scenario.method.lower())(scenario.path(index), **kwargs)
+                    content = b''.join(response.streaming_content) if response.streaming else response.content
+                    elapsed = time.perf_counter() - begin
+                if scenario.writes:
+                    transaction.set_rollback(True)
+            return response.status_code, len(content), elapsed, len(captured.captured_queries)
+
+        total = request_count(scenario, args)
+        for index in range(min(args.warmup, total)):
+            call(index)
+        latencies, queries = [], []
+        errors = 0
+        response_bytes = 0
+        started = time.perf_counter()
+        for index in range(total):
+            status_code, size, elapsed, query_count = call(index)
+            latencies.append(elapsed)
+            queries.append(query_count)
+            response_bytes += size
+            errors += status_code >= 400
+        results[scenario.name] = summarize(latencies, time.perf_counter() - started, errors, queries, response_bytes)
+        report_line('client', scenario.name, results[scenario.name])
+    return results
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Server berhenti dengan kode %s' % process.returncode)
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('Server tidak siap dalam %d detik' % timeout)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_server(kind, scenarios, args):
+    port = free_port()
+    command = [part.format(port=port, workers=args.workers) for part in SERVER_COMMANDS[kind]]
+    env = os.environ.copy()
+    if kind == 'uvicorn':
+        env.setdefault('API_ASYNC_VIEWS', '1')
+    process = subprocess.Popen(command, env=env)
+    results = {}
+    server = {'workers': args.workers, 'rss_mb_idle': None, 'rss_mb_peak': None}
+    stop = threading.Event()
+    try:
+        wait_for_port(port, process)
+        server['rss_mb_idle'] = process_tree_rss_mb(process.pid)
+        slow = threading.Thread(target=hold_slow_clients, args=(port, args.slow_clients, stop))
+        slow.start()
+        for scenario in scenarios:
+            if scenario.writes:
+                continue
+            results[scenario.name] = load_scenario(port, scenario, args)
+            rss = process_tree_rss_mb(process.pid)
+            if rss is not None:
+                server['rss_mb_peak'] = max(server['rss_mb_peak'] or 0, rss)
+            report_line(kind, scenario.name, results[scenario.name])
+    finally:
+        stop.set()
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    print('%-9s RSS server %s MB (idle) / %s MB (puncak), %d worker' % (
+        kind, server['rss_mb_idle'], server['rss_mb_peak'], args.workers), flush=True)
+    return results, server
+
+
+def process_tree_rss_mb(pid):
+    # jumlah VmRSS proses server dan semua anaknya (worker); hanya Linux (/proc)
+    if not os.path.exists('/proc/%d/status' % pid):
+        return None
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open('/proc/%s/stat' % entry) as handle:
+                    parent = int(handle.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(parent, []).append(int(entry))
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open('/proc/%d/status' % current) as handle:
+                for line in handle:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return round(total_kb / 1024.0, 1)
+
+
+def hold_slow_clients(port, count, stop):
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.create_connection(('127.0.0.1', port), timeout=5)
+            sock.sendall(b'GET /api/tourism-types HTTP/1.1\r\nHost: 127.0.0.1\r\n')
+            sockets.append(sock)
+        # request tidak pernah selesai: satu header per detik sampai benchmark selesai
+        while not stop.wait(1.0):
+            for sock in sockets:
+                try:
+                    sock.sendall(b'X-Slow: 1\r\n')
+                except OSError:
+                    pass
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def load_scenario(port, scenario, args):
+    total = request_count(scenario, args)
+    concurrency = max(1, min(args.concurrency, total))
+    lock = threading.Lock()
+    latencies = []
+    counters = {'errors': 0, 'bytes': 0}
+
+    def worker(offset):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        local_latencies = []
+        errors = response_bytes = 0
+        try:
+            for index in range(offset, total, concurrency):
+                body = json.dumps(scenario.body(index)) if scenario.body is not None else None
+                headers = {'Content-Type': 'application/json'} if body is not None else {}
+                begin = time.perf_counter()
+                try:
+                    connection.request(scenario.method, scenario.path(index), body=body, headers=headers)
+                    response = connection.getresponse()
+                    content = response.read()
+                    if response.getheader('Connection', '').lower() == 'close':
+                        connection.close()
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    errors += 1
+                    continue
+                local_latencies.append(time.perf_counter() - begin)
+                response_bytes += len(content)
+                errors += response.status >= 400
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            counters['errors'] += errors
+            counters['bytes'] += response_bytes
+
+    for index in range(min(args.warmup, total)):
+        warm = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        body = json.dumps(scenario.body(index)) if scenario.body is not None else None
+        warm.request(scenario.method, scenario.path(index), body=body,
+                     headers={'Content-Type': 'application/json'} if body is not None else {})
+        warm.getresponse().read()
+        warm.close()
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, counters['errors'], response_bytes=counters['bytes'])
+
+
+def report_line(mode, name, result):
+    queries = result.get('queries_mean')
+    print('%-9s %-30s %9.1f req/s  p50 %8.2f  p95 %8.2f  p99 %8.2f ms  %s%s' % (
+        mode, name, result['throughput_rps'] or 0, result['p50_ms'] or 0, result['p95_ms'] or 0, result['p99_ms'] or 0,
+        '' if queries is None else '%.1f query' % queries,
+        '  (%d error)' % result['errors'] if result['errors'] else '',
+    ), flush=True)
+
+
+def compare(report, baseline, tolerance):
+    regressions = []
+    for mode, results in report['results'].items():
+        for name, result in results.items():
+            base = baseline.get('results', {}).get(mode, {}).get(name)
+            if not base:
+                continue
+            label = '%s %s' % (mode, name)
+            if result['errors'] > base.get('errors', 0):
+                regressions.append('%s: error %d -> %d' % (label, base.get('errors', 0), result['errors']))
+            if base.get('p95_ms') and result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                regressions.append('%s: p95 %.2f -> %.2f ms' % (label, base['p95_ms'], result['p95_ms']))
+            if base.get('throughput_rps') and result['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+                regressions.append('%s: throughput %.1f -> %.1f req/s' % (
+                    label, base['throughput_rps'], result['throughput_rps']))
+            if base.get('queries_mean') is not None and result.get('queries_mean') is not None \
+                    and result['queries_mean'] > base['queries_mean']:
+                regressions.append('%s: query %.2f -> %.2f' % (label, base['queries_mean'], result['queries_mean']))
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', default=os.path.join(tempfile.gettempdir(), 'uas-benchmark.sqlite3'))
+    parser.add_argument('--provinces', type=int, default=38)
+    parser.add_argument('--cities', type=int, default=500)
+    parser.add_argument('--spots', type=int, default=1000000)
+    parser.add_argument('--reseed', action='store_true', help='Buat ulang database walau parameternya sama')
+    parser.add_argument('--mode', choices=['client', 'gunicorn', 'uvicorn', 'all'], default='all',
+                        help="'all' = test client + gunicorn (+ uvicorn kalau terpasang)")
+    parser.add_argument('--requests', type=int, default=200, help='Request per endpoint')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=8, help='Koneksi paralel ke server')
+    parser.add_argument('--workers', type=int, default=4, help='Worker gunicorn/uvicorn')
+    parser.add_argument('--slow-clients', type=int, default=0,
+                        help='Koneksi lambat yang dibuka selama load (mode server)')
+    parser.add_argument('--writes', action='store_true', help='Ikutkan endpoint tulis (test client, di-rollback)')
+    parser.add_argument('--no-cache', action='store_true', help='Matikan cache response API')
+    parser.add_argument('--only', help='Hanya skenario yang namanya mengandung teks ini')
+    parser.add_argument('--output', help='Tulis hasil JSON ke file ini')
+    parser.add_argument('--baseline', help='File JSON run sebelumnya untuk mode threshold')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Batas regresi p95/throughput (0.15 = 15%%)')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+    args.database = os.path.abspath(args.database)
+
+    setup_django(args)
+    prepare_database(args)
+    scenarios = build_scenarios()
+    missing = uncovered_routes(scenarios)
+    if missing:
+        print('Route tanpa skenario benchmark: %s' % ', '.join(missing), file=sys.stderr)
+    if args.only:
+        scenarios = [scenario for scenario in scenarios if args.only in scenario.name]
+
+    modes = [args.mode] if args.mode != 'all' else ['client', 'gunicorn', 'uvicorn']
+    report = {
+        'meta': {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'dataset': {'provinces': args.provinces, 'cities': args.cities, 'spots': args.spots},
+            'options': {name: getattr(args, name) for name in (
+                'requests', 'warmup', 'concurrency', 'workers', 'slow_clients', 'writes', 'no_cache')},
+            'uncovered_routes': missing,
+        },
+        'results': {},
+        'servers': {},
+    }
+    for mode in modes:
+        if mode == 'client':
+            report['results']['client'] = run_client(scenarios, args)
+            continue
+        module = 'gunicorn' if mode == 'gunicorn' else 'uvicorn'
+        try:
+            __import__(module)
+        except ImportError:
+            if args.mode == mode:
+                parser.error('%s tidak terpasang' % module)
+            print('%s tidak terpasang, dilewati' % module, file=sys.stderr)
+            continue
+        report['results'][mode], report['servers'][mode] = run_server(mode, scenarios, args)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+        print('Hasil ditulis ke %s' % args.output)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+        if regressions:
+            print('Regresi dibanding %s:' % args.baseline, file=sys.stderr)
+            for line in regressions:
+                print('  ' + line, file=sys.stderr)
+            sys.exit(1)
+        print('Tidak ada regresi dibanding %s (toleransi %d%%)' % (args.baseline, args.tolerance * 100))
+
+
+if __name__ == '__main__':
+    main()
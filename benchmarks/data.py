@@ -0,0 +1,75 @@
+"""
+Data sintetis untuk benchmark: provinsi, kota, jenis wisata dan tempat wisata
+dengan sebaran yang mirip data asli (status, jarak, koordinat di Indonesia).
+"""
+import random
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+PLACE_KINDS = ['Pantai', 'Danau', 'Gunung', 'Air Terjun', 'Candi', 'Pura', 'Taman', 'Museum', 'Bukit', 'Goa',
+               'Pulau', 'Kebun Raya', 'Desa Wisata', 'Telaga', 'Curug', 'Benteng', 'Masjid', 'Pasar']
+PLACE_NAMES = ['Indah', 'Biru', 'Putih', 'Sari', 'Asri', 'Lestari', 'Emas', 'Hijau', 'Permai', 'Jaya', 'Mulia',
+               'Kencana', 'Segara', 'Harapan', 'Cemara', 'Merapi', 'Bunga', 'Pelangi', 'Senja', 'Karang']
+TOURISM_TYPES = ['Alam', 'Pantai', 'Budaya', 'Sejarah', 'Religi', 'Kuliner', 'Edukasi', 'Belanja', 'Petualangan',
+                 'Keluarga', 'Agro', 'Bahari']
+
+
+def seed_catalog(provinces=38, cities=500, spots=1000000, batch_size=5000, stdout=None):
+    from uas_app import refdata, search, spatial
+    from uas_app.models import ChangeLog, City, Province, TourismType, TouristSpot
+
+    rng = random.Random(2024)
+    with transaction.atomic():
+        province_rows = Province.objects.bulk_create([
+            Province(name='Provinsi %02d' % index, abbreviation='P%02d' % index,
+                     population=rng.randint(500000, 50000000), area_km2=rng.uniform(500, 300000))
+            for index in range(provinces)
+        ])
+        TourismType.objects.bulk_create([TourismType(name=name) for name in TOURISM_TYPES])
+        city_rows = City.objects.bulk_create([
+            City(name='Kota %03d' % index, province=province_rows[index % provinces], is_capital=index < provinces,
+                 latitude='%.6f' % rng.uniform(-10.5, 5.5), longitude='%.6f' % rng.uniform(95.0, 141.0),
+                 population=rng.randint(50000, 10000000))
+            for index in range(cities)
+        ])
+        refdata.invalidate()
+    city_ids = [city.pk for city in city_rows]
+    type_ids = list(TourismType.objects.values_list('id', flat=True))
+
+    created = 0
+    while created < spots:
+        batch = []
+        for index in range(created, min(created + batch_size, spots)):
+            name = '%s %s %d' % (rng.choice(PLACE_KINDS), rng.choice(PLACE_NAMES), index)
+            batch.append(TouristSpot(
+                name=name,
+                description='%s adalah tujuan wisata %s yang ramai dikunjungi saat akhir pekan.' % (
+                    name, rng.choice(TOURISM_TYPES).lower()),
+                address='Jl. %s No. %d' % (rng.choice(PLACE_NAMES), rng.randint(1, 300)),
+                city_id=rng.choice(city_ids),
+                tourism_type_id=rng.choice(type_ids) if rng.random() < 0.95 else None,
+                distance_from_city='%.2f' % rng.uniform(0, 120),
+                status='Aktif' if rng.random() < 0.8 else 'Tidak Aktif',
+            ))
+        with transaction.atomic():
+            TouristSpot.objects.bulk_create(batch)
+        created += len(batch)
+        if stdout:
+            stdout.write('%d/%d tempat wisata\n' % (created, spots))
+
+    # bulk_create tidak mengirim sinyal, jadi index dan change log diisi langsung
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE %s SET last_modified = datetime('now', '-' || (abs(random()) %% 31536000) || ' seconds')"
+            % TouristSpot._meta.db_table
+        )
+        now = timezone.now()
+        for model in (Province, TourismType, City, TouristSpot):
+            cursor.execute(
+                "INSERT INTO %s (model, object_id, action, changed_on) SELECT %%s, id, 'upsert', %%s FROM %s ORDER BY id"
+                % (ChangeLog._meta.db_table, model._meta.db_table),
+                [model._meta.model_name, now],
+            )
+    spatial.index_cities(City.objects.values_list('id', 'latitude', 'longitude'))
+    search.rebuild_index()
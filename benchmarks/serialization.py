@@ -0,0 +1,87 @@
+"""
+Bandingkan throughput serialisasi list TouristSpot: serializer DRF + JSONRenderer
+vs. api.fastpath.FastRowSerializer + FastJSONRenderer.
+
+    python -m benchmarks.serialization --rows 20000 --repeat 5
+
+Memakai database test SQLite in-memory, db.sqlite3 tidak disentuh.
+"""
+import argparse
+import os
+import time
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projectuas.settings')
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+
+def seed(rows):
+    from uas_app.models import City, Province, TourismType, TouristSpot
+
+    province = Province.objects.create(name='Benchmark', population=1000000, area_km2=1234.5)
+    city = City.objects.create(name='Benchmark', province=province, latitude='-6.2', longitude='106.8')
+    tourism_type = TourismType.objects.create(name='Alam')
+    TouristSpot.objects.bulk_create(
+        TouristSpot(
+            name='Tempat wisata %d' % index,
+            description='Deskripsi tempat wisata nomor %d ' % index * 4,
+            address='Jl. Contoh No. %d' % index,
+            city=city,
+            tourism_type=tourism_type,
+            distance_from_city='%d.%02d' % (index % 50, index % 100),
+            image='tourism_images/spot-%d.jpg' % index if index % 2 else None,
+        )
+        for index in range(rows)
+    )
+
+
+def measure(label, render, rows, repeat):
+    best = None
+    body = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = render()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print('%-28s %8.1f ms  %10.0f rows/s' % (label, best * 1000, rows / best))
+    return body, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    seed(args.rows)
+
+    from rest_framework.renderers import JSONRenderer
+
+    from api.fastpath import FastRowSerializer
+    from api.renderers import FastJSONRenderer
+    from api.serializers import TouristSpotSerializer
+    from uas_app.models import TouristSpot
+
+    queryset = TouristSpot.objects.order_by('id')
+    fast = FastRowSerializer(TouristSpotSerializer)
+
+    def drf():
+        return JSONRenderer().render(TouristSpotSerializer(queryset.all(), many=True).data)
+
+    def fast_path():
+        return FastJSONRenderer().render(fast.many(fast.values(queryset.all())))
+
+    drf_body, drf_time = measure('DRF ModelSerializer', drf, args.rows, args.repeat)
+    fast_body, fast_time = measure('FastRowSerializer', fast_path, args.rows, args.repeat)
+    print('speedup: %.2fx, output identik: %s' % (drf_time / fast_time, drf_body == fast_body))
+
+
+if __name__ == '__main__':
+    main()
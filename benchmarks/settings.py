@@ -0,0 +1,25 @@
+"""
+Settings untuk benchmarks.api: database SQLite terpisah (BENCHMARK_DATABASE) dan
+DEBUG mati seperti di production, supaya query tidak ditampung di memori.
+"""
+import os
+import tempfile
+
+from projectuas.settings import *  # noqa: F401,F403
+from projectuas.settings import CACHES, DATABASES
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'NAME': os.environ.get('BENCHMARK_DATABASE', os.path.join(tempfile.gettempdir(), 'uas-benchmark.sqlite3')),
+    }
+}
+
+# metrik benchmark tidak bercampur dengan server development
+API_METRICS_DIR = os.path.join(tempfile.gettempdir(), 'uas-benchmark-metrics')
+
+# --no-cache: ukur view-nya sendiri, bukan cache response
+if os.environ.get('BENCHMARK_NO_CACHE'):
+    CACHES = {**CACHES, 'api': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
@@ -0,0 +1,29 @@
+"""
+Konfigurasi gunicorn (dibaca otomatis dari direktori kerja): reset metrik /metrics saat server
+mulai, dan snapshot data referensi dimuat di setiap worker sebelum menerima request.
+"""
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projectuas.settings')
+
+
+def on_starting(server):
+    # file metrik dari server sebelumnya tidak ikut dijumlahkan; worker yang di-restart tetap dihitung
+    from api import metrics
+
+    metrics.clear()
+
+
+def post_worker_init(worker):
+    from django.db import DatabaseError, connections
+
+    from uas_app import refdata
+
+    try:
+        refdata.preload()
+    except DatabaseError:
+        # mis. database belum dimigrasi; snapshot dimuat di request pertama
+        worker.log.warning('Snapshot data referensi gagal dimuat saat worker mulai', exc_info=True)
+    finally:
+        # thread request gthread membuka koneksinya sendiri
+        connections.close_all()
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,12 +42,17 @@ INSTALLED_APPS = [
     'uas_app',
     'api',
     'rest_framework',
+    'django_filters',
 ]
 
 #Customize model User
 AUTH_USER_MODEL = 'uas_app.User'
 
 MIDDLEWARE = [
+    'api.profiling.ProfilingMiddleware',
+    'api.metrics.MetricsMiddleware',
+    'api.replicas.ReplicaMiddleware',
+    'uas_app.refdata.RefDataMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,13 +85,89 @@ WSGI_APPLICATION = 'projectuas.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+#
+# SQLite untuk produksi: WAL (pembaca tidak menunggu penulis), synchronous=NORMAL (aman
+# di WAL, fsync hanya saat checkpoint), mmap 256 MB, page cache 64 MB per koneksi, dan
+# busy_timeout 5 detik. Transaksi dimulai dengan BEGIN IMMEDIATE supaya penulis antre di
+# awal transaksi; lihat juga api.writes untuk antrean dan retry penulisan.
+#
+# journal_mode=WAL tersimpan di file database: koneksi pertama (termasuk manage.py migrate
+# atau makemigrations) mengubah db.sqlite3 ke WAL, dan selama ada koneksi terbuka ada file
+# db.sqlite3-wal dan db.sqlite3-shm di sebelahnya. Ketiganya tidak ikut di git; buat
+# database lokal dengan ``python manage.py migrate``. Untuk menyalin database, salin ketiga
+# filenya saat server berhenti atau pakai ``sqlite3 db.sqlite3 .backup``. Contoh data katalog
+# yang dulu ada di db.sqlite3: ``python manage.py loaddata sample_catalog``.
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # koneksi dipakai ulang antar request; dicek dulu sebelum dipakai lagi
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Replika baca (api.replicas): GET/HEAD di bawah API_REPLICA_PATHS dibaca dari snapshot
+# db.sqlite3 yang tidak lebih tua dari API_REPLICA_MAX_LAG detik. Jumlah replika diatur
+# lewat env API_READ_REPLICAS; snapshot diperbarui oleh proses terpisah:
+#   python manage.py refresh_replicas --interval 5
+API_REPLICA_DIR = BASE_DIR / 'replicas'
+API_REPLICA_MAX_LAG = 10
+API_REPLICA_PATHS = ('/api/',)
+API_REPLICA_COOKIE = 'api_written'
+
+for index in range(1, int(os.environ.get('API_READ_REPLICAS', '0')) + 1):
+    DATABASES['replica_%d' % index] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        # file snapshot diganti utuh, tidak pernah diubah, jadi dibuka read-only tanpa lock
+        'NAME': 'file:%s?mode=ro&immutable=1' % (API_REPLICA_DIR / ('replica_%d.sqlite3' % index)),
+        # koneksi baru per request, supaya snapshot terbaru langsung terpakai
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'init_command': 'PRAGMA mmap_size=268435456;PRAGMA cache_size=-65536',
+        },
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Response cache API memakai alias 'api'. LocMemCache cukup untuk satu worker;
+# untuk beberapa worker gunicorn pakai backend yang dibagi antar proses, mis.
+# 'django.core.cache.backends.filebased.FileBasedCache' (LOCATION: BASE_DIR / 'cache')
+# atau 'django.core.cache.backends.db.DatabaseCache' (jalankan createcachetable).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-responses',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
 }
 
+API_CACHE_ALIAS = 'api'
+# Batas umur entry; invalidasi utama tetap lewat versi per model
+API_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -109,8 +192,66 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES' : [
           'rest_framework.permissions.AllowAny',
       ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
+# Batas atas ?page_size= untuk semua endpoint list
+API_MAX_PAGE_SIZE = 500
+
+# Jumlah baris per fetch saat export streaming
+API_EXPORT_CHUNK_SIZE = 2000
+
+# Endpoint bulk: maksimal item per request dan jumlah baris per bulk_create/bulk_update
+API_BULK_MAX_ITEMS = 10000
+API_BULK_BATCH_SIZE = 500
+
+# DELETE provinsi/kota dengan turunan (kota + tempat wisata) lebih dari batas ini dijalankan
+# di latar belakang oleh uas_app.cascade (202 + job id), per chunk CASCADE_DELETE_CHUNK_SIZE baris
+CASCADE_DELETE_INLINE_LIMIT = 1000
+CASCADE_DELETE_CHUNK_SIZE = 500
+
+# Jumlah id maksimum untuk ?ids= dan POST .../batch-get
+API_MULTI_GET_MAX_IDS = 200
+
+# Radius maksimum /api/tourist-spots/nearby
+API_NEARBY_MAX_RADIUS_KM = 200
+
+# View list/detail async (api.async_views), hanya untuk ASGI: di bawah WSGI setiap view async
+# dijalankan lewat async_to_sync dan justru lebih lambat. Tidak aktif secara default, juga di
+# projectuas/asgi.py: GET versi async selalu merender JSON (tanpa Accept/?format= dan browsable API)
+API_ASYNC_VIEWS = os.environ.get('API_ASYNC_VIEWS') == '1'
+
+# Jalur baca cepat (api.fastpath) untuk view list dan detail tanpa ?expand=
+API_FAST_SERIALIZATION = False
+
+
+# api.profiling.ProfilingMiddleware: header Server-Timing selalu dikirim; API_PROFILE_SAMPLE_RATE
+# bagian request dijalankan di bawah cProfile dan yang termasuk API_PROFILE_SLOWEST_PERCENT persen
+# paling lambat disimpan ke API_PROFILE_DIR (0 = tanpa profiling)
+API_PROFILE_SAMPLE_RATE = 0.0
+API_PROFILE_SLOWEST_PERCENT = 5
+API_PROFILE_DIR = BASE_DIR / 'profiles'
+
+# api.metrics: file mmap per proses worker untuk /metrics; semua worker harus memakai
+# direktori yang sama, dan isinya dikosongkan saat gunicorn mulai (gunicorn.conf.py).
+# Di luar direktori repo; beberapa server di satu mesin perlu API_METRICS_DIR sendiri-sendiri
+API_METRICS_DIR = os.environ.get('API_METRICS_DIR') or os.path.join(tempfile.gettempdir(), 'uas-metrics')
+
+# api.writes: berapa kali transaksi tulis diulang kalau database terkunci (setelah
+# busy_timeout habis), jeda awal backoff-nya, dan lama maksimum antre di dalam proses
+API_WRITE_RETRIES = 3
+API_WRITE_RETRY_BACKOFF = 0.05
+API_WRITE_QUEUE_TIMEOUT = 10.0
+
+# uas_app.refdata: snapshot Province/City/TourismType di memori proses. Tokennya dicek sekali per
+# request; di luar request (worker antrean, command) paling lama setiap sekian detik
+REFDATA_CHECK_INTERVAL = 1.0
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -133,6 +274,22 @@ STATIC_ROOT = [BASE_DIR/'static']
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR/'media'
 
+# Upload langsung ditulis ke file sementara di disk (bukan ditampung di memori), lalu
+# dipindahkan ke MEDIA_ROOT oleh storage
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+
+# uas_app.images: lebar turunan WebP/JPEG TouristSpot.image (dibuat oleh worker antrean tugas)
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1280)
+
+# uas_app.tasks: antrean tugas di tabel Task, dijalankan oleh `python manage.py run_workers`.
+# Jeda retry = TASK_RETRY_BACKOFF * 2^(percobaan - 1) detik, paling lama TASK_RETRY_BACKOFF_MAX;
+# tugas selesai dihapus setelah TASK_RETENTION_DAYS hari
+TASK_WORKER_PROCESSES = 2
+TASK_POLL_INTERVAL = 1.0
+TASK_RETRY_BACKOFF = 5
+TASK_RETRY_BACKOFF_MAX = 600
+TASK_RETENTION_DAYS = 7
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
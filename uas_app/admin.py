@@ -1,9 +1,12 @@
 from django.contrib import admin
 from uas_app.models import User, Province, City, TourismType, TouristSpot
 
+# City.__str__ (nama provinsi) dan TouristSpot.__str__ (nama kota) dibaca dari snapshot
+# uas_app.refdata, jadi list dan pilihan FK di admin tidak perlu select_related
+
 # Register your models here.
 admin.site.register(User)
 admin.site.register(Province)
 admin.site.register(City)
 admin.site.register(TourismType)
-admin.site.register(TouristSpot)
\ No newline at end of file
+admin.site.register(TouristSpot)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class UasAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'uas_app'
+
+    def ready(self):
+        from uas_app import signals  # noqa: F401
+        # mendaftarkan handler tugas antrean (images dan search sudah lewat signals)
+        from uas_app import cascade  # noqa: F401
@@ -0,0 +1,123 @@
+"""
+Hapus berantai Province/City yang besar di latar belakang.
+
+``Model.delete()`` memuat setiap City dan TouristSpot turunan lewat collector Django dan
+menghapus semuanya dalam satu transaksi, jadi lock tulis SQLite dipegang selama itu.
+Di sini parent (dan kota di bawah provinsi) langsung disembunyikan (``pending_delete``, lihat
+``VisibleManager``), lalu turunannya dihapus per chunk dengan ``DELETE ... WHERE id IN (...)`` dalam transaksi
+pendek, tanpa membuat instance model. Efek samping post_delete (index FTS/RTree, change
+log, cache response) dikirim lewat sinyal ``bulk_deleted`` di transaksi setiap chunk.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from uas_app import tasks
+
+
+def chunk_size():
+    return getattr(settings, 'CASCADE_DELETE_CHUNK_SIZE', 500)
+
+
+def dependents(instance):
+    """(model, queryset) turunan ``instance`` dalam urutan penghapusan: yang paling bawah dulu."""
+    from uas_app.models import City, Province, TouristSpot
+
+    if isinstance(instance, Province):
+        return [
+            (TouristSpot, TouristSpot.all_objects.filter(city__province_id=instance.pk)),
+            (City, City.all_objects.filter(province_id=instance.pk)),
+        ]
+    if isinstance(instance, City):
+        return [(TouristSpot, TouristSpot.all_objects.filter(city_id=instance.pk))]
+    return []
+
+
+def is_large(instance, limit=None):
+    """True kalau turunan ``instance`` lebih dari ``limit`` baris (dihitung paling banyak limit + 1)."""
+    limit = getattr(settings, 'CASCADE_DELETE_INLINE_LIMIT', 1000) if limit is None else limit
+    total = 0
+    for model, queryset in dependents(instance):
+        # id saja, bukan COUNT(*) atas subquery ber-LIMIT
+        total += len(queryset.order_by().values_list('id', flat=True)[:limit + 1 - total])
+        if total > limit:
+            return True
+    return False
+
+
+def start(instance):
+    """Sembunyikan ``instance`` dan jadwalkan penghapusannya setelah commit; kembalikan DeleteJob-nya."""
+    from uas_app.models import City, DeleteJob, Province
+    from uas_app.signals import bulk_deleted
+
+    model = type(instance)
+    model.all_objects.filter(pk=instance.pk).update(pending_delete=True)
+    # kota di bawah provinsi ikut disembunyikan: selama job berjalan tidak ada TouristSpot baru yang
+    # bisa ditambahkan ke kota yang akan dihapus (validasi FK hanya melihat baris yang terlihat)
+    cities = []
+    if isinstance(instance, Province):
+        cities = list(City.all_objects.filter(province_id=instance.pk, pending_delete=False).values_list('id', flat=True))
+        City.all_objects.filter(pk__in=cities).update(pending_delete=True)
+    job = DeleteJob.objects.create(model=model._meta.label_lower, object_id=instance.pk)
+    # untuk pembaca parent sudah terhapus: tombstone di change log dan cache response dibuang
+    bulk_deleted.send(sender=model, pks=[instance.pk])
+    if cities:
+        bulk_deleted.send(sender=City, pks=cities)
+    tasks.enqueue('cascade.run_job', {'job_id': job.pk}, key='cascade:%d' % job.pk)
+    return job
+
+
+def delete_rows(model, pks):
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM %s WHERE id IN (%s)' % (table, ', '.join(['%s'] * len(pks))), pks)
+        return cursor.rowcount
+
+
+def delete_in_chunks(job, model, queryset):
+    from uas_app.signals import bulk_deleted
+
+    label = model._meta.model_name
+    while True:
+        # satu transaksi pendek per chunk, jadi penulis lain bisa masuk di antaranya; efek samping
+        # (tombstone, index FTS/RTree) ikut transaksi yang sama, jadi kalau sinyalnya gagal
+        # chunk-nya di-rollback dan diulang utuh saat job dilanjutkan
+        with transaction.atomic():
+            pks = list(queryset.order_by().values_list('id', flat=True)[:chunk_size()])
+            if not pks:
+                return
+            job.deleted[label] = job.deleted.get(label, 0) + delete_rows(model, pks)
+            job.save(update_fields=['deleted'])
+            bulk_deleted.send(sender=model, pks=pks)
+
+
+def run(job):
+    from django.apps import apps
+
+    model = apps.get_model(job.model)
+    instance = model.all_objects.filter(pk=job.object_id).first()
+    if instance is not None:
+        for dependent_model, queryset in dependents(instance):
+            delete_in_chunks(job, dependent_model, queryset)
+        with transaction.atomic():
+            job.deleted[model._meta.model_name] = delete_rows(model, [instance.pk])
+            job.save(update_fields=['deleted'])
+
+
+# prioritas rendah dan visibility timeout panjang: satu job bisa menghapus ratusan ribu baris
+@tasks.task('cascade.run_job', priority=-10, visibility_timeout=3600)
+def run_job(job_id):
+    """Jalankan (atau lanjutkan) satu DeleteJob; chunk yang sudah terhapus tidak diulang."""
+    from uas_app.models import DeleteJob
+
+    job = DeleteJob.objects.filter(pk=job_id).exclude(status='done').first()
+    if job is None:
+        return
+    DeleteJob.objects.filter(pk=job.pk).update(status='running', error='')
+    try:
+        run(job)
+    except Exception as exc:
+        # antrean mengulang tugasnya; parent tetap tersembunyi sampai berhasil
+        DeleteJob.objects.filter(pk=job.pk).update(status='failed', error=str(exc))
+        raise
+    DeleteJob.objects.filter(pk=job.pk).update(status='done', finished_on=timezone.now())
@@ -0,0 +1,25 @@
+from django.db import transaction
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+CHUNK_SIZE = 500
+
+
+def record_changes(model, pks, action):
+    """
+    Catat perubahan ``pks`` dari ``model`` di ChangeLog.
+
+    Baris lama untuk objek yang sama dihapus lalu dibuat ulang, jadi setiap objek
+    hanya muncul sekali di feed sync dengan id (token) yang lebih baru.
+    """
+    from uas_app.models import ChangeLog
+
+    pks = list(pks)
+    model_name = model._meta.model_name
+    for start in range(0, len(pks), CHUNK_SIZE):
+        chunk = pks[start:start + CHUNK_SIZE]
+        with transaction.atomic():
+            ChangeLog.objects.filter(model=model_name, object_id__in=chunk).delete()
+            ChangeLog.objects.bulk_create(
+                [ChangeLog(model=model_name, object_id=pk, action=action) for pk in chunk]
+            )
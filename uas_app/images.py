@@ -0,0 +1,140 @@
+"""
+Turunan gambar TouristSpot: WebP dan JPEG pada beberapa lebar tetap.
+
+Dibuat oleh worker antrean tugas (uas_app.tasks), bukan di request upload. Nama file
+turunan adalah hash isinya, jadi URL-nya boleh di-cache selamanya oleh browser/CDN.
+Hasilnya disimpan di ``TouristSpot.image_derivatives``::
+
+    {'source': 'tourism_images/a.jpg', 'webp': {'320': 'tourism_images/derivatives/...webp', ...}, 'jpeg': {...}}
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from uas_app import tasks
+
+DERIVATIVE_DIR = 'tourism_images/derivatives'
+# format -> (format Pillow, ekstensi, opsi encoder)
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def derivative_widths():
+    return tuple(sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (320, 640, 1280))))
+
+
+def is_stale(spot):
+    # turunan selalu dibuat dari gambar yang sedang tersimpan; gambar dihapus berarti turunan dikosongkan
+    deferred = spot.get_deferred_fields()
+    if 'image_derivatives' in deferred:
+        # instance sebagian (PATCH di api.conditional): basi kalau image termasuk kolom yang ditulis
+        return 'image' not in deferred
+    return (spot.image.name or '') != (spot.image_derivatives or {}).get('source', '')
+
+
+def load_image(storage, name, max_width):
+    from PIL import Image, ImageOps
+
+    with storage.open(name, 'rb') as handle:
+        image = Image.open(handle)
+        # JPEG di-decode langsung di skala 1/2, 1/4, 1/8 kalau masih >= lebar terbesar
+        image.draft('RGB', (max_width, max_width))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if image.mode in ('LA', 'PA') or 'transparency' in image.info else 'RGB')
+    return image
+
+
+def encode(image, format_name):
+    pillow_format, extension, options = FORMATS[format_name]
+    if pillow_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue(), extension
+
+
+def build_derivatives(name, storage=None):
+    """Buat semua turunan ``name`` dan kembalikan isi ``image_derivatives``-nya."""
+    from PIL import Image
+
+    from uas_app.models import TouristSpot
+
+    storage = storage or TouristSpot._meta.get_field('image').storage
+    widths = derivative_widths()
+    image = load_image(storage, name, widths[-1])
+    # tidak diperbesar: gambar yang lebih kecil dari semua lebar cukup satu turunan selebar aslinya
+    targets = [width for width in widths if width < image.width] or [image.width]
+
+    result = {'source': name}
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS, reducing_gap=2.0)
+        for format_name in FORMATS:
+            content, extension = encode(resized, format_name)
+            path = '%s/%s.%s' % (DERIVATIVE_DIR, hashlib.sha256(content).hexdigest()[:32], extension)
+            # isi sama = nama sama, jadi file yang sudah ada tidak ditulis ulang
+            if not storage.exists(path):
+                path = storage.save(path, ContentFile(content))
+            result.setdefault(format_name, {})[str(width)] = path
+    return result
+
+
+def derivative_paths(derivatives):
+    return {path for name, paths in (derivatives or {}).items() if name != 'source' for path in paths.values()}
+
+
+def delete_unused(paths, storage=None):
+    """Hapus file turunan ``paths`` yang tidak lagi dirujuk TouristSpot mana pun."""
+    from uas_app.models import TouristSpot
+
+    storage = storage or TouristSpot._meta.get_field('image').storage
+    for path in sorted(paths):
+        # nama file = hash isinya: gambar yang sama di tempat wisata lain memakai file yang sama
+        if not TouristSpot.all_objects.filter(image_derivatives__icontains=path).exists():
+            storage.delete(path)
+
+
+# gambar rusak/format tidak didukung diulang beberapa kali lalu ditandai gagal; bisa diulang
+# dengan manage.py build_image_derivatives
+@tasks.task('images.update_spot', max_attempts=3)
+def update_spot(pk, force=False):
+    """Bangun ulang turunan satu TouristSpot kalau gambarnya berubah sejak turunan terakhir."""
+    from uas_app.models import TouristSpot
+    from uas_app.signals import bulk_saved
+
+    spot = TouristSpot.objects.filter(pk=pk).only('id', 'image', 'image_derivatives').first()
+    if spot is None or not (force or is_stale(spot)):
+        return False
+    derivatives = build_derivatives(spot.image.name) if spot.image.name else {}
+    # hanya ditulis kalau gambarnya belum diganti lagi selama turunan dibuat
+    queryset = TouristSpot.objects.filter(pk=pk)
+    if spot.image.name:
+        queryset = queryset.filter(image=spot.image.name)
+    else:
+        queryset = queryset.filter(Q(image='') | Q(image__isnull=True))
+    superseded = derivative_paths(spot.image_derivatives) - derivative_paths(derivatives)
+    # last_modified ikut berubah: image_srcset bagian dari response, jadi ETag dan last_modified_after harus melihatnya
+    now = timezone.now()
+    updated = queryset.update(image_derivatives=derivatives, last_modified=now)
+    if updated:
+        spot.image_derivatives, spot.last_modified = derivatives, now
+        # UPDATE langsung tidak mengirim post_save: cache response dan change log diperbarui lewat bulk_saved
+        bulk_saved.send(sender=TouristSpot, created=[], updated=[spot])
+        if superseded:
+            # setelah commit: kalau transaksinya di-rollback, turunan lama masih dirujuk
+            transaction.on_commit(lambda: delete_unused(superseded))
+    return bool(updated)
+
+
+def schedule(pks):
+    # ikut transaksi yang menyimpan gambarnya: worker baru melihat tugasnya setelah commit
+    tasks.enqueue_many('images.update_spot', [{'pk': pk} for pk in pks])
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from uas_app import images
+from uas_app.models import TouristSpot
+
+
+class Command(BaseCommand):
+    help = ('Buat turunan WebP/JPEG gambar TouristSpot yang belum ada atau sudah usang '
+            '(data lama, atau tugas antrean images.update_spot yang gagal).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Buat ulang semua, termasuk yang sudah terbaru')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        spots = (TouristSpot.objects.exclude(image='').exclude(image__isnull=True)
+                 .only('id', 'image', 'image_derivatives').order_by('id'))
+        total = failed = 0
+        for spot in spots.iterator(chunk_size=options['chunk_size']):
+            if not (options['all'] or images.is_stale(spot)):
+                continue
+            try:
+                images.update_spot(spot.pk, force=options['all'])
+            except Exception as exc:
+                failed += 1
+                self.stderr.write('TouristSpot %d: %s' % (spot.pk, exc))
+                continue
+            total += 1
+            if total % 100 == 0:
+                self.stdout.write('%d tempat wisata diproses' % total)
+        self.stdout.write(self.style.SUCCESS('Selesai: %d tempat wisata diproses, %d gagal.' % (total, failed)))
@@ -0,0 +1,288 @@
+import csv
+import json
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+
+from uas_app.models import City, ImportCheckpoint, Province, TourismType, TouristSpot
+from uas_app.signals import bulk_saved
+
+# id sementara untuk data yang "dibuat" saat --dry-run
+DRY_RUN_ID = -1
+MAX_ERRORS_SHOWN = 50
+TRUE_STRINGS = {'true', 't', '1', 'yes', 'y', 'ya'}
+FALSE_STRINGS = {'false', 'f', '0', 'no', 'n', 'tidak'}
+
+
+def iter_records(path, input_format):
+    # dibaca baris per baris supaya memori tetap konstan berapa pun ukuran file
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        if input_format == 'csv':
+            for line_no, row in enumerate(csv.DictReader(handle), start=2):
+                yield line_no, row
+        else:
+            for line_no, line in enumerate(handle, start=1):
+                if line.strip():
+                    yield line_no, json.loads(line)
+
+
+def build_instance(model, row, columns, foreign_keys=()):
+    values = {}
+    for name in columns:
+        if name not in row:
+            continue
+        field = model._meta.get_field(name)
+        raw = row[name]
+        if raw in ('', None):
+            if field.has_default():
+                continue
+            raw = None if field.null else ''
+        elif isinstance(field, models.BooleanField) and isinstance(raw, str):
+            lowered = raw.strip().lower()
+            raw = True if lowered in TRUE_STRINGS else False if lowered in FALSE_STRINGS else raw
+        values[name] = raw
+    instance = model(**values)
+    # clean_fields() mengonversi string CSV ke tipe Python tanpa query; FK diisi importer dari Lookup
+    instance.clean_fields(exclude=foreign_keys)
+    return instance, tuple(name for name in columns if name in values) + tuple(foreign_keys)
+
+
+class Lookup:
+    """Natural key -> id untuk tabel referensi, dimuat sekali di awal import."""
+
+    def __init__(self):
+        self.provinces = dict(Province.objects.values_list('name', 'id'))
+        self.cities = {
+            (name, province_id): pk for pk, name, province_id in City.objects.values_list('id', 'name', 'province_id')
+        }
+        self.tourism_types = {}
+        for pk, name in TourismType.objects.order_by('-id').values_list('id', 'name'):
+            self.tourism_types[name] = pk
+
+    def province(self, name):
+        try:
+            return self.provinces[name]
+        except KeyError:
+            raise ValidationError({'province': 'Provinsi "%s" tidak ditemukan' % name})
+
+    def city(self, name, province_name):
+        province_id = self.province(province_name)
+        try:
+            return self.cities[(name, province_id)]
+        except KeyError:
+            raise ValidationError({'city': 'Kota "%s, %s" tidak ditemukan' % (name, province_name)})
+
+    def tourism_type(self, name, dry_run):
+        if name in ('', None):
+            return None
+        if name not in self.tourism_types:
+            self.tourism_types[name] = DRY_RUN_ID if dry_run else TourismType.objects.create(name=name).pk
+        return self.tourism_types[name]
+
+
+class ProvinceImporter:
+    model = Province
+    columns = ('name', 'abbreviation', 'capital_city', 'population', 'area_km2')
+    unique_fields = ('name',)
+
+    def __init__(self, lookup):
+        self.lookup = lookup
+
+    def build(self, row, dry_run):
+        return build_instance(Province, row, self.columns)
+
+    def key(self, instance):
+        return instance.name
+
+    def remember(self, instances, dry_run):
+        if dry_run:
+            for instance in instances:
+                self.lookup.provinces.setdefault(instance.name, DRY_RUN_ID)
+            return
+        names = [instance.name for instance in instances]
+        self.lookup.provinces.update(Province.objects.filter(name__in=names).values_list('name', 'id'))
+        for instance in instances:
+            instance.pk = self.lookup.provinces[instance.name]
+
+
+class CityImporter(ProvinceImporter):
+    model = City
+    columns = ('name', 'is_capital', 'area_code', 'latitude', 'longitude', 'population')
+    unique_fields = ('name', 'province')
+
+    def build(self, row, dry_run):
+        instance, fields = build_instance(City, row, self.columns, foreign_keys=('province',))
+        instance.province_id = self.lookup.province(row.get('province'))
+        return instance, fields
+
+    def key(self, instance):
+        return (instance.name, instance.province_id)
+
+    def remember(self, instances, dry_run):
+        if dry_run:
+            for instance in instances:
+                self.lookup.cities.setdefault(self.key(instance), DRY_RUN_ID)
+            return
+        rows = City.objects.filter(
+            name__in={instance.name for instance in instances},
+            province_id__in={instance.province_id for instance in instances},
+        ).values_list('id', 'name', 'province_id')
+        self.lookup.cities.update({(name, province_id): pk for pk, name, province_id in rows})
+        for instance in instances:
+            instance.pk = self.lookup.cities[self.key(instance)]
+
+
+class SpotImporter(ProvinceImporter):
+    model = TouristSpot
+    columns = ('name', 'description', 'address', 'distance_from_city', 'status')
+    # tempat wisata tidak punya natural key unik; checkpoint mencegah duplikasi saat resume
+    unique_fields = None
+
+    def build(self, row, dry_run):
+        instance, fields = build_instance(TouristSpot, row, self.columns, foreign_keys=('city', 'tourism_type'))
+        instance.city_id = self.lookup.city(row.get('city'), row.get('province'))
+        instance.tourism_type_id = self.lookup.tourism_type(row.get('tourism_type'), dry_run)
+        return instance, fields
+
+    def key(self, instance):
+        return None
+
+    def remember(self, instances, dry_run):
+        pass
+
+
+IMPORTERS = (
+    ('provinces', ProvinceImporter),
+    ('cities', CityImporter),
+    ('spots', SpotImporter),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Import provinsi, kota dan tempat wisata dari CSV/NDJSON secara streaming. '
+        'FK diisi dari natural key (nama provinsi, nama kota + provinsi, nama jenis wisata), '
+        'ditulis per chunk dengan bulk_create, dan bisa dilanjutkan dari checkpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--provinces', help='File provinsi: name, abbreviation, capital_city, population, area_km2')
+        parser.add_argument('--cities', help='File kota: name, province, is_capital, area_code, latitude, longitude, population')
+        parser.add_argument('--spots', help='File tempat wisata: name, description, address, city, province, '
+                                            'tourism_type, distance_from_city, status')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Default: dari ekstensi file')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Validasi saja, tanpa menulis ke database')
+        parser.add_argument('--restart', action='store_true', help='Abaikan checkpoint dan mulai dari awal file')
+
+    def handle(self, *args, **options):
+        jobs = [(kind, importer, options[kind]) for kind, importer in IMPORTERS if options[kind]]
+        if not jobs:
+            raise CommandError('Berikan minimal satu dari --provinces, --cities atau --spots.')
+        for _, _, path in jobs:
+            if not os.path.exists(path):
+                raise CommandError('File tidak ditemukan: %s' % path)
+
+        lookup = Lookup()
+        for kind, importer_class, path in jobs:
+            input_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+            self.import_file(kind, importer_class(lookup), path, input_format, options)
+
+    def import_file(self, kind, importer, path, input_format, options):
+        dry_run = options['dry_run']
+        chunk_size = options['chunk_size']
+        source = '%s:%s' % (kind, os.path.abspath(path))
+        start_position = 0
+        if not dry_run and not options['restart']:
+            start_position = ImportCheckpoint.objects.filter(source=source).values_list('position', flat=True).first() or 0
+        if start_position:
+            self.stdout.write('%s: melanjutkan dari baris data ke-%d' % (kind, start_position + 1))
+
+        started = time.monotonic()
+        position = 0
+        written = 0
+        errors = 0
+        chunk = []
+        seen = set()
+        for line_no, row in iter_records(path, input_format):
+            position += 1
+            if position <= start_position:
+                continue
+            try:
+                instance, fields = importer.build(row, dry_run)
+            except ValidationError as exc:
+                errors += 1
+                self.report_error(kind, line_no, exc, errors)
+                continue
+
+            key = importer.key(instance)
+            if key is not None:
+                if key in seen:
+                    errors += 1
+                    self.report_error(kind, line_no, ValidationError('Duplikat dalam chunk yang sama'), errors)
+                    continue
+                seen.add(key)
+            chunk.append((instance, fields))
+
+            if len(chunk) >= chunk_size:
+                written += self.write_chunk(importer, chunk, source, position, dry_run)
+                chunk = []
+                seen = set()
+                self.progress(kind, position, written, errors, started)
+
+        written += self.write_chunk(importer, chunk, source, position, dry_run)
+        self.progress(kind, position, written, errors, started)
+        label = 'valid (dry-run)' if dry_run else 'ditulis'
+        self.stdout.write(self.style.SUCCESS('%s selesai: %d baris %s, %d gagal' % (kind, written, label, errors)))
+
+    def write_chunk(self, importer, chunk, source, position, dry_run):
+        instances = [instance for instance, _ in chunk]
+        if dry_run:
+            importer.remember(instances, dry_run)
+            return len(instances)
+
+        model = importer.model
+        with transaction.atomic():
+            if instances:
+                if importer.unique_fields:
+                    # baris lain bisa membawa kolom berbeda; kolom yang tidak ada tidak ikut ditimpa
+                    groups = {}
+                    for instance, fields in chunk:
+                        groups.setdefault(fields, []).append(instance)
+                    for fields, group in groups.items():
+                        update_fields = [name for name in fields if name not in importer.unique_fields]
+                        if update_fields:
+                            # auto_now (last_modified, dipakai sebagai ETag) ikut diperbarui saat upsert
+                            update_fields += [
+                                field.name for field in model._meta.concrete_fields
+                                if getattr(field, 'auto_now', False) and field.name not in update_fields
+                            ]
+                        model.objects.bulk_create(
+                            group,
+                            update_conflicts=bool(update_fields),
+                            ignore_conflicts=not update_fields,
+                            unique_fields=importer.unique_fields if update_fields else None,
+                            update_fields=update_fields or None,
+                        )
+                else:
+                    model.objects.bulk_create(instances)
+            ImportCheckpoint.objects.update_or_create(source=source, defaults={'position': position})
+            if instances:
+                bulk_saved.send(sender=model, created=instances, updated=[])
+        importer.remember(instances, dry_run)
+        return len(instances)
+
+    def progress(self, kind, position, written, errors, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write('%s: %d baris dibaca, %d diproses, %d gagal (%.0f baris/detik)' % (
+            kind, position, written, errors, written / elapsed))
+
+    def report_error(self, kind, line_no, exc, errors):
+        if errors <= MAX_ERRORS_SHOWN:
+            detail = exc.message_dict if hasattr(exc, 'error_dict') else exc.messages
+            self.stderr.write('%s baris %d: %s' % (kind, line_no, detail))
+        elif errors == MAX_ERRORS_SHOWN + 1:
+            self.stderr.write('%s: error berikutnya tidak ditampilkan' % kind)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from uas_app import tasks
+from uas_app.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Bangun ulang index full-text TouristSpot (FTS5) dari tabel utama.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--enqueue', action='store_true', help='Jalankan lewat worker antrean (run_workers)')
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            self.stdout.write(self.style.WARNING('Database bukan SQLite, index FTS5 tidak dipakai.'))
+            return
+        if options['enqueue']:
+            task = tasks.enqueue('search.rebuild_index', {'chunk_size': options['chunk_size']})
+            self.stdout.write(self.style.SUCCESS('Masuk antrean sebagai Task %d.' % task.pk))
+            return
+        total = rebuild_index(chunk_size=options['chunk_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Selesai: %d tempat wisata diindex.' % total))
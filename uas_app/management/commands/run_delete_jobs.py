@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from uas_app import cascade
+from uas_app.models import DeleteJob
+
+
+class Command(BaseCommand):
+    help = ('Jalankan langsung DeleteJob yang belum selesai, tanpa menunggu worker antrean '
+            '(manage.py run_workers); chunk yang sudah terhapus tidak diulang.')
+
+    def handle(self, *args, **options):
+        pks = list(DeleteJob.objects.exclude(status='done').order_by('id').values_list('id', flat=True))
+        for pk in pks:
+            try:
+                cascade.run_job(pk)
+            except Exception:
+                # pesan error disimpan di DeleteJob.error dan ditampilkan di bawah
+                pass
+            job = DeleteJob.objects.get(pk=pk)
+            self.stdout.write('DeleteJob %d: %s %s' % (job.pk, job.status, job.error or job.deleted))
+        self.stdout.write(self.style.SUCCESS('Selesai: %d job diproses.' % len(pks)))
@@ -0,0 +1,63 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from uas_app import tasks
+
+PURGE_INTERVAL = 600
+
+
+def work():
+    tasks.Worker().run()
+
+
+class Command(BaseCommand):
+    help = ('Jalankan worker antrean tugas (uas_app.tasks). Proses utama menjaga jumlah proses worker, '
+            'menyalakan ulang yang mati, dan menghapus tugas selesai yang sudah lama.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=getattr(settings, 'TASK_WORKER_PROCESSES', 2))
+        parser.add_argument('--burst', action='store_true',
+                            help='Satu proses, berhenti begitu antrean kosong (untuk cron/deploy)')
+
+    def handle(self, *args, **options):
+        if options['burst']:
+            processed = tasks.Worker().run(burst=True)
+            self.stdout.write(self.style.SUCCESS('Selesai: %d tugas dijalankan.' % processed))
+            return
+
+        stopping = []
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: stopping.append(True))
+
+        self.stdout.write('%d proses worker berjalan, Ctrl-C untuk berhenti.' % options['processes'])
+        context = multiprocessing.get_context('fork')
+        workers = {}
+        purged_at = 0.0
+        while not stopping:
+            if time.monotonic() - purged_at > PURGE_INTERVAL:
+                purged_at = time.monotonic()
+                deleted = tasks.purge()
+                if deleted:
+                    self.stdout.write('%d tugas lama dihapus' % deleted)
+            for slot in range(options['processes']):
+                process = workers.get(slot)
+                if process is None or not process.is_alive():
+                    if process is not None:
+                        self.stderr.write('Worker %d (pid %d) berhenti dengan kode %s, dinyalakan ulang'
+                                          % (slot, process.pid, process.exitcode))
+                    # koneksi SQLite tidak boleh ikut diwariskan ke proses anak
+                    connections.close_all()
+                    workers[slot] = context.Process(target=work, name='task-worker-%d' % slot)
+                    workers[slot].start()
+            time.sleep(1)
+
+        self.stdout.write('Menunggu worker menyelesaikan tugas yang sedang berjalan...')
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.join()
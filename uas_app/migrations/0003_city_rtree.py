@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# disalin dari uas_app.spatial saat migrasi ini dibuat; migrasi tidak boleh ikut berubah bersama kode aplikasi
+RTREE_TABLE = 'uas_app_city_rtree'
+
+
+def create_rtree(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    City = apps.get_model('uas_app', 'City')
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS %s USING rtree(id, min_lat, max_lat, min_lon, max_lon)' % RTREE_TABLE
+    )
+    rows = City.objects.using(schema_editor.connection.alias).filter(
+        latitude__isnull=False, longitude__isnull=False,
+    ).values_list('id', 'latitude', 'longitude')
+    for pk, latitude, longitude in rows.iterator():
+        schema_editor.execute(
+            'INSERT OR REPLACE INTO %s (id, min_lat, max_lat, min_lon, max_lon) VALUES (%%s, %%s, %%s, %%s, %%s)' % RTREE_TABLE,
+            [pk, float(latitude), float(latitude), float(longitude), float(longitude)],
+        )
+
+
+def drop_rtree(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS %s' % RTREE_TABLE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uas_app', '0002_remove_touristspot_user_create_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_rtree, drop_rtree),
+    ]
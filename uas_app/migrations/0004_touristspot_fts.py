@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# disalin dari uas_app.search saat migrasi ini dibuat; migrasi tidak boleh ikut berubah bersama kode aplikasi
+FTS_TABLE = 'uas_app_touristspot_fts'
+FTS_COLUMNS = ('name', 'description', 'address', 'city', 'province')
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    TouristSpot = apps.get_model('uas_app', 'TouristSpot')
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5(%s, tokenize='unicode61 remove_diacritics 2')"
+        % (FTS_TABLE, ', '.join(FTS_COLUMNS))
+    )
+    rows = TouristSpot.objects.using(schema_editor.connection.alias).values_list(
+        'id', 'name', 'description', 'address', 'city__name', 'city__province__name',
+    )
+    for row in rows.iterator():
+        schema_editor.execute(
+            'INSERT INTO %s (rowid, %s) VALUES (%%s, %%s, %%s, %%s, %%s, %%s)' % (FTS_TABLE, ', '.join(FTS_COLUMNS)),
+            list(row),
+        )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS %s' % FTS_TABLE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uas_app', '0003_city_rtree'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
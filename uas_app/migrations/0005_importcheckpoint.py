@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uas_app', '0004_touristspot_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True)),
+                ('position', models.PositiveBigIntegerField(default=0)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
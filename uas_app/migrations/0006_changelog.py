@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 19:01
+
+from django.db import migrations, models
+
+
+def backfill_changelog(apps, schema_editor):
+    # data yang sudah ada dicatat sebagai upsert, jadi /api/sync tanpa ?since= berisi seluruh katalog;
+    # induk dicatat lebih dulu supaya FK di client selalu menunjuk baris yang sudah diterima
+    ChangeLog = apps.get_model('uas_app', 'ChangeLog')
+    alias = schema_editor.connection.alias
+    for model_name in ('Province', 'TourismType', 'City', 'TouristSpot'):
+        model = apps.get_model('uas_app', model_name)
+        batch = []
+        for pk in model.objects.using(alias).order_by('id').values_list('id', flat=True).iterator(chunk_size=2000):
+            batch.append(ChangeLog(model=model._meta.model_name, object_id=pk, action='upsert'))
+            if len(batch) >= 2000:
+                ChangeLog.objects.using(alias).bulk_create(batch)
+                batch = []
+        ChangeLog.objects.using(alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uas_app', '0005_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('upsert', 'upsert'), ('delete', 'delete')], max_length=10)),
+                ('changed_on', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('model', 'object_id')},
+            },
+        ),
+        migrations.RunPython(backfill_changelog, migrations.RunPython.noop),
+    ]
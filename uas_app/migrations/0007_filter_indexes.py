@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uas_app', '0006_changelog'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='touristspot',
+            index=models.Index(fields=['status', 'city'], name='spot_status_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='touristspot',
+            index=models.Index(fields=['tourism_type', 'status'], name='spot_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='touristspot',
+            index=models.Index(fields=['distance_from_city'], name='spot_distance_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='touristspot',
+            index=models.Index(fields=['last_modified', 'id'], name='spot_modified_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uas_app', '0007_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='touristspot',
+            index=models.Index(fields=['status', 'id'], name='spot_status_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='touristspot',
+            index=models.Index(fields=['city', 'name'], name='spot_city_name_idx'),
+        ),
+    ]
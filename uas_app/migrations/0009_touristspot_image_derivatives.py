@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uas_app', '0008_view_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='touristspot',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uas_app', '0009_touristspot_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeleteJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], default='pending', max_length=10)),
+                ('deleted', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('finished_on', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='pending_delete',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='province',
+            name='pending_delete',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='city',
+            index=models.Index(condition=models.Q(('pending_delete', False)), fields=['id'], name='city_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='province',
+            index=models.Index(condition=models.Q(('pending_delete', False)), fields=['id'], name='province_visible_idx'),
+        ),
+    ]
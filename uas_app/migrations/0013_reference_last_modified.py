@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 21:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uas_app', '0012_reference_version'),
+    ]
+
+    # Semua baris yang sudah ada mendapat waktu migrasi yang sama. Itu cukup: last_modified di
+    # ketiga tabel ini hanya dipakai sebagai versi per objek (ETag/If-Match di api.conditional),
+    # yang selalu dibandingkan dengan versi objek yang sama, dan setiap penulisan berikutnya
+    # (auto_now) memberi baris itu nilai baru. Tidak ada filter/ordering last_modified untuk data
+    # referensi, jadi nilai yang sama antarbaris tidak pernah dibandingkan.
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='last_modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='province',
+            name='last_modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='tourismtype',
+            name='last_modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
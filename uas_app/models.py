@@ -1,6 +1,11 @@
+from django.core.exceptions import FullResultSet
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
+from uas_app import refdata
+from uas_app.refdata import ReferenceForeignKey
+
 
 class User(AbstractUser):
     is_admin = models.BooleanField(default=False)
@@ -10,6 +15,48 @@ class User(AbstractUser):
         return self.get_full_name()
 
 
+# Manager default Province/City: baris yang sedang dihapus di latar belakang (uas_app.cascade)
+# sudah tidak terlihat; all_objects tetap melihat semuanya
+class VisibleManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(pending_delete=False)
+
+
+class VisibleCity(models.Expression):
+    """
+    Kondisi ``city_id NOT IN (kota yang sedang dihapus)``. Id kotanya dibaca dari snapshot
+    uas_app.refdata saat query dikompilasi, bukan saat QuerySet dibuat (mis. waktu import modul);
+    selama tidak ada job hapus kondisinya tidak ditulis sama sekali, jadi query-nya tidak berubah.
+    """
+
+    conditional = True
+    output_field = models.BooleanField()
+
+    def __init__(self, field='city_id'):
+        super().__init__()
+        self.column = models.F(field)
+
+    def get_source_expressions(self):
+        return [self.column]
+
+    def set_source_expressions(self, exprs):
+        self.column, = exprs
+
+    def as_sql(self, compiler, connection):
+        hidden = sorted(refdata.current().table(City).hidden)
+        if not hidden:
+            raise FullResultSet
+        sql, params = compiler.compile(self.column)
+        return '%s NOT IN (%s)' % (sql, ', '.join(['%s'] * len(hidden))), (*params, *hidden)
+
+
+# Manager default TouristSpot: tempat wisata di kota yang sedang dihapus (kota sendiri atau di bawah
+# provinsi yang dihapus, keduanya pending_delete) juga sudah tidak terlihat
+class VisibleSpotManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(VisibleCity())
+
+
 # Tambahan field profil provinsi
 class Province(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -17,6 +64,15 @@ class Province(models.Model):
     capital_city = models.CharField(max_length=100, blank=True, null=True)
     population = models.PositiveIntegerField(blank=True, null=True)
     area_km2 = models.FloatField(blank=True, null=True)
+    pending_delete = models.BooleanField(default=False, editable=False)
+    last_modified = models.DateTimeField(auto_now=True)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        # VisibleManager: WHERE NOT pending_delete ORDER BY id; partial index dengan kondisi yang sama
+        indexes = [models.Index(fields=['id'], condition=models.Q(pending_delete=False), name='province_visible_idx')]
 
     def __str__(self):
         return self.name
@@ -25,15 +81,23 @@ class Province(models.Model):
 # Tambahan field info kota/kabupaten
 class City(models.Model):
     name = models.CharField(max_length=100)
-    province = models.ForeignKey(Province, on_delete=models.CASCADE, related_name='cities')
+    province = ReferenceForeignKey(Province, on_delete=models.CASCADE, related_name='cities')
     is_capital = models.BooleanField(default=False)
     area_code = models.CharField(max_length=10, blank=True, null=True)
     latitude = models.DecimalField(max_digits=10, decimal_places=6, blank=True, null=True)
     longitude = models.DecimalField(max_digits=10, decimal_places=6, blank=True, null=True)
     population = models.PositiveIntegerField(blank=True, null=True)
+    pending_delete = models.BooleanField(default=False, editable=False)
+    last_modified = models.DateTimeField(auto_now=True)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
 
     class Meta:
+        # unique_together juga index (name, province_id) untuk lookup natural key; list/filter ?province=
+        # dilayani snapshot uas_app.refdata, jadi index (province, name) terpisah tidak dipakai query mana pun
         unique_together = ('name', 'province')
+        indexes = [models.Index(fields=['id'], condition=models.Q(pending_delete=False), name='city_visible_idx')]
 
     def __str__(self):
         return f'{self.name}, {self.province.name}'
@@ -44,6 +108,7 @@ class TourismType(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    last_modified = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -59,13 +124,128 @@ class TouristSpot(models.Model):
     name = models.CharField(max_length=150)
     description = models.TextField(blank=True, null=True)
     address = models.TextField()
-    city = models.ForeignKey(City, related_name='tourist_spots', on_delete=models.CASCADE)
-    tourism_type = models.ForeignKey(TourismType, on_delete=models.SET_NULL, null=True, blank=True)
+    city = ReferenceForeignKey(City, related_name='tourist_spots', on_delete=models.CASCADE)
+    tourism_type = ReferenceForeignKey(TourismType, on_delete=models.SET_NULL, null=True, blank=True)
     distance_from_city = models.DecimalField(max_digits=10, decimal_places=2, help_text="Dalam kilometer (km)")
     image = models.ImageField(upload_to='tourism_images/', blank=True, null=True)
+    # turunan WebP/JPEG per lebar, diisi di latar belakang oleh uas_app.images
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     status = models.CharField(max_length=20, choices=status_choices, default='Aktif')
     created_on = models.DateTimeField(auto_now_add=True)
     last_modified = models.DateTimeField(auto_now=True)
 
+    objects = VisibleSpotManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        # filter /api/tourist-spots (api.filters.TouristSpotFilter) dan natural key endpoint bulk;
+        # city dan tourism_type sendiri sudah punya index FK
+        indexes = [
+            models.Index(fields=['status', 'id'], name='spot_status_id_idx'),
+            models.Index(fields=['status', 'city'], name='spot_status_city_idx'),
+            models.Index(fields=['city', 'name'], name='spot_city_name_idx'),
+            models.Index(fields=['tourism_type', 'status'], name='spot_type_status_idx'),
+            models.Index(fields=['distance_from_city'], name='spot_distance_idx'),
+            models.Index(fields=['last_modified', 'id'], name='spot_modified_idx'),
+        ]
+
     def __str__(self):
         return f'{self.name} - {self.city.name}'
+
+
+# Posisi terakhir import_catalog per file, disimpan dalam transaksi yang sama dengan datanya
+class ImportCheckpoint(models.Model):
+    source = models.CharField(max_length=255, unique=True)
+    position = models.PositiveBigIntegerField(default=0)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.source}: {self.position}'
+
+
+# Log perubahan untuk /api/sync: satu baris per objek, baris lama dihapus saat objek berubah lagi
+# sehingga id (token sync) selalu menunjuk perubahan terakhir; action 'delete' menjadi tombstone
+class ChangeLog(models.Model):
+    action_choices = (
+        ('upsert', 'upsert'),
+        ('delete', 'delete')
+    )
+
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=action_choices)
+    changed_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('model', 'object_id')
+
+    def __str__(self):
+        return f'{self.id}: {self.action} {self.model}#{self.object_id}'
+
+
+# Hapus berantai Province/City yang besar, dijalankan di latar belakang oleh uas_app.cascade
+class DeleteJob(models.Model):
+    status_choices = (
+        ('pending', 'pending'),
+        ('running', 'running'),
+        ('done', 'done'),
+        ('failed', 'failed')
+    )
+
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    status = models.CharField(max_length=10, choices=status_choices, default='pending')
+    # jumlah baris yang sudah dihapus per model, diperbarui setiap chunk
+    deleted = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    finished_on = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f'{self.id}: {self.model}#{self.object_id} ({self.status})'
+
+
+# Antrean tugas latar belakang (uas_app.tasks), dijalankan oleh manage.py run_workers
+class Task(models.Model):
+    status_choices = (
+        ('queued', 'queued'),
+        ('running', 'running'),
+        ('done', 'done'),
+        ('failed', 'failed')
+    )
+
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=dict, blank=True)
+    # lebih besar diambil lebih dulu
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=status_choices, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # queued: boleh diambil mulai waktu ini (backoff retry); running: akhir visibility timeout
+    available_at = models.DateTimeField(default=timezone.now)
+    idempotency_key = models.CharField(max_length=200, unique=True, blank=True, null=True)
+    error = models.TextField(blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    started_on = models.DateTimeField(blank=True, null=True)
+    finished_on = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # worker: tugas terbuka menurut prioritas; tugas selesai tidak ikut di index ini
+            models.Index(fields=['-priority', 'id'], condition=models.Q(status__in=['queued', 'running']),
+                         name='task_ready_idx'),
+            # uas_app.tasks.purge()
+            models.Index(fields=['finished_on'], condition=models.Q(status='done'), name='task_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.id}: {self.name} ({self.status})'
+
+
+# Token versi snapshot data referensi (uas_app.refdata); satu baris, diganti setiap kali
+# Province, City atau TourismType berubah
+class ReferenceVersion(models.Model):
+    token = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.token)
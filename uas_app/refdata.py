@@ -0,0 +1,272 @@
+"""
+Snapshot data referensi (Province, City, TourismType) di memori setiap proses.
+
+Ketiga tabel ini kecil dan jarang berubah, tapi dibaca hampir di setiap request: validasi FK
+di serializer, ``__str__``, ?expand= dan list/detail-nya sendiri. Isinya dimuat sekali sebagai
+tuple per baris ke satu objek ``Snapshot`` yang tidak pernah diubah; kalau datanya berubah,
+snapshot baru dibuat lalu menggantikan yang lama dengan satu assignment.
+
+Setiap perubahan (post_save, post_delete, bulk_saved, bulk_deleted, lihat uas_app.signals)
+mengganti token di tabel ReferenceVersion. Token dicek sekali per request (RefDataMiddleware)
+dan, di luar request (worker antrean, command), paling lama setiap ``REFDATA_CHECK_INTERVAL``
+detik; snapshot hanya dimuat ulang kalau tokennya berbeda. Penulisan yang tidak mengirim sinyal
+(mis. ``bulk_create`` langsung) harus memanggil ``invalidate()``. Selama transaksi penulisnya
+belum commit, proses itu tetap memakai snapshot lama: baris yang belum ter-commit (dan mungkin
+di-rollback) tidak pernah masuk snapshot yang dipakai bersama.
+
+FK ke data referensi memakai ``ReferenceForeignKey``, jadi ``spot.city`` dan ``city.province``
+yang belum dimuat diambil dari snapshot, bukan query. Id yang tidak ada di snapshot tetap
+dicari ke database.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import MappingProxyType
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
+
+PRIMARY = 'default'
+LABELS = ('uas_app.province', 'uas_app.city', 'uas_app.tourismtype')
+
+_snapshot = None
+_lock = threading.Lock()
+# di luar request: waktu (monotonic) cek token terakhir; None berarti harus dicek lagi
+_checked_at = None
+_scope = ContextVar('refdata_scope', default=None)
+# token yang ditulis invalidate() di transaksi yang belum commit; per thread, sama seperti koneksi database
+_pending = threading.local()
+
+
+def is_reference(model):
+    return model._meta.label_lower in LABELS
+
+
+class Table:
+    """Semua baris satu model sebagai tuple (urutan ``concrete_fields``), per id dan terurut menurut id."""
+
+    __slots__ = ('model', 'attnames', 'names', 'positions', 'rows', 'hidden')
+
+    def __init__(self, model, rows, hidden):
+        fields = model._meta.concrete_fields
+        self.model = model
+        self.attnames = tuple(field.attname for field in fields)
+        # key baris QuerySet.values(): nama field, FK berisi id
+        self.names = tuple(field.name for field in fields)
+        self.positions = {name: index for index, name in enumerate(self.names)}
+        self.rows = MappingProxyType(rows)
+        # id yang tidak terlihat lewat manager default (pending_delete); masih bisa dirujuk FK
+        self.hidden = hidden
+
+    def __contains__(self, pk):
+        return pk in self.rows and pk not in self.hidden
+
+    def get(self, pk, include_hidden=False):
+        """Instance baru (boleh diubah pemanggilnya), atau None."""
+        row = self.rows.get(pk)
+        if row is None or (pk in self.hidden and not include_hidden):
+            return None
+        return self.model.from_db(PRIMARY, self.attnames, row)
+
+    def value(self, pk, name):
+        """Satu kolom (nama field) baris ``pk``, termasuk baris tersembunyi; KeyError kalau tidak ada."""
+        return self.rows[pk][self.positions[name]]
+
+    def row(self, pk):
+        """Baris seperti ``QuerySet.values()``, atau None."""
+        if pk not in self:
+            return None
+        return dict(zip(self.names, self.rows[pk]))
+
+    def values(self):
+        names = self.names
+        hidden = self.hidden
+        return [dict(zip(names, row)) for pk, row in self.rows.items() if pk not in hidden]
+
+    def in_bulk(self, pks):
+        objects = {}
+        for pk in pks:
+            instance = self.get(pk)
+            if instance is not None:
+                objects[pk] = instance
+        return objects
+
+
+class Snapshot:
+    __slots__ = ('token', 'tables')
+
+    def __init__(self, token, tables):
+        self.token = token
+        self.tables = tables
+
+    def table(self, model):
+        return self.tables[model._meta.label_lower]
+
+
+def read_token():
+    from uas_app.models import ReferenceVersion
+
+    return ReferenceVersion.objects.using(PRIMARY).filter(pk=1).values_list('token', flat=True).first() or 0
+
+
+def load_table(model):
+    attnames = [field.attname for field in model._meta.concrete_fields]
+    pk_index = attnames.index(model._meta.pk.attname)
+    rows = {row[pk_index]: row for row in model._base_manager.using(PRIMARY).order_by('pk').values_list(*attnames)}
+    visible = set(model._default_manager.using(PRIMARY).values_list('pk', flat=True))
+    return Table(model, rows, frozenset(pk for pk in rows if pk not in visible))
+
+
+def load():
+    from django.apps import apps
+
+    for _ in range(3):
+        token = read_token()
+        tables = {label: load_table(apps.get_model(label)) for label in LABELS}
+        # token yang sama sebelum dan sesudah: tidak ada perubahan yang ter-commit di antaranya
+        if read_token() == token:
+            break
+    return Snapshot(token, tables)
+
+
+def refresh():
+    """Muat ulang snapshot kalau token di database berbeda; kembalikan snapshot terbaru."""
+    global _snapshot
+    token = read_token()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.token == token:
+        return snapshot
+    if token == getattr(_pending, 'token', None):
+        # token dari transaksi thread ini sendiri yang belum commit: snapshot lama dipakai terus
+        return snapshot if snapshot is not None else load()
+    with _lock:
+        if _snapshot is None or _snapshot.token != token:
+            _snapshot = load()
+        return _snapshot
+
+
+class Scope:
+    __slots__ = ('checked',)
+
+    def __init__(self):
+        self.checked = False
+
+
+@contextmanager
+def request_scope():
+    """Token dicek lagi di akses pertama di dalam blok ini; scope yang sudah ada dipakai terus."""
+    if _scope.get() is not None:
+        yield
+        return
+    token = _scope.set(Scope())
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def current():
+    """Snapshot yang berlaku; tokennya dicek sekali per request, di luar request per interval."""
+    global _checked_at
+    scope = _scope.get()
+    if scope is not None:
+        if not scope.checked or _snapshot is None:
+            snapshot = refresh()
+            scope.checked = True
+            return snapshot
+        return _snapshot
+    now = time.monotonic()
+    if _snapshot is None or _checked_at is None or now - _checked_at >= getattr(settings, 'REFDATA_CHECK_INTERVAL', 1.0):
+        snapshot = refresh()
+        _checked_at = now
+        return snapshot
+    return _snapshot
+
+
+def expire():
+    """Token dicek lagi di akses berikutnya, juga di dalam request yang sudah mengeceknya."""
+    global _checked_at
+    _checked_at = None
+    scope = _scope.get()
+    if scope is not None:
+        scope.checked = False
+
+
+def invalidate():
+    """Ganti token (di transaksi yang sedang berjalan, kalau ada) supaya semua proses memuat ulang snapshot."""
+    from uas_app.models import ReferenceVersion
+
+    # token acak, bukan counter: versi dari transaksi yang di-rollback tidak akan terpakai lagi
+    token = random.getrandbits(62)
+    if not ReferenceVersion.objects.filter(pk=1).update(token=token):
+        ReferenceVersion.objects.get_or_create(pk=1, defaults={'token': token})
+    _pending.token = token
+
+    def committed():
+        if getattr(_pending, 'token', None) == token:
+            _pending.token = None
+        expire()
+
+    # di luar transaksi langsung dijalankan; kalau di-rollback tidak pernah, dan token di
+    # database kembali ke nilai lama yang tidak sama dengan _pending.token
+    transaction.on_commit(committed)
+
+
+def preload():
+    """Muat snapshot saat worker mulai (gunicorn.conf.py), supaya request pertama tidak menunggu."""
+    global _checked_at
+    refresh()
+    _checked_at = time.monotonic()
+
+
+def reset():
+    global _snapshot, _checked_at
+    _snapshot = None
+    _checked_at = None
+
+
+class SnapshotForwardDescriptor(ForwardManyToOneDescriptor):
+    # objek terkait yang belum dimuat (tanpa select_related) diambil dari snapshot, bukan query
+    def get_object(self, instance):
+        related = current().table(self.field.related_model).get(
+            getattr(instance, self.field.attname), include_hidden=True,
+        )
+        return related if related is not None else super().get_object(instance)
+
+
+class ReferenceForeignKey(models.ForeignKey):
+    """ForeignKey ke Province/City/TourismType yang objek terkaitnya dibaca dari snapshot."""
+
+    forward_related_accessor_class = SnapshotForwardDescriptor
+
+    def deconstruct(self):
+        # kolom dan constraint-nya sama dengan ForeignKey biasa, jadi migrasi tidak perlu tahu bedanya
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.ForeignKey', args, kwargs
+
+
+class RefDataMiddleware:
+    """Token snapshot dicek lagi di akses pertama setiap request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with request_scope():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with request_scope():
+            return await self.get_response(request)
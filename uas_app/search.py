@@ -0,0 +1,153 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from uas_app import refdata, tasks
+
+FTS_TABLE = 'uas_app_touristspot_fts'
+FTS_COLUMNS = ('name', 'description', 'address', 'city', 'province')
+# bobot bm25 per kolom, urutan sama dengan FTS_COLUMNS
+FTS_WEIGHTS = (10.0, 1.0, 2.0, 4.0, 2.0)
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def spot_rows(queryset):
+    return queryset.values_list(
+        'id', 'name', 'description', 'address', 'city__name', 'city__province__name',
+    )
+
+
+def index_spots(pks):
+    from uas_app.models import TouristSpot
+
+    if not fts_available():
+        return
+    pks = list(pks)
+    sql = 'INSERT OR REPLACE INTO %s (rowid, %s) VALUES (%%s, %%s, %%s, %%s, %%s, %%s)' % (
+        FTS_TABLE, ', '.join(FTS_COLUMNS))
+    # nama kota dan provinsi lewat JOIN di transaksi penulisnya, bukan dari snapshot uas_app.refdata:
+    # snapshot bisa tertinggal dari perubahan yang belum commit (atau dari proses lain)
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), 500):
+            rows = spot_rows(TouristSpot.objects.filter(pk__in=pks[start:start + 500]))
+            cursor.executemany(sql, rows)
+
+
+def unindex_spots(pks):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany('DELETE FROM %s WHERE rowid = %%s' % FTS_TABLE, [(pk,) for pk in pks])
+
+
+def rename_city(city_id, name):
+    from uas_app.models import TouristSpot
+
+    if not fts_available():
+        return
+    # hanya baris yang namanya berubah yang ditulis ulang
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'UPDATE %s SET city = %%s WHERE rowid IN (SELECT id FROM %s WHERE city_id = %%s) AND city IS NOT %%s'
+            % (FTS_TABLE, TouristSpot._meta.db_table),
+            [name, city_id, name],
+        )
+
+
+def rename_province(province_id, name):
+    from uas_app.models import City, TouristSpot
+
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'UPDATE %s SET province = %%s WHERE rowid IN ('
+            'SELECT s.id FROM %s s JOIN %s c ON c.id = s.city_id WHERE c.province_id = %%s'
+            ') AND province IS NOT %%s'
+            % (FTS_TABLE, TouristSpot._meta.db_table, City._meta.db_table),
+            [name, province_id, name],
+        )
+
+
+@tasks.task('search.rebuild_index', priority=-10, max_attempts=2, visibility_timeout=3600)
+def rebuild_index(chunk_size=2000, stdout=None):
+    from uas_app.models import TouristSpot
+
+    if not fts_available():
+        return 0
+    sql = 'INSERT INTO %s (rowid, %s) VALUES (%%s, %%s, %%s, %%s, %%s, %%s)' % (
+        FTS_TABLE, ', '.join(FTS_COLUMNS))
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('DELETE FROM %s' % FTS_TABLE)
+        batch = []
+        for row in spot_rows(TouristSpot.objects.order_by('id')).iterator(chunk_size=chunk_size):
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                cursor.executemany(sql, batch)
+                total += len(batch)
+                batch = []
+                if stdout:
+                    stdout.write('%d baris diindex' % total)
+        if batch:
+            cursor.executemany(sql, batch)
+            total += len(batch)
+        cursor.execute("INSERT INTO %s (%s) VALUES ('optimize')" % (FTS_TABLE, FTS_TABLE))
+    return total
+
+
+def match_expression(query):
+    # input user diubah jadi token prefix yang di-quote: "pant"* "kut"*
+    # supaya operator/tanda kutip FTS5 dari user tidak menyebabkan syntax error
+    tokens = TOKEN_RE.findall(query)
+    return ' '.join('"%s"*' % token for token in tokens)
+
+
+def search_spot_ids(query, limit, after=None):
+    """
+    Cari TouristSpot dan kembalikan [(id, rank)] terurut dari yang paling relevan.
+
+    ``after`` adalah posisi (rank, id) baris terakhir halaman sebelumnya.
+    """
+    from uas_app.models import City, TouristSpot
+
+    expression = match_expression(query)
+    if not expression:
+        return []
+
+    if not fts_available():
+        queryset = TouristSpot.objects.all()
+        for token in TOKEN_RE.findall(query):
+            queryset = queryset.filter(
+                Q(name__icontains=token) | Q(description__icontains=token) | Q(address__icontains=token)
+                | Q(city__name__icontains=token) | Q(city__province__name__icontains=token)
+            )
+        if after is not None:
+            queryset = queryset.filter(id__gt=after[1])
+        return [(pk, 0.0) for pk in queryset.order_by('id').values_list('id', flat=True)[:limit]]
+
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    sql = 'SELECT rowid, rank FROM (SELECT rowid, bm25(%s, %s) AS rank FROM %s WHERE %s MATCH %%s' % (
+        FTS_TABLE, weights, FTS_TABLE, FTS_TABLE)
+    params = [expression]
+    # index FTS masih berisi tempat wisata di kota yang sedang dihapus (uas_app.cascade) sampai
+    # chunk-nya terhapus; seperti TouristSpot.objects, baris itu tidak ikut hasil pencarian
+    hidden = sorted(refdata.current().table(City).hidden)
+    if hidden:
+        sql += ' AND rowid NOT IN (SELECT id FROM %s WHERE city_id IN (%s))' % (
+            TouristSpot._meta.db_table, ', '.join(['%s'] * len(hidden)))
+        params += hidden
+    sql += ')'
+    if after is not None:
+        sql += ' WHERE rank > %s OR (rank = %s AND rowid > %s)'
+        params += [after[0], after[0], after[1]]
+    sql += ' ORDER BY rank, rowid LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
@@ -0,0 +1,129 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from uas_app import changelog, images, refdata, search, spatial
+from uas_app.models import City, Province, TourismType, TouristSpot
+
+SYNC_MODELS = (Province, TourismType, City, TouristSpot)
+REFERENCE_MODELS = (Province, City, TourismType)
+
+# bulk_create/bulk_update tidak mengirim post_save; penulisan massal mengirim
+# sinyal ini (sender=model, created=[...], updated=[...]) di transaksi yang menulisnya,
+# sama seperti post_save.
+bulk_saved = Signal()
+# DELETE mentah (uas_app.cascade) juga tanpa post_delete: sender=model, pks=[...], dikirim di
+# transaksi yang menghapusnya; juga untuk parent yang baru disembunyikan (pending_delete) dan
+# belum benar-benar dihapus
+bulk_deleted = Signal()
+
+
+@receiver(post_save, sender=City)
+def index_city_location(sender, instance, created, **kwargs):
+    spatial.index_cities([(instance.pk, instance.latitude, instance.longitude)])
+    if not created:
+        search.rename_city(instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=City)
+def unindex_city_location(sender, instance, **kwargs):
+    spatial.unindex_cities([instance.pk])
+
+
+@receiver(bulk_saved, sender=City)
+def index_bulk_city_locations(sender, created, updated, **kwargs):
+    # item upsert bisa tanpa koordinat, jadi nilai terbaru dibaca ulang dari DB
+    pks = [city.pk for city in [*created, *updated]]
+    for start in range(0, len(pks), 500):
+        spatial.index_cities(
+            City.objects.filter(pk__in=pks[start:start + 500]).values_list('id', 'latitude', 'longitude')
+        )
+
+
+@receiver(bulk_deleted, sender=City)
+def unindex_bulk_city_locations(sender, pks, **kwargs):
+    spatial.unindex_cities(pks)
+
+
+@receiver(post_save, sender=Province)
+def reindex_province_name(sender, instance, created, **kwargs):
+    if not created:
+        search.rename_province(instance.pk, instance.name)
+
+
+@receiver(post_save, sender=TouristSpot)
+def index_spot_text(sender, instance, **kwargs):
+    search.index_spots([instance.pk])
+
+
+@receiver(post_delete, sender=TouristSpot)
+def unindex_spot_text(sender, instance, **kwargs):
+    search.unindex_spots([instance.pk])
+
+
+@receiver(bulk_saved, sender=TouristSpot)
+def index_bulk_spot_text(sender, created, updated, **kwargs):
+    search.index_spots(spot.pk for spot in [*created, *updated])
+
+
+@receiver(bulk_deleted, sender=TouristSpot)
+def unindex_bulk_spot_text(sender, pks, **kwargs):
+    search.unindex_spots(pks)
+
+
+@receiver(post_save, sender=TouristSpot)
+def schedule_image_derivatives(sender, instance, **kwargs):
+    if images.is_stale(instance):
+        images.schedule([instance.pk])
+
+
+@receiver(bulk_saved, sender=TouristSpot)
+def schedule_bulk_image_derivatives(sender, created, updated, **kwargs):
+    images.schedule(spot.pk for spot in [*created, *updated] if images.is_stale(spot))
+
+
+def log_saved(sender, instance, **kwargs):
+    changelog.record_changes(sender, [instance.pk], changelog.UPSERT)
+
+
+def log_deleted(sender, instance, **kwargs):
+    # delete berantai (Province -> City -> TouristSpot) juga mengirim post_delete per objek
+    changelog.record_changes(sender, [instance.pk], changelog.DELETE)
+
+
+def log_bulk_saved(sender, created, updated, **kwargs):
+    changelog.record_changes(sender, [obj.pk for obj in [*created, *updated]], changelog.UPSERT)
+
+
+def log_bulk_deleted(sender, pks, **kwargs):
+    changelog.record_changes(sender, pks, changelog.DELETE)
+
+
+for model in SYNC_MODELS:
+    post_save.connect(log_saved, sender=model, dispatch_uid='changelog-save-%s' % model._meta.label_lower)
+    post_delete.connect(log_deleted, sender=model, dispatch_uid='changelog-delete-%s' % model._meta.label_lower)
+    bulk_saved.connect(log_bulk_saved, sender=model, dispatch_uid='changelog-bulk-%s' % model._meta.label_lower)
+    bulk_deleted.connect(log_bulk_deleted, sender=model,
+                         dispatch_uid='changelog-bulk-delete-%s' % model._meta.label_lower)
+
+
+def invalidate_reference_data(sender, **kwargs):
+    # post_save/post_delete: di dalam transaksi penulisnya, jadi token ikut di-rollback kalau gagal
+    refdata.invalidate()
+
+
+for model in REFERENCE_MODELS:
+    label = model._meta.label_lower
+    post_save.connect(invalidate_reference_data, sender=model, dispatch_uid='refdata-save-%s' % label)
+    post_delete.connect(invalidate_reference_data, sender=model, dispatch_uid='refdata-delete-%s' % label)
+    bulk_saved.connect(invalidate_reference_data, sender=model, dispatch_uid='refdata-bulk-%s' % label)
+    bulk_deleted.connect(invalidate_reference_data, sender=model, dispatch_uid='refdata-bulk-delete-%s' % label)
+
+
+@receiver(pre_delete, sender=TourismType)
+def log_spots_losing_type(sender, instance, **kwargs):
+    # SET_NULL ditulis dengan UPDATE massal tanpa post_save, jadi tempat wisatanya dicatat di sini
+    changelog.record_changes(
+        TouristSpot,
+        TouristSpot.objects.filter(tourism_type=instance).values_list('id', flat=True),
+        changelog.UPSERT,
+    )
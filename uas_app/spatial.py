@@ -0,0 +1,110 @@
+import math
+
+from django.db import connection
+from django.db.models import Q
+
+RTREE_TABLE = 'uas_app_city_rtree'
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def rtree_available():
+    return connection.vendor == 'sqlite'
+
+
+def index_cities(rows):
+    # rows: iterable (id, latitude, longitude); kota tanpa koordinat dikeluarkan dari index
+    if not rtree_available():
+        return
+    points = []
+    missing = []
+    for pk, latitude, longitude in rows:
+        if latitude is None or longitude is None:
+            missing.append((pk,))
+        else:
+            latitude, longitude = float(latitude), float(longitude)
+            points.append((pk, latitude, latitude, longitude, longitude))
+    with connection.cursor() as cursor:
+        if points:
+            cursor.executemany(
+                'INSERT OR REPLACE INTO %s (id, min_lat, max_lat, min_lon, max_lon) VALUES (%%s, %%s, %%s, %%s, %%s)' % RTREE_TABLE,
+                points,
+            )
+        if missing:
+            cursor.executemany('DELETE FROM %s WHERE id = %%s' % RTREE_TABLE, missing)
+
+
+def unindex_cities(pks):
+    if not rtree_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany('DELETE FROM %s WHERE id = %%s' % RTREE_TABLE, [(pk,) for pk in pks])
+
+
+def bounding_boxes(latitude, longitude, radius_km):
+    """
+    Daftar (min_lat, max_lat, min_lon, max_lon) yang mencakup radius.
+
+    Kotak yang melewati ±180° dipecah dua (mis. 179..180 dan -180..-179); kalau radius
+    mencakup kutub, semua longitude ikut.
+    """
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+    cos_lat = math.cos(math.radians(latitude))
+    if min_lat <= -90.0 or max_lat >= 90.0 or cos_lat < 1e-6:
+        return [(min_lat, max_lat, -180.0, 180.0)]
+    dlon = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    if dlon >= 180.0:
+        return [(min_lat, max_lat, -180.0, 180.0)]
+    min_lon, max_lon = longitude - dlon, longitude + dlon
+    if min_lon < -180.0:
+        return [(min_lat, max_lat, -180.0, max_lon), (min_lat, max_lat, min_lon + 360.0, 180.0)]
+    if max_lon > 180.0:
+        return [(min_lat, max_lat, min_lon, 180.0), (min_lat, max_lat, -180.0, max_lon - 360.0)]
+    return [(min_lat, max_lat, min_lon, max_lon)]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cities_within(latitude, longitude, radius_km):
+    """
+    Kembalikan {city_id: jarak_km} untuk kota dalam radius, terurut dari yang terdekat.
+
+    Kandidat diambil dari R*Tree (atau range scan latitude/longitude di luar SQLite)
+    memakai bounding box (dua kotak kalau melewati ±180°), lalu hanya kandidat itu yang dihitung haversine-nya.
+    """
+    from uas_app.models import City
+
+    boxes = bounding_boxes(latitude, longitude, radius_km)
+    if rtree_available():
+        # kota yang sedang dihapus (uas_app.cascade) sudah dikeluarkan dari R*Tree lewat bulk_deleted;
+        # pending_delete tetap dicek supaya hasilnya sama dengan City.objects
+        sql = (
+            'SELECT c.id, c.latitude, c.longitude FROM %s r JOIN %s c ON c.id = r.id'
+            ' WHERE NOT c.pending_delete AND (%s)'
+        ) % (
+            RTREE_TABLE, City._meta.db_table,
+            ' OR '.join(['(r.max_lat >= %s AND r.min_lat <= %s AND r.max_lon >= %s AND r.min_lon <= %s)'] * len(boxes)),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [value for box in boxes for value in box])
+            candidates = cursor.fetchall()
+    else:
+        condition = Q()
+        for min_lat, max_lat, min_lon, max_lon in boxes:
+            condition |= Q(latitude__range=(min_lat, max_lat), longitude__range=(min_lon, max_lon))
+        candidates = City.objects.filter(condition).values_list('id', 'latitude', 'longitude')
+
+    distances = []
+    for pk, city_lat, city_lon in candidates:
+        distance = haversine_km(latitude, longitude, float(city_lat), float(city_lon))
+        if distance <= radius_km:
+            distances.append((distance, pk))
+    distances.sort()
+    return {pk: distance for distance, pk in distances}
@@ -0,0 +1,228 @@
+"""
+Antrean tugas latar belakang yang disimpan di database (tabel Task), tanpa broker.
+
+Tugas didaftarkan dengan dekorator ``@task(nama)`` dan dimasukkan ke antrean dengan
+``enqueue(nama, {argumen})``, biasanya di transaksi yang sama dengan datanya, jadi tugas
+hanya terlihat oleh worker kalau datanya ikut ter-commit. ``manage.py run_workers``
+menjalankan beberapa proses worker yang mengambil tugas berdasarkan prioritas.
+
+- Tugas yang gagal diulang dengan backoff eksponensial sampai ``max_attempts``.
+- Tugas yang sedang berjalan "dipinjam" selama ``visibility_timeout`` detik; kalau worker-nya
+  mati, setelah itu tugasnya bisa diambil worker lain (kalau belum ``max_attempts``; kalau
+  sudah, tugasnya dicatat gagal). Karena itu handler harus idempoten.
+- ``key`` (idempotency key) membuat enqueue berulang untuk pekerjaan yang sama menghasilkan
+  satu tugas saja.
+- Setiap tugas yang selesai dijalankan mengirim sinyal ``task_finished`` (dipakai api.metrics).
+"""
+import logging
+import random
+import signal
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+# RUNNING ikut: setelah visibility timeout habis tugasnya boleh diambil lagi
+OPEN = (QUEUED, RUNNING)
+
+TaskSpec = namedtuple('TaskSpec', 'func priority max_attempts visibility_timeout')
+
+registry = {}
+
+# sender=Task, task=Task, result='done'|'retry'|'failed', wait=detik di antrean, duration=detik eksekusi
+task_finished = Signal()
+
+
+def task(name, priority=0, max_attempts=5, visibility_timeout=300):
+    """Daftarkan fungsi sebagai handler tugas ``name``; argumennya dari ``Task.args`` (kwargs)."""
+    def decorator(func):
+        registry[name] = TaskSpec(func, priority, max_attempts, visibility_timeout)
+        return func
+    return decorator
+
+
+def new_task(name, args, priority, delay):
+    from uas_app.models import Task
+
+    spec = registry[name]
+    return Task(
+        name=name, args=args or {}, priority=spec.priority if priority is None else priority,
+        max_attempts=spec.max_attempts, available_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def enqueue(name, args=None, priority=None, key=None, delay=0):
+    """
+    Masukkan tugas ``name`` ke antrean dan kembalikan Task-nya.
+
+    Dengan ``key``, tugas yang sudah ada dengan key itu dikembalikan apa adanya; kalau
+    tugas itu sudah gagal permanen, tugasnya diantrekan ulang.
+    """
+    from uas_app.models import Task
+
+    task = new_task(name, args, priority, delay)
+    if key is None:
+        task.save()
+        return task
+    existing = Task.objects.filter(idempotency_key=key).first()
+    if existing is None:
+        task.idempotency_key = key
+        try:
+            with transaction.atomic():
+                task.save()
+            return task
+        except IntegrityError:
+            existing = Task.objects.get(idempotency_key=key)
+    if existing.status == FAILED:
+        Task.objects.filter(pk=existing.pk, status=FAILED).update(
+            status=QUEUED, attempts=0, error='', available_at=task.available_at, finished_on=None,
+        )
+        existing.refresh_from_db()
+    return existing
+
+
+def enqueue_many(name, args_list, priority=None):
+    """Banyak tugas ``name`` sekaligus (bulk_create), tanpa idempotency key."""
+    from uas_app.models import Task
+
+    return Task.objects.bulk_create(
+        [new_task(name, args, priority, 0) for args in args_list], batch_size=500,
+    )
+
+
+def ready(now):
+    from uas_app.models import Task
+
+    return Task.objects.filter(status__in=OPEN, available_at__lte=now).order_by('-priority', 'id')
+
+
+def claim():
+    """Ambil satu tugas yang siap (prioritas tertinggi, lalu yang paling lama) atau None."""
+    from uas_app.models import Task
+
+    now = timezone.now()
+    # cek baca dulu, supaya worker yang menganggur tidak mengambil lock tulis setiap poll
+    if not ready(now).exists():
+        return None
+    task = ready(now).first()
+    # tugas RUNNING yang visibility timeout-nya habis di percobaan terakhir (worker-nya mati atau
+    # macet) tidak dijalankan lagi: dicatat gagal, lalu tugas berikutnya yang diambil
+    while task is not None and task.status == RUNNING and task.attempts >= task.max_attempts:
+        abandon(task, now)
+        task = ready(now).first()
+    if task is None:
+        return None
+    spec = registry.get(task.name)
+    timeout = spec.visibility_timeout if spec else 300
+    # yang membuat claim aman adalah UPDATE bersyarat ini, bukan lock baris (SQLite tidak punya
+    # SELECT ... FOR UPDATE): kalau worker lain lebih dulu mengambilnya, tidak ada baris yang berubah
+    claimed = Task.objects.filter(pk=task.pk, status=task.status, attempts=task.attempts).update(
+        status=RUNNING, attempts=F('attempts') + 1, started_on=now,
+        available_at=now + timedelta(seconds=timeout),
+    )
+    if not claimed:
+        return None
+    task.ready_since = task.available_at
+    task.status, task.attempts, task.started_on = RUNNING, task.attempts + 1, now
+    return task
+
+
+def abandon(task, now):
+    from uas_app.models import Task
+
+    logger.error('Task %s (%s) gagal: visibility timeout habis di percobaan ke-%d', task.pk, task.name, task.attempts)
+    Task.objects.filter(pk=task.pk, status=RUNNING, attempts=task.attempts).update(
+        status=FAILED, error='Visibility timeout habis di percobaan ke-%d' % task.attempts, finished_on=now,
+    )
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'TASK_RETRY_BACKOFF', 5)
+    delay = min(base * 2 ** (attempts - 1), getattr(settings, 'TASK_RETRY_BACKOFF_MAX', 600))
+    return delay * (0.5 + random.random())
+
+
+def execute(task):
+    """Jalankan tugas yang sudah di-claim dan catat hasilnya; kembalikan 'done', 'retry' atau 'failed'."""
+    from uas_app.models import Task
+
+    started = time.perf_counter()
+    spec = registry.get(task.name)
+    result, error = 'done', ''
+    try:
+        if spec is None:
+            raise LookupError('Tugas %r tidak terdaftar' % task.name)
+        spec.func(**task.args)
+    except Exception as exc:
+        logger.exception('Task %s (%s) gagal, percobaan ke-%d', task.pk, task.name, task.attempts)
+        error = '%s: %s' % (type(exc).__name__, exc)
+        result = 'retry' if spec is not None and task.attempts < task.max_attempts else 'failed'
+    duration = time.perf_counter() - started
+
+    now = timezone.now()
+    if result == 'done':
+        changes = {'status': DONE, 'error': '', 'finished_on': now}
+    elif result == 'retry':
+        changes = {'status': QUEUED, 'error': error,
+                   'available_at': now + timedelta(seconds=retry_delay(task.attempts))}
+    else:
+        changes = {'status': FAILED, 'error': error, 'finished_on': now}
+    # hanya kalau tugasnya masih milik worker ini (belum diambil ulang setelah visibility timeout)
+    Task.objects.filter(pk=task.pk, status=RUNNING, attempts=task.attempts).update(**changes)
+    task_finished.send(
+        sender=Task, task=task, result=result,
+        wait=max((task.started_on - task.ready_since).total_seconds(), 0.0), duration=duration,
+    )
+    return result
+
+
+def purge(days=None):
+    """Hapus tugas yang selesai lebih dari ``TASK_RETENTION_DAYS`` hari lalu; tugas gagal disimpan."""
+    from uas_app.models import Task
+
+    days = getattr(settings, 'TASK_RETENTION_DAYS', 7) if days is None else days
+    deleted, _ = Task.objects.filter(status=DONE, finished_on__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
+
+
+class Worker:
+    """Satu proses worker: ambil tugas, jalankan, ulangi; SIGTERM/SIGINT berhenti setelah tugas berjalan selesai."""
+
+    def __init__(self, poll_interval=None):
+        self.poll_interval = poll_interval or getattr(settings, 'TASK_POLL_INTERVAL', 1.0)
+        self.stopping = False
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def run(self, burst=False):
+        """Jalankan sampai dihentikan; dengan ``burst`` berhenti begitu antrean kosong. Kembalikan jumlah tugas."""
+        previous = {signum: signal.signal(signum, self.stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        processed = 0
+        try:
+            while not self.stopping:
+                close_old_connections()
+                task = claim()
+                if task is None:
+                    if burst:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                execute(task)
+                processed += 1
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+            close_old_connections()
+        return processed
@@ -1,3 +1,1890 @@
-from django.test import TestCase
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from urllib.parse import quote, urlsplit
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.http import HttpResponse, QueryDict
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api import async_views, metrics, replicas
+from benchmarks import api as benchmark
+from uas_app import cascade, changelog, images, refdata, search, spatial, tasks
+from api.cache import get_cache
+from api.pagination import TouristSpotPagination
+from api.profiling import ProfilingMiddleware
+from api.writes import DatabaseBusy, run_write
+from uas_app.management.commands import import_catalog
+from uas_app.signals import bulk_deleted, bulk_saved
+from uas_app.models import (ChangeLog, City, DeleteJob, ImportCheckpoint, Province, ReferenceVersion, Task,
+                            TourismType, TouristSpot)
+
+# metrik api.metrics ditulis ke direktori sementara per run, tidak tercampur dengan server dev
+# atau run sebelumnya
+_metrics = {}
+
+
+def setUpModule():
+    _metrics['dir'] = tempfile.TemporaryDirectory()
+    _metrics['settings'] = override_settings(API_METRICS_DIR=_metrics['dir'].name)
+    _metrics['settings'].enable()
+
+
+def tearDownModule():
+    _metrics['settings'].disable()
+    _metrics['dir'].cleanup()
+
+
+def query_plan(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[3] for row in cursor.fetchall()]
+
+
+def full_scans(sql, params=()):
+    # 'SCAN tabel' tanpa USING INDEX berarti seluruh tabel dibaca; pengecualian: halaman pertama list
+    # tanpa WHERE yang berhenti setelah LIMIT baris dalam urutan primary key
+    if ' WHERE ' not in sql and ' LIMIT ' in sql:
+        return []
+    return [
+        detail for detail in query_plan(sql, params)
+        if detail.startswith('SCAN ') and ' USING ' not in detail and ' VIRTUAL TABLE INDEX ' not in detail
+    ]
+
+
+def seed_catalog(provinces=10, cities=200, spots=20000):
+    rng = random.Random(13)
+    province_rows = Province.objects.bulk_create([Province(name='Provinsi %d' % i) for i in range(provinces)])
+    city_rows = City.objects.bulk_create([
+        City(
+            name='Kota %d' % i, province=province_rows[i % provinces], is_capital=i < provinces,
+            latitude=rng.uniform(-10, 5), longitude=rng.uniform(95, 140),
+        )
+        for i in range(cities)
+    ])
+    types = TourismType.objects.bulk_create([TourismType(name='Jenis %d' % i) for i in range(8)])
+    TouristSpot.objects.bulk_create([
+        TouristSpot(
+            name='Wisata %d' % i, address='Jl. %d' % i, city=rng.choice(city_rows), tourism_type=rng.choice(types),
+            distance_from_city=round(rng.uniform(0, 100), 2), status=rng.choice(['Aktif', 'Aktif', 'Tidak Aktif']),
+        )
+        for i in range(spots)
+    ], batch_size=2000)
+    # bulk_create tanpa sinyal
+    refdata.invalidate()
+    return province_rows, city_rows, types
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN khusus SQLite')
+class QueryPlanTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # on_commit dijalankan: token snapshot baru baru berlaku setelah transaksi penulisnya commit
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.provinces, cls.cities, cls.types = seed_catalog()
+
+    def setUp(self):
+        get_cache().clear()
+        # snapshot dimuat di sini: memuatnya memang membaca seluruh tabel referensi
+        refdata.refresh()
+
+    def assertQueriesIndexed(self, queries, label, sorted_by_index=False):
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if sql.startswith(('SELECT', 'UPDATE', 'DELETE')):
+                self.assertEqual(full_scans(sql), [], '%s\n%s' % (label, sql))
+                if sorted_by_index:
+                    # tanpa ini setiap halaman mengurutkan seluruh hasil filter sebelum LIMIT
+                    self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', query_plan(sql), '%s\n%s' % (label, sql))
+
+    def assertNoFullScan(self, url, pages=2, sorted_by_index=False):
+        # halaman pertama dan halaman lanjutan (cursor) diperiksa, karena filter keyset-nya berbeda
+        for _ in range(pages):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertQueriesIndexed(queries, url, sorted_by_index)
+            url = response.json().get('next') if response['Content-Type'].startswith('application/json') else None
+            if not url:
+                break
+
+
+class FilterQueryPlanTests(QueryPlanTestCase):
+
+    def test_tourist_spot_filters(self):
+        city = self.cities[0].pk
+        province = self.provinces[0].pk
+        tourism_type = self.types[0].pk
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        until = (timezone.now() + timedelta(hours=1)).isoformat()
+        for query in [
+            'status=Aktif',
+            'city=%d' % city,
+            'city__province=%d' % province,
+            'tourism_type=%d' % tourism_type,
+            'status=Aktif&city=%d' % city,
+            'status=Aktif&tourism_type=%d' % tourism_type,
+            'distance_from_city_min=1&distance_from_city_max=5',
+            'distance_from_city_max=5',
+            'last_modified_after=%s' % since,
+            'last_modified_after=%s&last_modified_before=%s' % (since, until),
+            'last_modified_after=%s&status=Aktif' % since,
+            'last_modified_after=%s&ordering=-last_modified' % since,
+            'distance_from_city_max=5&ordering=-distance_from_city',
+            'status=Aktif&city__province=%d&distance_from_city_max=20' % province,
+            'status=Aktif&tourism_type=%d&city__province=%d' % (tourism_type, province),
+        ]:
+            with self.subTest(query=query):
+                self.assertNoFullScan('/api/tourist-spots?page_size=20&' + query.replace('+', '%2B'))
+
+    def test_city_filters(self):
+        for query in [
+            'province=%d' % self.provinces[0].pk,
+            'name=Kota 5',
+        ]:
+            with self.subTest(query=query):
+                self.assertNoFullScan('/api/cities?page_size=20&' + query)
+
+    def test_city_province_name_lookups(self):
+        # natural key (name, province) endpoint bulk dan import_catalog: index unique_together sudah mencakupnya
+        for queryset in [
+            City.objects.filter(province_id=self.provinces[0].pk, name='Kota 0'),
+            City.objects.filter(province_id__in=[p.pk for p in self.provinces[:3]], name__in=['Kota 0', 'Kota 1']),
+        ]:
+            sql, params = queryset.query.sql_with_params()
+            with self.subTest(sql=sql):
+                plan = query_plan(sql, params)
+                self.assertEqual(full_scans(sql, params), [], plan)
+                self.assertTrue([detail for detail in plan if '(name=? AND province_id=?)' in detail], plan)
+
+
+class ViewQueryPlanTests(QueryPlanTestCase):
+    """Query setiap view di api/views.py; export streaming memang membaca seluruh tabel."""
+
+    def test_list_views(self):
+        for url in [
+            '/api/tourist-spots',
+            '/api/tourist-spots?ordering=-id',
+            '/api/tourist-spots?ordering=last_modified',
+            '/api/tourist-spots?ordering=-last_modified',
+            '/api/tourist-spots?ordering=distance_from_city',
+            '/api/tourist-spots?expand=city.province,tourism_type',
+            '/api/tourist-spots?fields=id,name',
+            '/api/provinces',
+            '/api/cities',
+            '/api/cities?expand=province',
+            '/api/tourism-types',
+            '/api/sync',
+        ]:
+            with self.subTest(url=url):
+                self.assertNoFullScan(url)
+
+    def test_list_pages_read_in_index_order(self):
+        since = (timezone.now() - timedelta(hours=1)).isoformat().replace('+', '%2B')
+        for query in [
+            '',
+            'ordering=-last_modified',
+            'status=Aktif',
+            'city=%d' % self.cities[0].pk,
+            'tourism_type=%d' % self.types[0].pk,
+            'status=Aktif&city=%d' % self.cities[0].pk,
+            'status=Aktif&tourism_type=%d' % self.types[0].pk,
+            'distance_from_city_max=5',
+            'last_modified_after=%s' % since,
+        ]:
+            with self.subTest(query=query):
+                self.assertNoFullScan('/api/tourist-spots?page_size=20&' + query, sorted_by_index=True)
+
+    def test_detail_views(self):
+        spot = TouristSpot.objects.order_by('id').last()
+        for url in [
+            '/api/tourist-spots/%d' % spot.pk,
+            '/api/tourist-spots/%d?expand=city.province' % spot.pk,
+            '/api/provinces/%d' % self.provinces[0].pk,
+            '/api/cities/%d' % self.cities[0].pk,
+            '/api/tourism-types/%d' % self.types[0].pk,
+            '/api/tourist-spots?ids=%d,1,2&expand=city.province,tourism_type' % spot.pk,
+            '/api/cities?ids=%d,%d&expand=province' % (self.cities[0].pk, self.cities[1].pk),
+        ]:
+            with self.subTest(url=url):
+                self.assertNoFullScan(url, pages=1)
+
+    def test_search_and_nearby(self):
+        city = self.cities[0]
+        for url in [
+            '/api/tourist-spots/search?q=wisata 12',
+            '/api/tourist-spots/nearby?lat=%s&lon=%s&radius=50' % (city.latitude, city.longitude),
+            '/api/sync?since=%d' % (TouristSpot.objects.count() // 2),
+        ]:
+            with self.subTest(url=url):
+                self.assertNoFullScan(url)
+
+    def test_bulk_upsert(self):
+        city = self.cities[1]
+        spots = [
+            {'name': 'Wisata %d' % i, 'address': 'Jl. Baru', 'city': city.pk, 'distance_from_city': '2.00'}
+            for i in range(50)
+        ]
+        cities = [{'name': 'Kota %d' % i, 'province': self.provinces[i % 10].pk} for i in range(20)]
+        for url, items in [('/api/tourist-spots/bulk?upsert=1', spots), ('/api/cities/bulk?upsert=1', cities)]:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.post(url, items, content_type='application/json')
+                self.assertEqual(response.status_code, 201, response.content)
+                self.assertQueriesIndexed(queries, url)
+
+    @override_settings(CASCADE_DELETE_INLINE_LIMIT=100000)
+    def test_cascade_delete(self):
+        for url in ['/api/cities/%d' % self.cities[2].pk, '/api/provinces/%d' % self.provinces[3].pk]:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.delete(url)
+                self.assertEqual(response.status_code, 200, response.content)
+                self.assertQueriesIndexed(queries, url)
+
+    def test_background_cascade_delete(self):
+        url = '/api/provinces/%d' % self.provinces[4].pk
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertQueriesIndexed(queries, url)
+        with CaptureQueriesContext(connection) as queries:
+            cascade.run(DeleteJob.objects.get(pk=response.json()['data']['job_id']))
+        self.assertQueriesIndexed(queries, 'DeleteJob')
+
+
+class AsyncViewTests(QueryPlanTestCase):
+    """api.async_views harus menghasilkan body yang sama dengan APIView-nya, dengan query yang sama."""
+
+    def get_async(self, view_class, url, **kwargs):
+        request = AsyncRequestFactory().get(url, HTTP_ACCEPT='application/json')
+        return async_to_sync(view_class.as_view())(request, **kwargs)
+
+    def test_same_response_as_sync_views(self):
+        spot = TouristSpot.objects.order_by('id').last()
+        city = self.cities[0]
+        for view_class, url, kwargs in [
+            (async_views.TouristSpotList, '/api/tourist-spots?page_size=20&status=Aktif&city=%d' % city.pk, {}),
+            (async_views.TouristSpotList, '/api/tourist-spots?expand=city.province&fields=id,name,city.name', {}),
+            (async_views.TouristSpotList, '/api/tourist-spots?ids=%d,1,2' % spot.pk, {}),
+            (async_views.TouristSpotList, '/api/tourist-spots?ordering=tidak-ada', {}),
+            (async_views.TouristSpotDetail, '/api/tourist-spots/%d?expand=tourism_type' % spot.pk, {'id': spot.pk}),
+            (async_views.TouristSpotDetail, '/api/tourist-spots/0', {'id': 0}),
+            (async_views.ProvinceList, '/api/provinces', {}),
+            (async_views.ProvinceDetail, '/api/provinces/%d' % self.provinces[0].pk, {'id': self.provinces[0].pk}),
+            (async_views.CityList, '/api/cities?province=%d&expand=province' % self.provinces[0].pk, {}),
+            (async_views.CityDetail, '/api/cities/%d' % city.pk, {'id': city.pk}),
+            (async_views.TourismTypeList, '/api/tourism-types', {}),
+            (async_views.TourismTypeDetail, '/api/tourism-types/%d' % self.types[0].pk, {'id': self.types[0].pk}),
+        ]:
+            with self.subTest(url=url):
+                expected = self.client.get(url, HTTP_ACCEPT='application/json')
+                get_cache().clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.get_async(view_class, url, **kwargs)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.content, expected.content)
+                self.assertQueriesIndexed(queries, url)
+
+    def test_database_cache_backend(self):
+        caches = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'api': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_api_cache'},
+        }
+        with override_settings(CACHES=caches):
+            call_command('createcachetable', verbosity=0)
+            url = '/api/tourism-types/%d' % self.types[0].pk
+            first = self.get_async(async_views.TourismTypeDetail, url, id=self.types[0].pk)
+            second = self.get_async(async_views.TourismTypeDetail, url, id=self.types[0].pk)
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(first.content, second.content)
+
+    def test_reference_row_missing_from_snapshot(self):
+        # dibuat tanpa sinyal: belum ada di snapshot, jadi ?expand=city dibaca dari database
+        city = City.objects.bulk_create([City(name='Kota Baru', province=self.provinces[0])])[0]
+        spot = TouristSpot.objects.create(name='Baru', address='-', city=city, distance_from_city=1)
+        url = '/api/tourist-spots/%d?expand=city' % spot.pk
+        response = self.get_async(async_views.TouristSpotDetail, url, id=spot.pk)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(json.loads(response.content)['data']['city']['name'], 'Kota Baru')
+        response = self.get_async(async_views.TouristSpotList, '/api/tourist-spots?ids=%d&expand=city' % spot.pk)
+        self.assertEqual(response.status_code, 200, response.content)
+
+
+class FastSerializationTests(TestCase):
+    """api.fastpath: API_FAST_SERIALIZATION tidak boleh mengubah satu byte pun dari response."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            province = Province.objects.create(name='Jawa Tengah', area_km2=32800.69, population=37000000)
+            self.city = City.objects.create(
+                name='Semarang', province=province, latitude='-6.966667', longitude='110.416664', area_code='024',
+            )
+            kind = TourismType.objects.create(name='Sejarah', description=None)
+        self.spots = [
+            TouristSpot.objects.create(
+                name='Lawang Sewu', address='Jl. Pemuda', city=self.city, tourism_type=kind,
+                distance_from_city='1.5', image='tourism_images/lawang sewu.jpg',
+            ),
+            # FK null, tanpa gambar, Decimal dengan pembulatan
+            TouristSpot.objects.create(
+                name='Sam Poo Kong', address='Jl. Simongan', city=self.city, distance_from_city='12.345',
+                description='Klenteng',
+            ),
+        ]
+        TouristSpot.objects.filter(pk=self.spots[0].pk).update(image_derivatives={
+            'source': 'tourism_images/lawang sewu.jpg',
+            'webp': {'640': 'tourism_images/derivatives/b.webp', '320': 'tourism_images/derivatives/a.webp'},
+            'jpeg': {'320': 'tourism_images/derivatives/a.jpg'},
+        })
+        refdata.refresh()
+
+    def render(self, url, fast):
+        get_cache().clear()
+        with override_settings(API_FAST_SERIALIZATION=fast):
+            response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.content
+
+    def test_same_bytes_with_and_without_fast_path(self):
+        spot = self.spots[0]
+        for url in [
+            '/api/tourist-spots',
+            '/api/tourist-spots?ordering=-distance_from_city',
+            '/api/tourist-spots?fields=id,image,image_srcset,distance_from_city,last_modified',
+            '/api/tourist-spots?fields=tourism_type,created_on',
+            '/api/tourist-spots/%d' % spot.pk,
+            '/api/tourist-spots/%d?fields=name,image_srcset' % spot.pk,
+            '/api/tourist-spots?ids=%d,%d,0' % (spot.pk, self.spots[1].pk),
+            '/api/tourist-spots?ids=%d&fields=image' % self.spots[1].pk,
+            '/api/provinces',
+            '/api/cities?fields=latitude,longitude',
+            '/api/cities/%d' % self.city.pk,
+            '/api/cities?ids=%d' % self.city.pk,
+            '/api/tourism-types',
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.render(url, fast=True), self.render(url, fast=False))
+
+        data = json.loads(self.render('/api/tourist-spots/%d' % spot.pk, fast=True))['data']
+        self.assertEqual(data['image'], '/media/tourism_images/lawang%20sewu.jpg')
+        self.assertEqual(data['image_srcset']['webp'],
+                         '/media/tourism_images/derivatives/a.webp 320w, /media/tourism_images/derivatives/b.webp 640w')
+        data = json.loads(self.render('/api/tourist-spots/%d' % self.spots[1].pk, fast=True))['data']
+        self.assertEqual((data['tourism_type'], data['image'], data['distance_from_city']), (None, None, '12.34'))
+
+
+@override_settings(API_WRITE_RETRIES=2, API_WRITE_RETRY_BACKOFF=0)
+class WriteRetryTests(TestCase):
+    """api.writes: database terkunci diulang dalam transaksi baru, bukan langsung 500."""
+
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def test_locked_write_is_retried_and_rolled_back(self):
+        attempts = []
+
+        def write():
+            attempts.append(Province.objects.create(name='Provinsi %d' % len(attempts)))
+            if len(attempts) == 1:
+                raise OperationalError('database is locked')
+            return attempts[-1]
+
+        province = run_write(write)
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(list(Province.objects.values_list('pk', flat=True)), [province.pk])
+
+    def test_gives_up_with_503(self):
+        def write():
+            raise OperationalError('database is locked')
+
+        with self.assertRaises(DatabaseBusy):
+            run_write(write)
+        with mock.patch('api.views.TourismTypeSerializer.save', side_effect=OperationalError('database is locked')):
+            response = self.client.post('/api/tourism-types', {'name': 'Pantai', 'is_active': True}, content_type='application/json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_other_errors_are_not_retried(self):
+        write = mock.Mock(side_effect=OperationalError('no such table: x'))
+        with self.assertRaises(OperationalError):
+            run_write(write)
+        self.assertEqual(write.call_count, 1)
+
+
+@override_settings(API_REPLICA_MAX_LAG=10)
+class ReplicaTests(TestCase):
+    """api.replicas: baca dari snapshot yang cukup baru, klien yang baru menulis tetap ke primary."""
+
+    def choose(self, snapshot, cookie=None, method='get', path='/api/tourist-spots'):
+        request = getattr(RequestFactory(), method)(path)
+        if cookie is not None:
+            request.COOKIES['api_written'] = '%.6f' % cookie
+        with mock.patch.object(replicas, 'replica_aliases', return_value=['replica_1']), \
+                mock.patch.object(replicas, 'snapshot_time', return_value=snapshot):
+            replica = replicas.choose_replica(request)
+        return replica and replica.alias
+
+    def test_choose_replica(self):
+        now = time.time()
+        self.assertEqual(self.choose(now - 1), 'replica_1')
+        # lag guard
+        self.assertIsNone(self.choose(now - 60))
+        self.assertIsNone(self.choose(None))
+        # read-your-writes: snapshot harus dimulai setelah penulisan terakhir klien
+        self.assertIsNone(self.choose(now - 1, cookie=now))
+        self.assertEqual(self.choose(now - 1, cookie=now - 2), 'replica_1')
+        self.assertIsNone(self.choose(now - 1, method='post'))
+        self.assertIsNone(self.choose(now - 1, path='/admin/'))
+
+    def test_router(self):
+        router = replicas.ReplicaRouter()
+        self.assertEqual(router.db_for_read(Province), 'default')
+        token = replicas._current.set(replicas.ReplicaRead('replica_1', time.time()))
+        try:
+            self.assertEqual(router.db_for_read(Province), 'replica_1')
+            self.assertEqual(router.db_for_write(Province), 'default')
+        finally:
+            replicas._current.reset(token)
+        self.assertFalse(router.allow_migrate('replica_1', 'uas_app'))
+
+    def test_write_sets_sticky_cookie(self):
+        with mock.patch.object(replicas, 'replica_aliases', return_value=['replica_1']):
+            response = self.client.post('/api/tourism-types', {'name': 'Pantai', 'is_active': True},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertGreater(float(response.cookies['api_written'].value), time.time() - 5)
+
+    def test_copy_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'primary.sqlite3')
+            with sqlite3.connect(source) as db:
+                db.execute('PRAGMA journal_mode=WAL')
+                db.execute('CREATE TABLE t (x)')
+                db.execute('INSERT INTO t VALUES (1)')
+            started = replicas.copy_database(source, os.path.join(directory, 'replicas', 'replica_1.sqlite3'))
+            target = os.path.join(directory, 'replicas', 'replica_1.sqlite3')
+            self.assertAlmostEqual(os.stat(target).st_mtime, started, places=3)
+            copy = sqlite3.connect('file:%s?mode=ro&immutable=1' % target, uri=True)
+            self.assertEqual(copy.execute('SELECT x FROM t').fetchall(), [(1,)])
+            self.assertEqual(copy.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+            copy.close()
+
+
+@override_settings(CASCADE_DELETE_INLINE_LIMIT=3, CASCADE_DELETE_CHUNK_SIZE=2)
+class CascadeDeleteTests(TestCase):
+    """uas_app.cascade: DELETE besar langsung 202 dan parent tersembunyi, turunannya dihapus per chunk."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.province = Province.objects.create(name='Provinsi Besar')
+            self.cities = [City.objects.create(name='Kota %d' % index, province=self.province) for index in range(2)]
+        self.spots = TouristSpot.objects.bulk_create([
+            TouristSpot(name='Wisata %d' % index, address='-', city=self.cities[index % 2], distance_from_city=1)
+            for index in range(5)
+        ])
+
+    def test_large_province_delete_runs_as_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete('/api/provinces/%d' % self.province.pk)
+        self.assertEqual(response.status_code, 202, response.content)
+        job = DeleteJob.objects.get(pk=response.json()['data']['job_id'])
+        self.assertEqual(self.client.get('/api/provinces/%d' % self.province.pk).status_code, 400)
+        self.assertTrue(Province.all_objects.filter(pk=self.province.pk).exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            cascade.run(job)
+        self.assertFalse(Province.all_objects.filter(pk=self.province.pk).exists())
+        self.assertFalse(City.all_objects.filter(province_id=self.province.pk).exists())
+        self.assertEqual(job.deleted, {'touristspot': 5, 'city': 2, 'province': 1})
+        # tidak ada SELECT * untuk membuat instance turunan
+        self.assertFalse([query for query in queries if '"uas_app_touristspot"."name"' in query['sql']])
+        self.assertEqual(
+            ChangeLog.objects.filter(action='delete', model='touristspot').count(), len(self.spots)
+        )
+
+    def test_small_city_delete_stays_inline(self):
+        city = City.objects.create(name='Kota Kecil', province=self.province)
+        response = self.client.delete('/api/cities/%d' % city.pk)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse(DeleteJob.objects.exists())
+
+    def test_no_new_children_while_job_runs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = cascade.start(self.province)
+        self.assertEqual(set(City.all_objects.filter(province=self.province).values_list('pending_delete', flat=True)),
+                         {True})
+        response = self.client.post('/api/tourist-spots', {
+            'name': 'Baru', 'address': '-', 'city': self.cities[0].pk, 'distance_from_city': '1.00',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400, response.content)
+        response = self.client.post('/api/cities', {'name': 'Kota Baru', 'province': self.province.pk},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400, response.content)
+
+        cascade.run(job)
+        self.assertFalse(TouristSpot.all_objects.exists())
+        self.assertEqual(job.deleted, {'touristspot': 5, 'city': 2, 'province': 1})
+
+    def test_spots_hidden_while_job_pending(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            City.objects.filter(pk=self.cities[0].pk).update(latitude='-7.797068', longitude='110.370529')
+            spatial.index_cities([(self.cities[0].pk, -7.797068, 110.370529)])
+        search.index_spots([spot.pk for spot in self.spots])
+        with self.captureOnCommitCallbacks(execute=True):
+            changelog.record_changes(TouristSpot, [spot.pk for spot in self.spots], changelog.UPSERT)
+        spot = self.spots[0]
+        urls = ['/api/tourist-spots', '/api/tourist-spots/search?q=wisata',
+                '/api/tourist-spots/nearby?lat=-7.797068&lon=110.370529&radius=5']
+        for url in urls:
+            self.assertTrue(self.client.get(url).json()['results'], url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job = cascade.start(self.province)
+        # baris dan index FTS-nya masih ada sampai job berjalan, tapi tidak lagi terlihat dari API
+        self.assertEqual(TouristSpot.all_objects.count(), len(self.spots))
+        self.assertFalse(TouristSpot.objects.exists())
+        for url in urls:
+            self.assertEqual(self.client.get(url).json()['results'], [], url)
+        self.assertEqual(self.client.get('/api/tourist-spots/%d' % spot.pk).status_code, 400)
+        self.assertEqual(b''.join(self.client.get('/api/tourist-spots/export').streaming_content), b'')
+        results = self.client.get('/api/sync?page_size=100').json()['results']
+        self.assertEqual({item['action'] for item in results if item['model'] == 'touristspot'}, {'delete'})
+
+        cascade.run(job)
+        self.assertFalse(TouristSpot.all_objects.exists())
+
+    def test_visible_spots_resolved_when_query_runs(self):
+        # QuerySet dibuat waktu import (mis. FilterSet django-filter), sebelum tabelnya ada: tanpa query
+        refdata.reset()
+        with CaptureQueriesContext(connection) as queries:
+            queryset = TouristSpot.objects.filter(status='Aktif')
+        self.assertEqual(len(queries), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            City.all_objects.filter(pk=self.cities[0].pk).update(pending_delete=True)
+            refdata.invalidate()
+        self.assertEqual({spot.city_id for spot in queryset}, {self.cities[1].pk})
+
+    def test_write_sees_parent_hidden_after_request_started(self):
+        city = City.objects.create(name='Kota Lain', province=Province.objects.create(name='Provinsi Lain'))
+        with refdata.request_scope():
+            refdata.current()
+            # proses lain menyembunyikan kotanya setelah request ini mengecek token snapshot
+            City.all_objects.filter(pk=city.pk).update(pending_delete=True)
+            ReferenceVersion.objects.filter(pk=1).update(token=F('token') + 1)
+            response = self.client.post('/api/tourist-spots', {
+                'name': 'Baru', 'address': '-', 'city': city.pk, 'distance_from_city': '1.00',
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 400, response.content)
+
+    def test_failed_side_effect_rolls_back_chunk(self):
+        search.index_spots([spot.pk for spot in self.spots])
+        job = cascade.start(self.province)
+        calls = []
+
+        def fail_second_chunk(sender, pks, **kwargs):
+            calls.append(pks)
+            if len(calls) == 2:
+                raise RuntimeError('worker mati')
+
+        bulk_deleted.connect(fail_second_chunk, sender=TouristSpot, dispatch_uid='test-fail-chunk')
+        try:
+            with self.assertRaises(RuntimeError):
+                cascade.run(job)
+        finally:
+            bulk_deleted.disconnect(sender=TouristSpot, dispatch_uid='test-fail-chunk')
+
+        # chunk pertama terhapus lengkap dengan efek sampingnya, chunk kedua tidak tersentuh sama sekali
+        remaining = set(TouristSpot.all_objects.values_list('id', flat=True))
+        self.assertEqual(len(remaining), len(self.spots) - 2)
+        self.assertEqual(self.spot_state(), (set(calls[0]), remaining))
+
+        cascade.run(DeleteJob.objects.get(pk=job.pk))
+        self.assertEqual(self.spot_state(), ({spot.pk for spot in self.spots}, set()))
+
+    def spot_state(self):
+        # (id dengan tombstone, id yang masih ada di index FTS)
+        tombstones = set(ChangeLog.objects.filter(model='touristspot', action='delete').values_list('object_id', flat=True))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT rowid FROM %s' % search.FTS_TABLE)
+            indexed = {row[0] for row in cursor.fetchall()}
+        return tombstones, indexed
+
+
+task_calls = []
+
+
+@tasks.task('tests.record', max_attempts=2)
+def record_task(value, fail=False):
+    task_calls.append(value)
+    if fail:
+        raise ValueError(value)
+
+
+class TaskQueueTests(TestCase):
+    """uas_app.tasks: prioritas, retry dengan backoff, visibility timeout dan idempotency key."""
+
+    def setUp(self):
+        task_calls.clear()
+
+    def test_priority_and_finished_signal(self):
+        tasks.enqueue('tests.record', {'value': 'rendah'})
+        tasks.enqueue('tests.record', {'value': 'tinggi'}, priority=5)
+        finished = []
+        tasks.task_finished.connect(lambda sender, **kwargs: finished.append(kwargs['result']), weak=False,
+                                    dispatch_uid='tests-finished')
+        try:
+            self.assertEqual(tasks.Worker().run(burst=True), 2)
+        finally:
+            tasks.task_finished.disconnect(dispatch_uid='tests-finished')
+        self.assertEqual(task_calls, ['tinggi', 'rendah'])
+        self.assertEqual(finished, ['done', 'done'])
+        self.assertEqual(set(Task.objects.values_list('status', flat=True)), {'done'})
+
+    def test_retry_with_backoff_then_fail(self):
+        task = tasks.enqueue('tests.record', {'value': 'x', 'fail': True})
+        with self.assertLogs('uas_app.tasks', level='ERROR') as logs:
+            self.assertEqual(tasks.execute(tasks.claim()), 'retry')
+        self.assertIn('percobaan ke-1', logs.output[0])
+        self.assertIn('ValueError: x', logs.output[0])
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), ('queued', 1))
+        self.assertGreater(task.available_at, timezone.now())
+        self.assertIsNone(tasks.claim())
+
+        Task.objects.filter(pk=task.pk).update(available_at=timezone.now())
+        with self.assertLogs('uas_app.tasks', level='ERROR') as logs:
+            self.assertEqual(tasks.execute(tasks.claim()), 'failed')
+        self.assertIn('percobaan ke-2', logs.output[0])
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), ('failed', 2))
+        self.assertIn('ValueError', task.error)
+
+    def test_visibility_timeout(self):
+        task = tasks.enqueue('tests.record', {'value': 'x'})
+        stale = tasks.claim()
+        self.assertIsNone(tasks.claim())
+        # worker pertama dianggap mati: setelah timeout tugasnya diambil worker lain
+        Task.objects.filter(pk=task.pk).update(available_at=timezone.now() - timedelta(seconds=1))
+        claimed = tasks.claim()
+        self.assertEqual(claimed.attempts, 2)
+        self.assertEqual(tasks.execute(claimed), 'done')
+        # hasil worker lama tidak menimpa status tugas
+        Task.objects.filter(pk=task.pk).update(status='running')
+        tasks.execute(stale)
+        self.assertEqual(Task.objects.get(pk=task.pk).attempts, 2)
+        self.assertEqual(Task.objects.get(pk=task.pk).status, 'running')
+
+    def test_visibility_timeout_on_last_attempt_fails(self):
+        task = tasks.enqueue('tests.record', {'value': 'x'})
+        later = tasks.enqueue('tests.record', {'value': 'berikutnya'})
+        for _ in range(2):
+            self.assertEqual(tasks.claim().pk, task.pk)
+            # worker-nya mati lagi: visibility timeout habis
+            Task.objects.filter(pk=task.pk).update(available_at=timezone.now() - timedelta(seconds=1))
+        with self.assertLogs('uas_app.tasks', level='ERROR') as logs:
+            claimed = tasks.claim()
+        self.assertIn('visibility timeout habis di percobaan ke-2', logs.output[0])
+        self.assertEqual(claimed.pk, later.pk)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), ('failed', 2))
+        self.assertIn('Visibility timeout', task.error)
+        self.assertIsNotNone(task.finished_on)
+        self.assertEqual(task_calls, [])
+
+    def test_idempotency_key(self):
+        first = tasks.enqueue('tests.record', {'value': 'x'}, key='record:x')
+        self.assertEqual(tasks.enqueue('tests.record', {'value': 'x'}, key='record:x').pk, first.pk)
+        Task.objects.filter(pk=first.pk).update(status='failed', attempts=2)
+        again = tasks.enqueue('tests.record', {'value': 'x'}, key='record:x')
+        self.assertEqual((again.pk, again.status, again.attempts), (first.pk, 'queued', 0))
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN khusus SQLite')
+    def test_claim_is_indexed(self):
+        Task.objects.bulk_create([Task(name='tests.record', status='done') for _ in range(50)])
+        tasks.enqueue('tests.record', {'value': 'x'})
+        with CaptureQueriesContext(connection) as queries:
+            tasks.claim()
+        for query in queries.captured_queries:
+            if query['sql'].startswith(('SELECT', 'UPDATE')):
+                self.assertEqual(full_scans(query['sql']), [], query['sql'])
+                self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', query_plan(query['sql']), query['sql'])
+
+
+class RefDataTests(TestCase):
+    """uas_app.refdata: Province, City dan TourismType dibaca dari snapshot di memori, tanpa query ke tabelnya."""
+
+    reference_tables = tuple('"%s"' % model._meta.db_table for model in (Province, City, TourismType))
+
+    def setUp(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.province = Province.objects.create(name='Bali')
+            self.city = City.objects.create(name='Denpasar', province=self.province)
+            self.type = TourismType.objects.create(name='Pantai')
+        self.spot = TouristSpot.objects.create(
+            name='Sanur', address='Jl. Sanur', city=self.city, tourism_type=self.type, distance_from_city=5,
+        )
+        refdata.refresh()
+
+    def reference_queries(self, queries):
+        return [
+            query['sql'] for query in queries.captured_queries
+            if any(table in query['sql'] for table in self.reference_tables)
+        ]
+
+    def test_steady_state_has_no_reference_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/tourist-spots', {
+                'name': 'Kuta', 'address': 'Jl. Kuta', 'city': self.city.pk, 'tourism_type': self.type.pk,
+                'distance_from_city': '10.00',
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 201, response.content)
+            for url in [
+                '/api/tourist-spots?expand=city.province,tourism_type',
+                '/api/tourist-spots/%d?expand=city.province' % self.spot.pk,
+                '/api/tourist-spots/nearby?lat=0&lon=0&radius=1&expand=city',
+                '/api/provinces',
+                '/api/cities?province=%d&expand=province' % self.province.pk,
+                '/api/cities?ids=%d,0' % self.city.pk,
+                '/api/cities/%d' % self.city.pk,
+                '/api/tourism-types',
+            ]:
+                self.assertEqual(self.client.get(url).status_code, 200, url)
+            spot = TouristSpot.objects.get(pk=self.spot.pk)
+            self.assertEqual(str(spot), 'Sanur - Denpasar')
+            self.assertEqual(str(spot.city), 'Denpasar, Bali')
+        # kecuali nama kota/provinsi untuk index FTS: dibaca lewat JOIN di transaksi penulisnya
+        reference = self.reference_queries(queries)
+        self.assertEqual([sql for sql in reference if '"city__province__name"' not in sql], [])
+        self.assertEqual(len(reference), 1)
+
+        data = self.client.get('/api/tourist-spots/%d?expand=city.province,tourism_type' % self.spot.pk).json()['data']
+        self.assertEqual(data['city']['province']['name'], 'Bali')
+        self.assertEqual(data['tourism_type']['name'], 'Pantai')
+        cities = self.client.get('/api/cities?province=%d' % self.province.pk).json()['results']
+        self.assertEqual([city['name'] for city in cities], ['Denpasar'])
+        self.assertEqual(self.client.get('/api/cities?province=x').status_code, 400)
+
+    @override_settings(REFDATA_CHECK_INTERVAL=60)
+    def test_snapshot_swapped_when_token_changes(self):
+        old = refdata.current()
+        # tanpa sinyal: snapshot lama tetap dipakai sampai tokennya berubah
+        Province.objects.filter(pk=self.province.pk).update(name='Bali Baru')
+        self.assertIs(refdata.current(), old)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            refdata.invalidate()
+            # sebelum commit: perubahan yang belum tentu jadi tidak masuk snapshot
+            self.assertIs(refdata.current(), old)
+        snapshot = refdata.current()
+        self.assertIsNot(snapshot, old)
+        self.assertEqual(snapshot.table(Province).get(self.province.pk).name, 'Bali Baru')
+        self.assertEqual(old.table(Province).get(self.province.pk).name, 'Bali')
+
+        # token diganti proses lain: terlihat di request berikutnya, di luar request setelah interval
+        ReferenceVersion.objects.filter(pk=1).update(token=F('token') + 1)
+        self.assertIs(refdata.current(), snapshot)
+        with refdata.request_scope():
+            self.assertIsNot(refdata.current(), snapshot)
+
+    def test_save_invalidates_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put('/api/provinces/%d' % self.province.pk, {'name': 'Pulau Bali'},
+                                       content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.client.get('/api/provinces/%d' % self.province.pk).json()['data']['name'], 'Pulau Bali')
+        self.assertEqual(str(City.objects.get(pk=self.city.pk)), 'Denpasar, Pulau Bali')
+
+    def test_uncommitted_rows_never_published(self):
+        old = refdata.current()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Province.objects.create(name='Sementara')
+            # akses berikutnya di thread penulis (mis. efek samping post_save) tetap memakai snapshot lama
+            with refdata.request_scope():
+                self.assertIs(refdata.current(), old)
+            raise RuntimeError('rollback')
+        with refdata.request_scope():
+            snapshot = refdata.current()
+        self.assertEqual([row['name'] for row in snapshot.table(Province).values()], ['Bali'])
+
+    def test_search_index_reads_names_from_database(self):
+        # snapshot tertinggal: nama kota diubah tanpa sinyal
+        City.objects.filter(pk=self.city.pk).update(name='Kota Denpasar')
+        response = self.client.post('/api/tourist-spots', {
+            'name': 'Kuta', 'address': 'Jl. Kuta', 'city': self.city.pk, 'distance_from_city': '10.00',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT city, province FROM %s WHERE rowid = %%s' % search.FTS_TABLE,
+                           [response.json()['data']['id']])
+            self.assertEqual(cursor.fetchone(), ('Kota Denpasar', 'Bali'))
+
+    def test_hidden_rows_and_missing_ids(self):
+        Province.all_objects.filter(pk=self.province.pk).update(pending_delete=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            refdata.invalidate()
+        self.assertEqual(self.client.get('/api/provinces').json()['results'], [])
+        self.assertEqual(self.client.get('/api/provinces/%d' % self.province.pk).status_code, 400)
+        city = City.objects.get(pk=self.city.pk)
+        refdata.current()
+        with self.assertNumQueries(0):
+            # FK tetap bisa dibaca selama parent-nya belum benar-benar terhapus
+            self.assertEqual(city.province.name, 'Bali')
+
+        # dibuat tanpa sinyal dan belum ada di snapshot: validasi FK tetap dicek ke database
+        other = City.objects.bulk_create([City(name='Singaraja', province=Province.objects.create(name='Bali Utara'))])[0]
+        City.objects.filter(pk=other.pk).update(name='Buleleng')
+        response = self.client.post('/api/tourist-spots', {
+            'name': 'Lovina', 'address': 'Jl. Lovina', 'city': other.pk, 'distance_from_city': '3.00',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+
+class ConditionalUpdateTests(TestCase):
+    """api.conditional: PATCH menulis kolom yang dikirim saja dengan satu UPDATE bersyarat If-Match."""
+
+    def setUp(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.province = Province.objects.create(name='Jawa Barat')
+            self.city = City.objects.create(name='Bandung', province=self.province)
+        self.spot = TouristSpot.objects.create(
+            name='Tangkuban Perahu', address='Lembang', city=self.city, distance_from_city=30,
+        )
+        refdata.refresh()
+
+    def patch(self, url, data, etag=None):
+        headers = {'HTTP_IF_MATCH': etag} if etag is not None else {}
+        # on_commit dijalankan supaya cache response ikut dibuang
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(url, data, content_type='application/json', **headers)
+
+    def put(self, url, data, etag):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.put(url, data, content_type='application/json', HTTP_IF_MATCH=etag)
+
+    def test_patch_writes_changed_columns_in_one_update(self):
+        url = '/api/tourist-spots/%d' % self.spot.pk
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url)['ETag'], etag)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch(url, {'name': 'Kawah Ratu'}, etag)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotEqual(response['ETag'], etag)
+
+        sql = [query['sql'] for query in queries.captured_queries if '"uas_app_touristspot"' in query['sql']]
+        # tidak ada SELECT sebelum UPDATE; setelahnya efek samping post_save (index FTS) dan baris untuk response
+        self.assertTrue(sql[0].startswith('UPDATE'), sql)
+        self.assertEqual(len([statement for statement in sql if statement.startswith('UPDATE')]), 1)
+        self.assertIn('"last_modified" IN', sql[0])
+        self.assertNotIn('"address"', sql[0])
+        # objek lengkap, sama dengan GET (dan PUT)
+        self.assertEqual(response.json()['data']['address'], 'Lembang')
+        self.assertEqual(response.json()['data'], self.client.get(url).json()['data'])
+
+        spot = TouristSpot.objects.get(pk=self.spot.pk)
+        self.assertEqual((spot.name, spot.address), ('Kawah Ratu', 'Lembang'))
+        self.assertEqual(self.client.get(url)['ETag'], response['ETag'])
+        self.assertTrue(ChangeLog.objects.filter(model='touristspot', object_id=spot.pk, action='upsert').exists())
+        # gambar tidak ikut diubah: turunannya tidak dijadwalkan ulang
+        self.assertFalse(Task.objects.filter(name='images.update_spot').exists())
+
+    def test_stale_etag_gets_412(self):
+        url = '/api/tourist-spots/%d' % self.spot.pk
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.patch(url, {'status': 'Tidak Aktif'}, etag).status_code, 200)
+
+        response = self.patch(url, {'name': 'Kawah Putih'}, etag)
+        self.assertEqual(response.status_code, 412, response.content)
+        self.assertEqual(response['ETag'], self.client.get(url)['ETag'])
+        self.assertEqual(self.patch(url, {'name': 'Kawah Putih'}, 'W/%s' % response['ETag']).status_code, 412)
+        self.assertEqual(TouristSpot.objects.get(pk=self.spot.pk).name, 'Tangkuban Perahu')
+
+        self.assertEqual(self.patch(url, {'name': 'Kawah Putih'}, '"1", %s' % response['ETag']).status_code, 200)
+        self.assertEqual(self.patch(url, {'address': 'Subang'}, '*').status_code, 200)
+        self.assertEqual(self.patch(url, {'address': 'Subang'}).status_code, 200)
+        self.assertEqual(self.patch(url, {'distance_from_city': 'x'}).status_code, 400)
+        self.assertEqual(self.patch(url, {}).status_code, 400)
+        self.assertEqual(self.patch('/api/tourist-spots/0', {'name': 'x'}, '*').status_code, 400)
+
+    def test_reference_patch_and_put_if_match(self):
+        url = '/api/cities/%d' % self.city.pk
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch(url, {'latitude': '-6.900000', 'longitude': '107.600000'}, etag)
+        self.assertEqual(response.status_code, 200, response.content)
+        # baris lengkap untuk post_save diambil dari snapshot, bukan SELECT
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and '"uas_app_city"' in query['sql']
+        ])
+        city = City.objects.get(pk=self.city.pk)
+        self.assertEqual((city.name, str(city.latitude)), ('Bandung', '-6.900000'))
+        self.assertEqual(response.json()['data'], self.client.get(url).json()['data'])
+        self.assertEqual(response.json()['data']['longitude'], '107.600000')
+
+        # PUT juga menghormati If-Match
+        province_url = '/api/provinces/%d' % self.province.pk
+        response = self.put(province_url, {'name': 'Jabar'}, '"1"')
+        self.assertEqual(response.status_code, 412, response.content)
+        response = self.put(province_url, {'name': 'Jabar'}, response['ETag'])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response['ETag'], self.client.get(province_url)['ETag'])
+        self.assertEqual(str(City.objects.get(pk=self.city.pk)), 'Bandung, Jabar')
+
+
+class NearbyTests(TestCase):
+    """/api/tourist-spots/nearby: kandidat dari R*Tree, diurutkan menurut jarak kota."""
+
+    def setUp(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            province = Province.objects.create(name='Fiji')
+            # Suva di 178,4 BT, Lakeba dan Vanua Balavu di seberang garis 180 derajat
+            self.cities = [
+                City.objects.create(name=name, province=province, latitude=latitude, longitude=longitude)
+                for name, latitude, longitude in [
+                    ('Suva', '-18.141600', '178.441900'),
+                    ('Lakeba', '-18.200000', '-178.800000'),
+                    ('Vanua Balavu', '-17.200000', '-179.000000'),
+                ]
+            ]
+        self.spots = [
+            TouristSpot.objects.create(name='Wisata %s' % city.name, address='-', city=city, distance_from_city=1)
+            for city in self.cities
+        ]
+
+    def nearby(self, latitude, longitude, radius):
+        response = self.client.get('/api/tourist-spots/nearby?lat=%s&lon=%s&radius=%s' % (latitude, longitude, radius))
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(row['name'], row['distance_km']) for row in response.json()['results']]
+
+    @override_settings(API_NEARBY_MAX_RADIUS_KM=500)
+    def test_ordered_by_city_distance_then_spot_distance(self):
+        suva, lakeba, _ = self.cities
+        TouristSpot.objects.create(name='Wisata Suva Dekat', address='-', city=suva, distance_from_city=0.5)
+        TouristSpot.objects.create(name='Wisata Lakeba Jauh', address='-', city=lakeba, distance_from_city=9)
+        results = self.nearby(-18.1416, 178.4419, 400)
+        self.assertEqual([name for name, _ in results],
+                         ['Wisata Suva Dekat', 'Wisata Suva', 'Wisata Vanua Balavu', 'Wisata Lakeba', 'Wisata Lakeba Jauh'])
+        self.assertEqual(results[0][1], 0.0)
+        for name, distance in results:
+            city = TouristSpot.objects.get(name=name).city
+            self.assertAlmostEqual(distance, spatial.haversine_km(
+                -18.1416, 178.4419, float(city.latitude), float(city.longitude)), places=3)
+
+        response = self.client.get('/api/tourist-spots/nearby?lat=-18.1416&lon=178.4419&radius=400&limit=2')
+        self.assertEqual([row['name'] for row in response.json()['results']], ['Wisata Suva Dekat', 'Wisata Suva'])
+
+    def test_moved_and_unlocated_cities(self):
+        suva = self.cities[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/cities/%d' % suva.pk, {'latitude': '-17.800000', 'longitude': '177.400000'},
+                                         content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.nearby(-17.8, 177.4, 5), [('Wisata Suva', 0.0)])
+        self.assertEqual(self.nearby(-18.1416, 178.4419, 5), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/cities/%d' % suva.pk, {'latitude': None, 'longitude': None},
+                              content_type='application/json')
+        self.assertEqual(self.nearby(-17.8, 177.4, 5), [])
+
+    def test_invalid_parameters(self):
+        for query in ['lon=0', 'lat=x&lon=0', 'lat=91&lon=0', 'lat=0&lon=181', 'lat=0&lon=0&radius=0',
+                      'lat=0&lon=0&radius=1000', 'lat=0&lon=0&limit=0']:
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get('/api/tourist-spots/nearby?%s' % query).status_code, 400)
+
+    def test_bounding_box_wraps_antimeridian(self):
+        boxes = spatial.bounding_boxes(-18.0, 179.9, 50)
+        self.assertEqual(len(boxes), 2)
+        self.assertEqual((boxes[0][3], boxes[1][2]), (180.0, -180.0))
+        # radius yang mencakup kutub: semua longitude
+        self.assertEqual(spatial.bounding_boxes(89.9, 0, 50)[0][1:], (90.0, -180.0, 180.0))
+        self.assertEqual(len(spatial.bounding_boxes(-6.2, 106.8, 50)), 1)
+
+        # dari sisi barat dan timur garis 180 derajat
+        self.assertEqual(self.nearby(-18.0, 179.9, 150), [('Wisata Lakeba', 139.188), ('Wisata Vanua Balavu', 146.649)])
+        self.assertEqual([name for name, _ in self.nearby(-18.0, -179.9, 200)],
+                         ['Wisata Lakeba', 'Wisata Vanua Balavu', 'Wisata Suva'])
+
+
+class PaginationTests(TestCase):
+    """api.pagination: cursor keyset stabil untuk setiap urutan, juga saat ada baris baru di tengah jalan."""
+
+    def setUp(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city = City.objects.create(name='Yogyakarta', province=Province.objects.create(name='DIY'))
+            # nilai kembar di kolom urutan: id yang memisahkan
+            TouristSpot.objects.bulk_create([
+                TouristSpot(name='Wisata %d' % index, address='-', city=self.city, distance_from_city=index % 4)
+                for index in range(23)
+            ])
+        same = timezone.now() - timedelta(days=1)
+        TouristSpot.objects.filter(id__lte=10).update(last_modified=same)
+        refdata.refresh()
+
+    def walk(self, url, insert=None):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            ids += [row['id'] for row in response.json()['results']]
+            url = response.json()['next']
+            if insert and url:
+                with self.captureOnCommitCallbacks(execute=True):
+                    insert()
+        return ids
+
+    def expected(self, ordering, ids=None):
+        rows = TouristSpot.objects.filter(**({'id__in': ids} if ids is not None else {}))
+        return list(rows.order_by(*TouristSpotPagination.orderings[ordering]).values_list('id', flat=True))
+
+    def test_every_ordering_walks_each_row_once(self):
+        for ordering in TouristSpotPagination.orderings:
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self.walk('/api/tourist-spots?page_size=4&ordering=%s' % ordering),
+                                 self.expected(ordering))
+
+    def test_rows_inserted_between_pages(self):
+        existing = list(TouristSpot.objects.values_list('id', flat=True))
+        counter = iter(range(100))
+
+        def insert():
+            # jarak 0 dan 3: satu di depan cursor, satu di belakangnya
+            for distance in (0, 3):
+                TouristSpot.objects.create(name='Baru %d' % next(counter), address='-', city=self.city,
+                                           distance_from_city=distance)
+
+        for ordering in ('id', '-id', 'distance_from_city', '-last_modified'):
+            with self.subTest(ordering=ordering):
+                ids = self.walk('/api/tourist-spots?page_size=5&ordering=%s' % ordering, insert)
+                # tidak ada yang terlewat atau terulang; baris baru muncul hanya kalau jatuh setelah cursor
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(self.expected(ordering, ids), ids)
+                self.assertEqual(set(existing) - set(ids), set())
+
+    def test_cursor_bound_to_ordering(self):
+        response = self.client.get('/api/tourist-spots?page_size=5&ordering=distance_from_city')
+        cursor = QueryDict(urlsplit(response.json()['next']).query)['cursor']
+        self.assertEqual(self.client.get('/api/tourist-spots?ordering=id&cursor=%s' % cursor).status_code, 400)
+        self.assertEqual(self.client.get('/api/tourist-spots?cursor=bukan-cursor').status_code, 400)
+        self.assertEqual(self.client.get('/api/tourist-spots?ordering=name').status_code, 400)
+
+    def test_reference_list_from_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            province = Province.objects.get()
+            City.objects.bulk_create([City(name='Kota %d' % index, province=province) for index in range(6)])
+            refdata.invalidate()
+        ids = self.walk('/api/cities?page_size=2&ordering=-id')
+        self.assertEqual(ids, sorted(City.objects.values_list('id', flat=True), reverse=True))
+
+
+class ExportTests(TestCase):
+    """/api/tourist-spots/export: streaming NDJSON/JSON, isinya sama dengan response list."""
+
+    def setUp(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city = City.objects.create(name='Malang', province=Province.objects.create(name='Jawa Timur'))
+            kind = TourismType.objects.create(name='Gunung')
+        TouristSpot.objects.bulk_create([
+            TouristSpot(name='Wisata %d' % index, address='-', city=self.city, distance_from_city='%d.50' % index,
+                        tourism_type=kind if index % 2 else None)
+            for index in range(7)
+        ])
+        refdata.refresh()
+
+    def export(self, query=''):
+        response = self.client.get('/api/tourist-spots/export%s' % query)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def listed(self, query=''):
+        return self.client.get('/api/tourist-spots?page_size=100%s' % query).json()['results']
+
+    @override_settings(API_EXPORT_CHUNK_SIZE=3)
+    def test_ndjson_and_json_match_list(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="tourist-spots.ndjson"')
+        self.assertTrue(body.endswith(b'\n'))
+        self.assertEqual([json.loads(line) for line in body.splitlines()], self.listed())
+
+        response, body = self.export('?stream=json&expand=city.province&fields=id,name,city.name,city.province')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(body), self.listed('&expand=city.province&fields=id,name,city.name,city.province'))
+
+    def test_rows_are_streamed(self):
+        response = self.client.get('/api/tourist-spots/export')
+        chunks = list(response.streaming_content)
+        # satu chunk per baris, bukan satu body besar
+        self.assertEqual(len(chunks), TouristSpot.objects.count())
+
+    def test_empty_and_unknown_format(self):
+        TouristSpot.objects.all().delete()
+        self.assertEqual(self.export('?stream=json')[1], b'[]')
+        self.assertEqual(self.export()[1], b'')
+        response = self.client.get('/api/tourist-spots/export?stream=csv')
+        self.assertEqual(response.status_code, 400, response.content)
+
+
+class BulkUpsertTests(TestCase):
+    """api.bulk: hasil per item, error tanpa menggagalkan batch, upsert lewat natural key."""
+
+    def setUp(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.province = Province.objects.create(name='Sumatera Barat')
+            self.city = City.objects.create(name='Bukittinggi', province=self.province)
+        refdata.refresh()
+
+    def post(self, url, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, items, content_type='application/json')
+
+    @override_settings(API_BULK_BATCH_SIZE=2)
+    def test_results_per_item(self):
+        response = self.post('/api/tourist-spots/bulk', [
+            {'name': 'Jam Gadang', 'address': 'Pusat kota', 'city': self.city.pk, 'distance_from_city': '0.50'},
+            {'name': 'Ngarai Sianok', 'address': 'Sianok', 'city': self.city.pk, 'distance_from_city': '2.00'},
+            {'name': 'Tanpa Kota', 'address': '-', 'city': 0, 'distance_from_city': '1.00'},
+            {'name': 'Jam Gadang', 'address': 'Lagi', 'city': self.city.pk, 'distance_from_city': '0.50'},
+            'bukan object',
+            {'name': 'Benteng Fort de Kock', 'address': '-', 'city': self.city.pk, 'distance_from_city': '1.20'},
+        ])
+        self.assertEqual(response.status_code, 201, response.content)
+        data = response.json()['data']
+        self.assertEqual(data['summary'], {'created': 3, 'updated': 0, 'error': 3})
+        results = data['results']
+        self.assertEqual([result['status'] for result in results],
+                         ['created', 'created', 'error', 'error', 'error', 'created'])
+        self.assertIn('city', results[2]['errors'])
+        self.assertIn('index 0', results[3]['errors']['non_field_errors'][0])
+        spots = {spot.name: spot for spot in TouristSpot.objects.all()}
+        self.assertEqual(set(spots), {'Jam Gadang', 'Ngarai Sianok', 'Benteng Fort de Kock'})
+        self.assertEqual(results[0]['id'], spots['Jam Gadang'].pk)
+        self.assertEqual(results[5]['id'], spots['Benteng Fort de Kock'].pk)
+        # efek samping bulk_saved: change log dan index pencarian
+        self.assertEqual(ChangeLog.objects.filter(model='touristspot', action='upsert').count(), 3)
+        self.assertEqual([pk for pk, _ in search.search_spot_ids('ngarai', 10)], [spots['Ngarai Sianok'].pk])
+
+    def test_upsert_updates_sent_columns_only(self):
+        spot = TouristSpot.objects.create(name='Jam Gadang', address='Pusat kota', city=self.city,
+                                          distance_from_city='0.50', status='Aktif')
+        items = [{'name': 'Jam Gadang', 'city': self.city.pk, 'address': 'Jl. Raya', 'distance_from_city': '0.60'}]
+        response = self.post('/api/tourist-spots/bulk', items)
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertEqual(response.json()['data']['results'][0]['errors'], {'non_field_errors': ['Data sudah ada']})
+
+        response = self.post('/api/tourist-spots/bulk?upsert=true', items + [
+            {'name': 'Lobang Jepang', 'address': '-', 'city': self.city.pk, 'distance_from_city': '1.00'},
+        ])
+        self.assertEqual(response.status_code, 201, response.content)
+        data = response.json()['data']
+        self.assertEqual(data['summary'], {'created': 1, 'updated': 1, 'error': 0})
+        self.assertEqual(data['results'][0], {'index': 0, 'status': 'updated', 'id': spot.pk})
+        updated = TouristSpot.objects.get(pk=spot.pk)
+        self.assertEqual((updated.address, str(updated.distance_from_city), updated.status),
+                         ('Jl. Raya', '0.60', 'Aktif'))
+        self.assertGreater(updated.last_modified, spot.last_modified)
+
+    def test_city_bulk_and_body_errors(self):
+        response = self.post('/api/cities/bulk', [
+            {'name': 'Padang', 'province': self.province.pk},
+            {'name': 'Bukittinggi', 'province': self.province.pk},
+        ])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['data']['summary'], {'created': 1, 'updated': 0, 'error': 1})
+        # kota baru langsung terlihat lewat snapshot setelah commit
+        self.assertEqual(self.client.get('/api/cities?province=%d' % self.province.pk).json()['results'][1]['name'],
+                         'Padang')
+
+        self.assertEqual(self.post('/api/cities/bulk', {'name': 'Padang'}).status_code, 400)
+        with override_settings(API_BULK_MAX_ITEMS=1):
+            self.assertEqual(self.post('/api/cities/bulk', [{}, {}]).status_code, 400)
+        self.assertEqual(City.objects.count(), 2)
+
+    def test_failed_receiver_rolls_back_the_batch(self):
+        # bulk_saved dikirim di transaksi penulisnya, sama seperti post_save
+        def fail(sender, created, updated, **kwargs):
+            raise RuntimeError('index gagal')
+
+        bulk_saved.connect(fail, sender=TouristSpot, dispatch_uid='tests-bulk-saved-fail')
+        self.addCleanup(bulk_saved.disconnect, sender=TouristSpot, dispatch_uid='tests-bulk-saved-fail')
+        with self.assertRaises(RuntimeError):
+            self.post('/api/tourist-spots/bulk', [
+                {'name': 'Jam Gadang', 'address': 'Pusat kota', 'city': self.city.pk, 'distance_from_city': '0.50'},
+            ])
+        self.assertFalse(TouristSpot.objects.exists())
+        self.assertFalse(ChangeLog.objects.filter(model='touristspot').exists())
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 khusus SQLite')
+class SearchTests(TestCase):
+    """/api/tourist-spots/search: peringkat bm25 berbobot per kolom dan cursor (rank, id)."""
+
+    def setUp(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city = City.objects.create(name='Gianyar', province=Province.objects.create(name='Bali'))
+            self.spots = {
+                name: TouristSpot.objects.create(name=name, address=address, city=self.city, description=description,
+                                                 distance_from_city=1)
+                for name, address, description in [
+                    ('Air Terjun Tegenungan', 'Kemenuh', 'Air terjun dekat Ubud'),
+                    ('Pura Tirta Empul', 'Tampaksiring', 'Mata air suci, kolam pemandian'),
+                    ('Ceking Rice Terrace', 'Tegallalang', 'Sawah berundak, dekat air terjun kecil'),
+                    ('Goa Gajah', 'Bedulu', 'Situs purbakala'),
+                    ('Café Sawah', 'Jl. Raya Ubud', 'Kopi di tengah sawah'),
+                ]
+            }
+        refdata.refresh()
+
+    def search(self, query, page_size=20):
+        url = '/api/tourist-spots/search?q=%s&page_size=%d' % (quote(query), page_size)
+        names = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            names += [row['name'] for row in response.json()['results']]
+            url = response.json()['next']
+        return names
+
+    def test_name_match_ranks_first(self):
+        # "terjun" di nama lebih berbobot daripada di deskripsi
+        self.assertEqual(self.search('terjun'), ['Air Terjun Tegenungan', 'Ceking Rice Terrace'])
+        # prefix dan tanpa diakritik
+        self.assertEqual(self.search('tirt'), ['Pura Tirta Empul'])
+        self.assertEqual(self.search('cafe'), ['Café Sawah'])
+        # kota dan provinsi ikut diindex
+        self.assertEqual(len(self.search('gianyar bali')), len(self.spots))
+
+    def test_pages_follow_rank_without_repeats(self):
+        everything = self.search('air', page_size=20)
+        self.assertEqual(self.search('air', page_size=1), everything)
+        self.assertEqual(len(everything), 3)
+        self.assertEqual(everything[0], 'Air Terjun Tegenungan')
+
+    def test_index_follows_writes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/cities/%d' % self.city.pk, {'name': 'Kabupaten Gianyar'},
+                                         content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(self.search('kabupaten')), len(self.spots))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spots['Goa Gajah'].delete()
+        self.assertEqual(self.search('gajah'), [])
+
+    def test_query_is_not_fts_syntax(self):
+        # tanda kutip, kurung dan operator FTS5 dari user hanya jadi token biasa
+        self.assertEqual(self.search('"air" (terjun*'), ['Air Terjun Tegenungan', 'Ceking Rice Terrace'])
+        self.assertEqual(self.search('air NOT terjun'), [])
+        self.assertEqual(self.search('!!!'), [])
+        self.assertEqual(self.client.get('/api/tourist-spots/search?q=').status_code, 400)
+
+
+class CacheInvalidationTests(TransactionTestCase):
+    """api.cache: versi model dinaikkan setelah commit, jadi perlu transaksi sungguhan (bukan TestCase)."""
+
+    def setUp(self):
+        get_cache().clear()
+        self.city = City.objects.create(name='Bandung', province=Province.objects.create(name='Jawa Barat'))
+        self.spot = TouristSpot.objects.create(name='Kawah Putih', address='Ciwidey', city=self.city,
+                                               distance_from_city=40)
+
+    def tearDown(self):
+        # index FTS dan R*Tree bukan tabel model, jadi tidak ikut dikosongkan flush
+        TouristSpot.objects.all().delete()
+        City.objects.all().delete()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response['X-Cache'], response.json()
+
+    def test_write_invalidates_after_commit(self):
+        url = '/api/tourist-spots/%d' % self.spot.pk
+        self.assertEqual(self.get(url)[0], 'MISS')
+        self.assertEqual(self.get(url)[0], 'HIT')
+
+        response = self.client.patch(url, {'name': 'Kawah Putih Ciwidey'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        outcome, data = self.get(url)
+        self.assertEqual((outcome, data['data']['name']), ('MISS', 'Kawah Putih Ciwidey'))
+
+        # gagal validasi: tidak ada yang di-commit, entry cache tetap dipakai
+        self.assertEqual(self.client.patch(url, {'distance_from_city': 'x'}, content_type='application/json').status_code, 400)
+        self.assertEqual(self.get(url)[0], 'HIT')
+
+    def test_rolled_back_write_keeps_version(self):
+        self.get('/api/tourist-spots')
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            TouristSpot.objects.filter(pk=self.spot.pk).update(name='Batal')
+            self.spot.save()
+            raise RuntimeError('rollback')
+        self.assertEqual(self.get('/api/tourist-spots')[0], 'HIT')
+
+    def test_expand_depends_on_related_models(self):
+        # detail tanpa ?expand= hanya bergantung pada TouristSpot
+        plain = '/api/tourist-spots/%d' % self.spot.pk
+        expanded = plain + '?expand=city'
+        self.get(plain)
+        self.get(expanded)
+        response = self.client.patch('/api/cities/%d' % self.city.pk, {'name': 'Kota Bandung'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.get(plain)[0], 'HIT')
+        outcome, data = self.get(expanded)
+        self.assertEqual((outcome, data['data']['city']['name']), ('MISS', 'Kota Bandung'))
+
+    def test_bulk_write_and_delete_invalidate(self):
+        self.get('/api/tourist-spots')
+        response = self.client.post('/api/tourist-spots/bulk', [
+            {'name': 'Tangkuban Perahu', 'address': 'Lembang', 'city': self.city.pk, 'distance_from_city': '30.00'},
+        ], content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        outcome, data = self.get('/api/tourist-spots')
+        self.assertEqual((outcome, len(data['results'])), ('MISS', 2))
+
+        self.get('/api/tourist-spots/%d' % self.spot.pk)
+        self.assertEqual(self.client.delete('/api/tourist-spots/%d' % self.spot.pk).status_code, 200)
+        self.assertEqual(self.client.get('/api/tourist-spots/%d' % self.spot.pk).status_code, 400)
+
+
+class ExpandTests(TestCase):
+    """?expand=: hanya path yang dikenal, dan jumlah query tidak bertambah dengan jumlah baris."""
+
+    def setUp(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            province = Province.objects.create(name='Sulawesi Selatan')
+            cities = [City.objects.create(name='Kota %d' % index, province=province) for index in range(3)]
+            kind = TourismType.objects.create(name='Pantai')
+        TouristSpot.objects.bulk_create([
+            TouristSpot(name='Wisata %d' % index, address='-', city=cities[index % 3], tourism_type=kind,
+                        distance_from_city=1)
+            for index in range(9)
+        ])
+        self.spot = TouristSpot.objects.first()
+        refdata.refresh()
+
+    def test_unknown_paths_rejected(self):
+        for url in [
+            '/api/tourist-spots?expand=province',
+            '/api/tourist-spots?expand=city,kota',
+            '/api/tourist-spots?expand=city.name',
+            '/api/tourist-spots?expand=tourism_type.city',
+            '/api/tourist-spots/%d?expand=owner' % self.spot.pk,
+            '/api/tourist-spots/export?expand=x',
+            '/api/tourist-spots/search?q=wisata&expand=x',
+            '/api/tourist-spots/nearby?lat=0&lon=0&expand=x',
+            '/api/cities?expand=city',
+            '/api/provinces?expand=province',
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertIn('expand', response.json())
+        self.assertIn('Pilihan: city, city.province, tourism_type',
+                      str(self.client.get('/api/tourist-spots?expand=x').json()['expand']))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        url = '/api/tourist-spots?expand=city.province,tourism_type&page_size=%d'
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(len(self.client.get(url % 2).json()['results']), 2)
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as many:
+            results = self.client.get(url % 9).json()['results']
+        self.assertEqual(len(many), len(few))
+        self.assertEqual({row['city']['province']['name'] for row in results}, {'Sulawesi Selatan'})
+        self.assertEqual({row['tourism_type']['name'] for row in results}, {'Pantai'})
+        # tanpa ?expand= FK tetap berupa id
+        self.assertIsInstance(self.client.get('/api/tourist-spots').json()['results'][0]['city'], int)
+
+
+class SparseFieldsTests(TestCase):
+    """?fields=: hanya field yang dikenal, dan kolom yang tidak diminta tidak dibaca dari database."""
+
+    def setUp(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city = City.objects.create(name='Makassar', province=Province.objects.create(name='Sulawesi Selatan'))
+        self.spot = TouristSpot.objects.create(name='Pantai Losari', address='Jl. Penghibur', city=self.city,
+                                               distance_from_city=1, description='x' * 1000)
+        refdata.refresh()
+
+    def test_unknown_fields_rejected(self):
+        for url in [
+            '/api/tourist-spots?fields=id,nama',
+            # field nested hanya ada kalau FK-nya di-expand
+            '/api/tourist-spots?fields=city.name',
+            '/api/tourist-spots?expand=city&fields=city.population_x',
+            '/api/tourist-spots/%d?fields=password' % self.spot.pk,
+            '/api/tourist-spots/export?fields=x',
+            '/api/tourist-spots?ids=%d&fields=x' % self.spot.pk,
+            '/api/cities?fields=province.name',
+            '/api/provinces/1?fields=x',
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertIn('fields', response.json())
+
+    def test_only_requested_columns_are_read(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tourist-spots?expand=city&fields=id,name,city.name')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['results'], [{'id': self.spot.pk, 'name': 'Pantai Losari',
+                                                       'city': {'name': 'Makassar'}}])
+        sql = [query['sql'] for query in queries.captured_queries if 'FROM "uas_app_touristspot"' in query['sql']]
+        self.assertTrue(sql)
+        for statement in sql:
+            self.assertNotIn('"description"', statement)
+
+        data = self.client.get('/api/tourist-spots/%d?fields=address' % self.spot.pk).json()['data']
+        self.assertEqual(data, {'address': 'Jl. Penghibur'})
+
+
+class ImportCatalogTests(TestCase):
+    """Command import_catalog: natural key ke FK, error per baris, dan lanjut dari checkpoint."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+
+    def run_import(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_catalog', *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_resume_from_checkpoint(self):
+        provinces = self.write('provinces.csv', 'name,abbreviation\nJawa Timur,JI\nBali,BA\n')
+        cities = self.write('cities.ndjson', '\n'.join(json.dumps(row) for row in [
+            {'name': 'Malang', 'province': 'Jawa Timur', 'latitude': '-7.98', 'longitude': '112.63'},
+            {'name': 'Denpasar', 'province': 'Bali', 'is_capital': 'ya'},
+            {'name': 'Atlantis', 'province': 'Tidak Ada'},
+        ]))
+        spots = self.write('spots.csv', 'name,address,city,province,tourism_type,distance_from_city\n' + ''.join(
+            'Wisata %d,-,%s,%s,Alam,%d\n' % (index, *(('Malang', 'Jawa Timur') if index % 2 else ('Denpasar', 'Bali')), index)
+            for index in range(7)
+        ))
+        out, err = self.run_import('--provinces', provinces, '--cities', cities)
+        self.assertIn('cities selesai: 2 baris ditulis, 1 gagal', out)
+        self.assertIn('Provinsi "Tidak Ada" tidak ditemukan', err)
+        self.assertTrue(City.objects.get(name='Denpasar').is_capital)
+
+        # proses mati setelah dua chunk: checkpoint menunjuk baris terakhir yang sudah commit
+        write_chunk = import_catalog.Command.write_chunk
+        calls = []
+
+        def crash(command, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return write_chunk(command, *args, **kwargs)
+
+        with mock.patch.object(import_catalog.Command, 'write_chunk', crash), self.assertRaises(KeyboardInterrupt):
+            self.run_import('--spots', spots, '--chunk-size', '2')
+        self.assertEqual(TouristSpot.objects.count(), 4)
+
+        out, _ = self.run_import('--spots', spots, '--chunk-size', '2')
+        self.assertIn('melanjutkan dari baris data ke-5', out)
+        self.assertEqual(sorted(TouristSpot.objects.values_list('name', flat=True)),
+                         ['Wisata %d' % index for index in range(7)])
+        self.assertEqual(TourismType.objects.filter(name='Alam').count(), 1)
+        self.assertEqual(TouristSpot.objects.get(name='Wisata 1').city.name, 'Malang')
+
+        # file yang sama sudah selesai: tidak ada yang ditulis ulang, kecuali dengan --restart
+        self.run_import('--spots', spots)
+        self.assertEqual(TouristSpot.objects.count(), 7)
+        self.run_import('--spots', spots, '--restart')
+        self.assertEqual(TouristSpot.objects.count(), 14)
+
+    def test_dry_run_and_upsert(self):
+        provinces = self.write('provinces.csv', 'name,population\nBali,4300000\n')
+        self.run_import('--provinces', provinces, '--dry-run')
+        self.assertFalse(Province.objects.exists())
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+        self.run_import('--provinces', provinces)
+        updated = self.write('provinces2.csv', 'name,population\nBali,4400000\n')
+        self.run_import('--provinces', updated)
+        self.assertEqual(list(Province.objects.values_list('name', 'population')), [('Bali', 4400000)])
+        # bulk_saved: snapshot dan change log ikut diperbarui
+        self.assertEqual(refdata.current().table(Province).get(Province.objects.get().pk).population, 4400000)
+        self.assertTrue(ChangeLog.objects.filter(model='province').exists())
+
+        with self.assertRaises(CommandError):
+            call_command('import_catalog')
+        with self.assertRaises(CommandError):
+            call_command('import_catalog', '--spots', os.path.join(self.directory.name, 'tidak-ada.csv'))
+
+
+class SyncTests(TestCase):
+    """/api/sync: feed perubahan per token, setiap objek sekali, objek terhapus sebagai tombstone."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.province = Province.objects.create(name='Nusa Tenggara Timur')
+            self.city = City.objects.create(name='Labuan Bajo', province=self.province)
+        self.spots = [
+            TouristSpot.objects.create(name='Pulau %d' % index, address='-', city=self.city, distance_from_city=index)
+            for index in range(3)
+        ]
+        refdata.refresh()
+
+    def sync(self, since=None, page_size=100):
+        url = '/api/sync?page_size=%d' % page_size + ('&since=%s' % since if since is not None else '')
+        results = []
+        while True:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            results += [(row['model'], row['id'], row['action']) for row in body['results']]
+            if not body['next']:
+                return results, body['token']
+            url = body['next']
+
+    def test_initial_sync_then_deltas_with_tombstones(self):
+        results, token = self.sync(page_size=2)
+        self.assertEqual(results, [('province', self.province.pk, 'upsert'), ('city', self.city.pk, 'upsert')]
+                         + [('touristspot', spot.pk, 'upsert') for spot in self.spots])
+        self.assertEqual(self.sync(token), ([], token))
+
+        # diubah lalu dihapus setelah token: hanya tombstone-nya yang dikirim, sekali
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/tourist-spots/%d' % self.spots[0].pk, {'name': 'Pulau Padar'},
+                              content_type='application/json')
+            self.client.patch('/api/tourist-spots/%d' % self.spots[1].pk, {'name': 'Pulau Komodo'},
+                              content_type='application/json')
+            self.assertEqual(self.client.delete('/api/tourist-spots/%d' % self.spots[0].pk).status_code, 200)
+        response = self.client.get('/api/sync?since=%d' % token).json()
+        self.assertEqual([(row['id'], row['action'], row['data']) for row in response['results']], [
+            (self.spots[1].pk, 'upsert', response['results'][0]['data']),
+            (self.spots[0].pk, 'delete', None),
+        ])
+        self.assertEqual(response['results'][0]['data']['name'], 'Pulau Komodo')
+        self.assertGreater(response['token'], token)
+
+    def test_cascade_delete_sends_tombstones(self):
+        token = self.sync()[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            job = cascade.start(self.province)
+        cascade.run(job)
+        results = self.sync(token)[0]
+        self.assertEqual(sorted(results), sorted(
+            [('province', self.province.pk, 'delete'), ('city', self.city.pk, 'delete')]
+            + [('touristspot', spot.pk, 'delete') for spot in self.spots]
+        ))
+
+    def test_deleted_after_log_is_sent_as_delete(self):
+        # objek yang hilang tanpa sinyal dikirim sebagai delete, bukan upsert tanpa data
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM %s WHERE id = %%s' % TouristSpot._meta.db_table, [self.spots[2].pk])
+        results = self.sync()[0]
+        self.assertIn(('touristspot', self.spots[2].pk, 'delete'), results)
+
+    def test_invalid_token(self):
+        for since in ('x', '-1'):
+            self.assertEqual(self.client.get('/api/sync?since=%s' % since).status_code, 400)
+
+
+class BenchmarkSuiteTests(TestCase):
+    """benchmarks.api: setiap route punya skenario, dan semua skenario berjalan tanpa error di data kecil."""
+
+    def setUp(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            seed_catalog(provinces=3, cities=20, spots=60)
+        refdata.refresh()
+
+    def test_every_route_runs_without_errors(self):
+        scenarios = benchmark.build_scenarios()
+        self.assertEqual(benchmark.uncovered_routes(scenarios), [])
+        args = argparse.Namespace(writes=True, warmup=0, requests=2)
+        # test runner sudah memanggil setup_test_environment()
+        with mock.patch('django.test.utils.setup_test_environment'), contextlib.redirect_stdout(io.StringIO()):
+            results = benchmark.run_client(scenarios, args)
+        self.assertEqual(set(results), {scenario.name for scenario in scenarios})
+        for name, result in results.items():
+            self.assertEqual((name, result['requests'], result['errors']), (name, 2, 0))
+        # penulisan di-rollback: data yang dibenchmark tetap sama antar run
+        self.assertEqual(TouristSpot.objects.count(), 60)
+
+    def test_compare_flags_regressions(self):
+        base = benchmark.summarize([0.010] * 19 + [0.020], 1.0, 0, [3] * 20)
+        # nearest-rank: p95 dari 20 nilai adalah nilai ke-19
+        self.assertEqual((base['p50_ms'], base['p95_ms'], base['p99_ms'], base['queries_mean']), (10.0, 10.0, 20.0, 3))
+        self.assertEqual(benchmark.percentile(list(range(1, 101)), 95), 95)
+        same = {'results': {'client': {'list': base}}}
+        self.assertEqual(benchmark.compare(same, same, 0.15), [])
+        slower = benchmark.summarize([0.015] * 20, 2.0, 1, [4] * 20)
+        regressions = benchmark.compare({'results': {'client': {'list': slower}}}, same, 0.15)
+        self.assertEqual([line.split(':')[1].split()[0] for line in regressions], ['error', 'p95', 'throughput', 'query'])
+
+
+class ProfilingTests(TestCase):
+    """api.profiling: Server-Timing di setiap response, cProfile hanya untuk request yang paling lambat."""
+
+    def setUp(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            city = City.objects.create(name='Medan', province=Province.objects.create(name='Sumatera Utara'))
+        TouristSpot.objects.create(name='Danau Toba', address='-', city=city, distance_from_city=170)
+        refdata.refresh()
+
+    def timings(self, response):
+        parts = {}
+        for part in response['Server-Timing'].split(', '):
+            name, *params = part.split(';')
+            parts[name] = dict(param.split('=', 1) for param in params)
+        return parts
+
+    def test_server_timing_counts_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tourist-spots?expand=city')
+        timings = self.timings(response)
+        self.assertEqual(list(timings), ['db', 'serialize', 'render', 'total'])
+        self.assertEqual(timings['db']['desc'], '"%d query"' % len(queries))
+        self.assertGreaterEqual(float(timings['total']['dur']), float(timings['db']['dur']))
+
+        # response dari cache: tanpa serialize/render
+        self.assertEqual(self.client.get('/api/tourist-spots?expand=city')['X-Cache'], 'HIT')
+        self.assertEqual(list(self.timings(self.client.get('/api/tourist-spots?expand=city'))), ['db', 'total'])
+
+    def test_async_requests_are_timed(self):
+        # lewat ASGI handler: middleware berjalan di __acall__
+        response = async_to_sync(self.async_client.get)('/api/provinces')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('total', self.timings(response))
+
+    def test_only_slowest_sampled_requests_are_dumped(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        delay = {'seconds': 0.0}
+
+        def view(request):
+            time.sleep(delay['seconds'])
+            return HttpResponse('ok')
+
+        with override_settings(API_PROFILE_SAMPLE_RATE=1.0, API_PROFILE_SLOWEST_PERCENT=10, API_PROFILE_DIR=directory.name):
+            middleware = ProfilingMiddleware(view)
+        request = RequestFactory().get('/api/provinces')
+        # kurang dari min_window durasi: belum ada yang bisa dibandingkan, tidak ada yang di-dump
+        for _ in range(ProfilingMiddleware.min_window - 1):
+            self.assertIn('total;dur=', middleware(request)['Server-Timing'])
+        self.assertEqual(os.listdir(directory.name), [])
+
+        delay['seconds'] = 0.05
+        middleware(request)
+        dumped = os.listdir(directory.name)
+        self.assertEqual(len(dumped), 1)
+        self.assertRegex(dumped[0], r'-GET-api-provinces-\d+ms\.prof$')
+
+
+class MetricsTests(TestCase):
+    """/metrics: counter dan histogram per view, dijumlahkan dari file mmap semua proses."""
+
+    def setUp(self):
+        get_cache().clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # direktori kosong per test; file metrik dibuka ulang lewat sinyal setting_changed
+        settings_override = override_settings(API_METRICS_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.directory = directory.name
+
+    def samples(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        values = {}
+        for line in response.content.decode().splitlines():
+            if line and not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                values[name] = float(value)
+        return values
+
+    def test_requests_per_view(self):
+        for url in ['/api/provinces', '/api/provinces', '/api/provinces/0']:
+            self.client.get(url)
+        tasks.enqueue('tests.record', {'value': 'x'})
+        samples = self.samples()
+        self.assertEqual(samples['api_requests_total{method="GET",status="200",view="ProvinceList"}'], 2.0)
+        self.assertEqual(samples['api_requests_total{method="GET",status="400",view="ProvinceDetail"}'], 1.0)
+        self.assertEqual(samples['api_requests_in_progress{view="ProvinceList"}'], 0.0)
+        # bucket kumulatif: +Inf sama dengan count
+        self.assertEqual(samples['api_request_duration_seconds_bucket{view="ProvinceList",le="+Inf"}'], 2.0)
+        self.assertEqual(samples['api_request_duration_seconds_count{view="ProvinceList"}'], 2.0)
+        self.assertLessEqual(samples['api_db_queries_per_request_bucket{view="ProvinceList",le="0.0"}'],
+                             samples['api_db_queries_per_request_bucket{view="ProvinceList",le="100.0"}'])
+        self.assertEqual(samples['api_response_cache_hit_ratio{view="ProvinceList"}'], 0.5)
+        self.assertEqual(samples['task_queue_depth{status="queued",task="tests.record"}'], 1.0)
+
+    def test_files_of_other_processes_are_summed(self):
+        self.client.get('/api/provinces')
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        # proses yang sudah selesai: counter-nya tetap dihitung, request yang "berjalan" tidak
+        other = metrics.MmapValues(os.path.join(self.directory, 'metrics_%d.db' % process.pid))
+        other.add(metrics.series('api_requests_total', {'view': 'ProvinceList', 'method': 'GET', 'status': '200'}), 3)
+        other.add(metrics.series('api_requests_in_progress', {'view': 'ProvinceList'}), 1)
+        other.add(metrics.series('api_requests_total', {'view': 'a"b\\c', 'method': 'GET', 'status': '200'}), 1)
+        samples = self.samples()
+        self.assertEqual(samples['api_requests_total{method="GET",status="200",view="ProvinceList"}'], 4.0)
+        self.assertEqual(samples['api_requests_in_progress{view="ProvinceList"}'], 0.0)
+        self.assertEqual(samples['api_requests_total{method="GET",status="200",view="a\\"b\\\\c"}'], 1.0)
+
+        metrics.clear()
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class ImageDerivativeTests(TestCase):
+    """uas_app.images: turunan WebP/JPEG dibuat worker, nama file dari hash isinya."""
+
+    def setUp(self):
+        get_cache().clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=directory.name, IMAGE_DERIVATIVE_WIDTHS=(320, 640, 1280))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city = City.objects.create(name='Bogor', province=Province.objects.create(name='Jawa Barat'))
+        refdata.refresh()
+
+    def upload(self, width, height, color='green', name='kebun.jpg'):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (width, height), color).save(buffer, 'JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_derivatives_built_by_worker(self):
+        spot = TouristSpot.objects.create(name='Kebun Raya', address='-', city=self.city, distance_from_city=1,
+                                          image=self.upload(1000, 500))
+        self.assertEqual(spot.image_derivatives, {})
+        self.assertEqual(tasks.Worker().run(burst=True), 1)
+
+        spot.refresh_from_db()
+        derivatives = spot.image_derivatives
+        self.assertEqual(derivatives['source'], spot.image.name)
+        # tidak diperbesar: 1280 lebih lebar dari aslinya
+        self.assertEqual({name: sorted(paths) for name, paths in derivatives.items() if name != 'source'},
+                         {'webp': ['320', '640'], 'jpeg': ['320', '640']})
+        storage = TouristSpot._meta.get_field('image').storage
+        from PIL import Image
+        with storage.open(derivatives['jpeg']['320']) as handle:
+            self.assertEqual(Image.open(handle).size, (320, 160))
+        with storage.open(derivatives['webp']['640']) as handle:
+            content = handle.read()
+        self.assertEqual(derivatives['webp']['640'],
+                         '%s/%s.webp' % (images.DERIVATIVE_DIR, hashlib.sha256(content).hexdigest()[:32]))
+
+        # isi sama -> nama sama, tidak ada file baru
+        self.assertEqual(images.build_derivatives(spot.image.name), derivatives)
+        self.assertEqual(len(storage.listdir(images.DERIVATIVE_DIR)[1]), 4)
+
+        data = self.client.get('/api/tourist-spots/%d' % spot.pk).json()['data']
+        self.assertEqual(data['image'], '/media/%s' % spot.image.name)
+        srcset = data['image_srcset']
+        self.assertEqual(srcset['webp'], '/media/%s 320w, /media/%s 640w' % (
+            derivatives['webp']['320'], derivatives['webp']['640']))
+
+    def test_replaced_and_removed_image(self):
+        spot = TouristSpot.objects.create(name='Kebun Raya', address='-', city=self.city, distance_from_city=1,
+                                          image=self.upload(200, 100))
+        tasks.Worker().run(burst=True)
+        spot.refresh_from_db()
+        self.assertEqual(sorted(spot.image_derivatives['webp']), ['200'])
+
+        spot.image = self.upload(400, 400, color='red', name='baru.jpg')
+        spot.save()
+        self.assertTrue(images.is_stale(spot))
+        # gambar diganti lagi selama turunan dibuat: hasil untuk gambar lama tidak ditulis
+        build = images.build_derivatives
+
+        def replaced_meanwhile(name, storage=None):
+            TouristSpot.objects.filter(pk=spot.pk).update(image='tourism_images/lain.jpg')
+            return build(name, storage)
+
+        with mock.patch.object(images, 'build_derivatives', replaced_meanwhile):
+            self.assertFalse(images.update_spot(spot.pk))
+        TouristSpot.objects.filter(pk=spot.pk).update(image=spot.image.name)
+        self.assertTrue(images.update_spot(spot.pk))
+        spot.refresh_from_db()
+        self.assertEqual((spot.image_derivatives['source'], sorted(spot.image_derivatives['jpeg'])),
+                         (spot.image.name, ['320']))
+
+        spot.image = None
+        spot.save()
+        tasks.Worker().run(burst=True)
+        spot.refresh_from_db()
+        self.assertEqual(spot.image_derivatives, {})
+        self.assertEqual(self.client.get('/api/tourist-spots/%d' % spot.pk).json()['data']['image_srcset'], {})
+
+    def test_version_bumped_and_superseded_files_deleted(self):
+        spot = TouristSpot.objects.create(name='Kebun Raya', address='-', city=self.city, distance_from_city=1,
+                                          image=self.upload(200, 100))
+        # gambar yang sama di tempat wisata lain: file turunannya dipakai bersama
+        twin = TouristSpot.objects.create(name='Kebun Raya 2', address='-', city=self.city, distance_from_city=1,
+                                          image=self.upload(200, 100))
+        tasks.Worker().run(burst=True)
+        spot.refresh_from_db()
+        twin.refresh_from_db()
+        self.assertEqual(images.derivative_paths(spot.image_derivatives),
+                         images.derivative_paths(twin.image_derivatives))
+        etag = self.client.get('/api/tourist-spots/%d' % spot.pk)['ETag']
+
+        storage = TouristSpot._meta.get_field('image').storage
+        old = images.derivative_paths(spot.image_derivatives)
+        for instance, color in [(spot, 'red'), (twin, 'blue')]:
+            instance.image = self.upload(400, 400, color=color, name='baru.jpg')
+            instance.save()
+            modified = TouristSpot.objects.get(pk=instance.pk).last_modified
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertTrue(images.update_spot(instance.pk))
+            instance.refresh_from_db()
+            self.assertGreater(instance.last_modified, modified)
+            # file lama baru dihapus setelah tidak ada lagi yang merujuknya
+            self.assertEqual({path for path in old if storage.exists(path)}, set() if instance is twin else old)
+            self.assertTrue(all(storage.exists(path) for path in images.derivative_paths(instance.image_derivatives)))
+        self.assertNotEqual(self.client.get('/api/tourist-spots/%d' % spot.pk)['ETag'], etag)